@@ -0,0 +1,279 @@
+"""
+Display backends.
+
+The WM, renderer and input handler talk to the server through the object
+model python-xlib exposes (Display, Window, GC, Pixmap, reply objects).
+That model is the backend interface: a backend hands out display
+connections, and any implementation of the subset below can drive the WM.
+
+    display   screen(), intern_atom, get_atom_name, keysym_to_keycode,
+              keycode_to_keysym, set_input_focus, get_input_focus,
+              get_selection_owner, open_font, allow_events, ungrab_keyboard,
+              query_extension/has_extension, create_resource_object,
+              sync, flush, pending_events, next_event, display.request_serial
+    window    create_window, configure, change_attributes, get_attributes,
+              map, unmap, reparent, destroy, query_tree, get_geometry,
+              translate_coords, change_property, get_full_property, get_wm_name/class/
+              normal_hints/transient_for, grab_key, grab_button,
+              grab_keyboard, send_event, kill_client
+    drawing   create_gc, create_pixmap, fill_rectangle, rectangle,
+              draw_text, copy_area, clear_area, gc.change/set_clip_rectangles
+
+Backends also answer fetch_window_info(): everything the WM reads from a
+client before managing it, for a batch of windows at once. The default
+issues those queries one after another; XcbBackend pipelines them.
+"""
+
+from array import array
+from Xlib import X, Xatom, display
+from Xlib.xobject import icccm
+
+INFO_ATOMS = ('WM_PROTOCOLS', '_NET_WM_NAME', '_NET_WM_PID', '_NET_WM_SYNC_REQUEST',
+              '_NET_WM_SYNC_REQUEST_COUNTER', 'UTF8_STRING', '_NET_WM_WINDOW_TYPE',
+              '_NET_WM_WINDOW_TYPE_DOCK', '_NET_WM_STRUT_PARTIAL')
+
+
+class WindowInfo:
+    """Attributes, geometry and ICCCM/EWMH properties of one client window"""
+
+    def __init__(self, window):
+        self.window = window
+        self.exists = False
+        self.override_redirect = False
+        self.geometry = None
+        self.name = None
+        self.net_wm_name = None
+        self.wm_class = None
+        self.normal_hints = None
+        self.transient_for = None
+        self.protocols = []
+        self.pid = None
+        self.sync_counter = None
+        self.window_type = []
+        self.strut = None
+
+
+class PropertyValue:
+    def __init__(self, property_type, format, value):
+        self.property_type = property_type
+        self.format = format
+        self.value = value
+
+
+def _text(prop, utf8_atom):
+    if prop is None or prop.format != 8 or not prop.value:
+        return None
+    encoding = 'utf-8' if prop.property_type == utf8_atom else 'iso-8859-1'
+    return bytes(prop.value).decode(encoding, 'replace')
+
+
+def _cards(prop):
+    if prop is None or prop.format != 32:
+        return []
+    return [int(v) for v in prop.value]
+
+
+def fill_window_info(info, attrs, geometry, props, atoms, d):
+    """Populate info from replies; props maps field name -> property (or None)"""
+    info.exists = True
+    info.override_redirect = bool(attrs.override_redirect)
+    info.geometry = (geometry.x, geometry.y, geometry.width, geometry.height)
+    info.name = _text(props['name'], atoms['UTF8_STRING'])
+    info.net_wm_name = _text(props['net_wm_name'], atoms['UTF8_STRING'])
+
+    wm_class = _text(props['wm_class'], atoms['UTF8_STRING'])
+    if wm_class:
+        parts = wm_class.split('\0')
+        if len(parts) >= 2:
+            info.wm_class = (parts[0], parts[1])
+
+    hints = _cards(props['normal_hints'])
+    if len(hints) == 18:
+        info.normal_hints = icccm.WMNormalHints.parse_binary(array('I', hints).tobytes(), d)[0]
+
+    transient = _cards(props['transient_for'])
+    info.transient_for = transient[0] if transient and transient[0] else None
+    info.protocols = _cards(props['protocols'])
+    pid = _cards(props['pid'])
+    info.pid = pid[0] if pid else None
+    counter = _cards(props['sync_counter'])
+    info.sync_counter = counter[0] if counter else None
+    info.window_type = _cards(props['window_type'])
+    strut = _cards(props['strut'])
+    info.strut = tuple(strut) if len(strut) == 12 and any(strut[:4]) else None
+    return info
+
+
+def property_requests(atoms):
+    """(field, property atom, type, length in 32-bit units) for fetch_window_info"""
+    return (
+        ('name', Xatom.WM_NAME, X.AnyPropertyType, 256),
+        ('net_wm_name', atoms['_NET_WM_NAME'], X.AnyPropertyType, 256),
+        ('wm_class', Xatom.WM_CLASS, Xatom.STRING, 256),
+        ('normal_hints', Xatom.WM_NORMAL_HINTS, Xatom.WM_SIZE_HINTS, 18),
+        ('transient_for', Xatom.WM_TRANSIENT_FOR, Xatom.WINDOW, 1),
+        ('protocols', atoms['WM_PROTOCOLS'], Xatom.ATOM, 64),
+        ('pid', atoms['_NET_WM_PID'], Xatom.CARDINAL, 1),
+        ('sync_counter', atoms['_NET_WM_SYNC_REQUEST_COUNTER'], Xatom.CARDINAL, 1),
+        ('window_type', atoms['_NET_WM_WINDOW_TYPE'], Xatom.ATOM, 16),
+        ('strut', atoms['_NET_WM_STRUT_PARTIAL'], Xatom.CARDINAL, 12),
+    )
+
+
+class Backend:
+    name = None
+    config_overrides = {}
+
+    def open_display(self):
+        raise NotImplementedError
+
+    def info_atoms(self, d):
+        if not hasattr(self, '_info_atoms'):
+            self._info_atoms = {name: d.intern_atom(name) for name in INFO_ATOMS}
+        return self._info_atoms
+
+    def _wanted(self, field, attrs, props, atoms):
+        """Skip queries whose answer the WM would not use (each one is a round trip here)"""
+        if field == 'net_wm_name':
+            return attrs.override_redirect
+        if field == 'sync_counter':
+            return atoms['_NET_WM_SYNC_REQUEST'] in _cards(props.get('protocols'))
+        return True
+
+    def fetch_window_info(self, d, windows):
+        """[WindowInfo] for windows, one blocking query at a time"""
+        atoms = self.info_atoms(d)
+        result = []
+        for window in windows:
+            info = WindowInfo(window)
+            try:
+                attrs = window.get_attributes()
+                geometry = window.get_geometry()
+                props = {}
+                for field, atom, ptype, length in property_requests(atoms):
+                    if not self._wanted(field, attrs, props, atoms):
+                        props[field] = None
+                        continue
+                    try:
+                        props[field] = window.get_property(atom, ptype, 0, length)
+                    except Exception:
+                        props[field] = None
+                fill_window_info(info, attrs, geometry, props, atoms, d)
+            except Exception:
+                pass
+            result.append(info)
+        return result
+
+
+class XlibBackend(Backend):
+    """A real X server through python-xlib"""
+    name = "xlib"
+
+    def __init__(self, display_name=None):
+        self.display_name = display_name
+
+    def open_display(self):
+        return display.Display(self.display_name)
+
+
+class XcbBackend(XlibBackend):
+    """
+    python-xlib for events and drawing, plus an xcffib connection for the
+    read-only queries in fetch_window_info. xcffib requests return cookies,
+    so every query for every window in a batch goes out before the first
+    reply is read: one round trip per batch instead of one per property.
+    Raises ImportError if xcffib is not installed.
+    """
+    name = "xcb"
+
+    def __init__(self, display_name=None):
+        super().__init__(display_name)
+        import xcffib
+        import xcffib.xproto
+        self.conn = xcffib.Connection(display_name)
+
+    def info_atoms(self, d):
+        if not hasattr(self, '_info_atoms'):
+            core = self.conn.core
+            cookies = [(name, core.InternAtom(False, len(name), name)) for name in INFO_ATOMS]
+            self._info_atoms = {name: cookie.reply().atom for name, cookie in cookies}
+        return self._info_atoms
+
+    def fetch_window_info(self, d, windows):
+        """[WindowInfo] for windows, all queries pipelined"""
+        core = self.conn.core
+        atoms = self.info_atoms(d)
+        requests = property_requests(atoms)
+        pending = []
+        for window in windows:
+            wid = window.id
+            pending.append((
+                window,
+                core.GetWindowAttributes(wid),
+                core.GetGeometry(wid),
+                [(field, core.GetProperty(False, wid, atom, ptype, 0, length))
+                 for field, atom, ptype, length in requests],
+            ))
+        self.conn.flush()
+
+        result = []
+        for window, attrs, geometry, props in pending:
+            info = WindowInfo(window)
+            try:
+                try:
+                    attrs = attrs.reply()
+                finally:
+                    # read even when the window is gone, so no reply is left pending
+                    geometry = geometry.reply()
+            except Exception:
+                for _, cookie in props:
+                    self._discard(cookie)
+                result.append(info)
+                continue
+            values = {}
+            for field, cookie in props:
+                try:
+                    r = cookie.reply()
+                    raw = r.value.buf()
+                    value = raw if r.format == 8 else array('I' if r.format == 32 else 'H', raw)
+                    values[field] = PropertyValue(r.type, r.format, value) if r.type else None
+                except Exception:
+                    values[field] = None
+            result.append(fill_window_info(info, attrs, geometry, values, atoms, d))
+        return result
+
+    def _discard(self, cookie):
+        try:
+            cookie.reply()
+        except Exception:
+            pass
+
+
+class FakeBackend(Backend):
+    """
+    The in-process fake server from fakex. External helpers (picom, feh)
+    would talk to the real $DISPLAY, so they are switched off.
+    """
+    name = "fake"
+    config_overrides = {"use_picom": False, "wallpaper_path": ""}
+
+    def __init__(self, width=1920, height=1080):
+        import fakex
+        self.server = fakex.FakeServer(width, height)
+
+    def open_display(self):
+        return self.server.connect()
+
+
+BACKENDS = {
+    "xlib": XlibBackend,
+    "xcb": XcbBackend,
+    "fake": FakeBackend,
+}
+
+
+def get_backend(name, **kwargs):
+    try:
+        return BACKENDS[name](**kwargs)
+    except KeyError:
+        raise ValueError(f"unknown backend '{name}' (choose from {', '.join(BACKENDS)})")
@@ -0,0 +1,124 @@
+"""
+Micro-benchmarks on the in-process fake X server (see fakex.py).
+
+    python3 bench.py --windows 2000
+
+Runs a real WindowManager on FakeBackend, maps N client windows spread over
+the canvas, then times panning, zooming, moving one window and focus
+changes. Reports wall time, X requests and reply round trips per
+operation, and how much of the root CPU mode had to repaint.
+"""
+
+import argparse
+import contextlib
+import io
+import time
+from backend import FakeBackend
+from wm import WindowManager
+
+
+class Bench:
+    def __init__(self, windows, width, height):
+        self.backend = FakeBackend(width, height)
+        self.server = self.backend.server
+        with contextlib.redirect_stdout(io.StringIO()):
+            self.wm = WindowManager(backend=self.backend)
+        self.client = self.backend.open_display()
+        self.count = windows
+
+    def pump(self):
+        d = self.wm.d
+        while d.pending_events():
+            self.wm.handle_event(d.next_event())
+
+    def measure(self, name, ops, fn):
+        requests = self.server.requests.copy()
+        trips = self.server.round_trips
+        start = time.perf_counter()
+        with contextlib.redirect_stdout(io.StringIO()):
+            for i in range(ops):
+                fn(i)
+                self.wm.scheduler.flush()
+        elapsed = time.perf_counter() - start
+        sent = sum((self.server.requests - requests).values())
+        trips = self.server.round_trips - trips
+        print(f"  {name:<14}{ops:>7}{elapsed * 1000 / ops:>12.3f}{sent / ops:>12.1f}{trips / ops:>10.1f}")
+
+    def map_window(self, i):
+        root = self.client.screen().root
+        w = root.create_window(0, 0, 320 + (i % 7) * 40, 240 + (i % 5) * 30, 0, self.server.depth)
+        w.set_wm_name(f"bench {i}")
+        w.set_wm_class("bench", f"Bench{i % 12}")
+        cam = self.wm.camera
+        cam.x = (i % 40) * 500
+        cam.y = (i // 40) * 400
+        w.map()
+        self.pump()
+
+    def churn(self, i):
+        """A short-lived dialog: map it, then destroy it"""
+        root = self.client.screen().root
+        w = root.create_window(0, 0, 300, 160, 0, self.server.depth)
+        w.set_wm_name(f"dialog {i}")
+        w.map()
+        self.pump()
+        self.wm.scheduler.flush()
+        w.destroy()
+        self.pump()
+
+    def pan(self, i):
+        self.wm.camera.x += 15
+        self.wm.scheduler.invalidate()
+
+    def zoom(self, i):
+        self.wm.zoom_camera(-1 if (i // 10) % 2 == 0 else 1)
+
+    def move(self, i):
+        win = self.wm.focused_window
+        win.world_x += 10 if (i // 25) % 2 == 0 else -10
+        self.wm.window_moved(win)
+        self.wm.scheduler.invalidate()
+
+    def focus(self, i):
+        wins = list(self.wm.windows.values())
+        self.wm.focus_window(wins[(i * 37) % len(wins)])
+
+    def run(self):
+        print(f"DragonDesktop fake-server benchmark: {self.count} windows")
+        print(f"  {'operation':<14}{'ops':>7}{'ms/op':>12}{'requests/op':>12}{'trips/op':>10}")
+        self.measure("map", self.count, self.map_window)
+        pool = self.wm.frame_pool
+        pool.refill()
+        hits, misses = pool.hits, pool.misses
+        self.measure("churn", 100, self.churn)
+        print(f"  frame pool during churn: {pool.hits - hits} hits, {pool.misses - misses} misses")
+        self.wm.camera.x = self.wm.camera.y = 0
+        self.wm.camera.zoom = 1.0
+        self.measure("pan", 100, self.pan)
+        self.measure("zoom", 40, self.zoom)
+        self.wm.end_zoom_gesture()
+        self.wm.scheduler.flush()
+        self.measure("focus", 100, self.focus)
+        damage = self.wm.renderer.damage
+        win = self.wm.focused_window
+        self.wm.camera.x, self.wm.camera.y = win.world_x, win.world_y
+        self.wm.scheduler.flush()
+        cleared = damage.cleared_area
+        self.measure("move", 100, self.move)
+        screen = damage.screen_w * damage.screen_h
+        print(f"  root repaint during move: {(damage.cleared_area - cleared) / 100 / screen:.1%} of the screen per op")
+        top = ", ".join(f"{name} {n}" for name, n in self.server.requests.most_common(6))
+        print(f"  most issued: {top}")
+
+
+def main():
+    parser = argparse.ArgumentParser(description="Benchmark DragonDesktop against the in-process fake X server")
+    parser.add_argument("--windows", type=int, default=500)
+    parser.add_argument("--size", default="1920x1080", help="screen size WxH")
+    args = parser.parse_args()
+    width, height = (int(v) for v in args.size.split("x"))
+    Bench(args.windows, width, height).run()
+
+
+if __name__ == "__main__":
+    main()
@@ -0,0 +1,184 @@
+from Xlib import Xatom
+from placement import SpatialIndex
+import log
+
+DEFAULT_CANVASES = ["1", "2", "3", "4"]
+
+
+class Canvas:
+    """One named canvas: its windows, free-space index and per-output camera views"""
+
+    def __init__(self, name):
+        self.name = name
+        self.windows = {}
+        self.index = SpatialIndex()
+        self.views = {}
+        self.focused = None
+
+
+class CanvasManager:
+    """
+    Several named infinite canvases, one shown at a time.
+
+    Each canvas keeps its own window index (what render_world, the minimap,
+    placement and alt-tab look at), a spatial index for placement, and the
+    position, zoom and saved spots of every output's camera. The Camera
+    objects themselves stay put; switching swaps their state, unmaps the
+    outgoing canvas's frames and maps the incoming ones in one pass, then
+    renders once.
+
+    Exposed through EWMH desktops (_NET_NUMBER_OF_DESKTOPS,
+    _NET_DESKTOP_NAMES, _NET_CURRENT_DESKTOP, _NET_WM_DESKTOP) so pagers
+    such as polybar's xworkspaces module list and switch them.
+
+    Config:
+        "canvases": ["main", "work", "personal"]
+    """
+
+    def __init__(self, wm, config):
+        self.wm = wm
+        d = wm.d
+        self._NET_NUMBER_OF_DESKTOPS = d.intern_atom('_NET_NUMBER_OF_DESKTOPS')
+        self._NET_DESKTOP_NAMES = d.intern_atom('_NET_DESKTOP_NAMES')
+        self._NET_CURRENT_DESKTOP = d.intern_atom('_NET_CURRENT_DESKTOP')
+        self._NET_WM_DESKTOP = d.intern_atom('_NET_WM_DESKTOP')
+        self.UTF8_STRING = d.intern_atom('UTF8_STRING')
+        self.canvases = []
+        self.active = 0
+        self.configure(config)
+
+    @property
+    def atoms(self):
+        return [self._NET_NUMBER_OF_DESKTOPS, self._NET_DESKTOP_NAMES,
+                self._NET_CURRENT_DESKTOP, self._NET_WM_DESKTOP]
+
+    @property
+    def current(self):
+        return self.canvases[self.active]
+
+    @property
+    def windows(self):
+        """Windows on the active canvas"""
+        return self.canvases[self.active].windows
+
+    def configure(self, config):
+        names = [str(n) for n in config.get("canvases", DEFAULT_CANVASES) if str(n)] or DEFAULT_CANVASES
+        for i, name in enumerate(names):
+            if i < len(self.canvases):
+                self.canvases[i].name = name
+            else:
+                self.canvases.append(Canvas(name))
+        if len(self.canvases) > len(names):
+            last = len(names) - 1
+            if self.active > last:
+                self.switch(last)
+            for canvas in self.canvases[len(names):]:
+                for win in list(canvas.windows.values()):
+                    self.move_window(win, last)
+            del self.canvases[len(names):]
+        self.publish()
+
+    def publish(self):
+        root = self.wm.root
+        try:
+            root.change_property(self._NET_NUMBER_OF_DESKTOPS, Xatom.CARDINAL, 32, [len(self.canvases)])
+            names = b''.join(c.name.encode('utf-8') + b'\0' for c in self.canvases)
+            root.change_property(self._NET_DESKTOP_NAMES, self.UTF8_STRING, 8, names)
+            root.change_property(self._NET_CURRENT_DESKTOP, Xatom.CARDINAL, 32, [self.active])
+        except Exception as e:
+            log.warning("⚠ Canvas hints update failed: %s", e)
+
+    def add(self, win, index=None):
+        """Put a newly managed window on a canvas (the active one by default)"""
+        index = self.active if index is None else max(0, min(index, len(self.canvases) - 1))
+        win.canvas = index
+        self.canvases[index].windows[win.id] = win
+        self.canvases[index].index.update(win.id, win)
+        try:
+            win.client.change_property(self._NET_WM_DESKTOP, Xatom.CARDINAL, 32, [index])
+        except Exception:
+            pass
+
+    def remove(self, win):
+        for canvas in self.canvases:
+            canvas.windows.pop(win.id, None)
+            canvas.index.remove(win.id)
+            if canvas.focused == win.id:
+                canvas.focused = None
+
+    def reindex(self, win):
+        """Window was mapped, unmapped, moved or resized: update its canvas's placement index"""
+        if 0 <= win.canvas < len(self.canvases):
+            self.canvases[win.canvas].index.update(win.id, win)
+
+    def is_visible(self, win):
+        return win.canvas == self.active
+
+    def switch(self, index):
+        """Show canvas index: swap camera state, unmap the old frames, map the new ones"""
+        if not 0 <= index < len(self.canvases) or index == self.active:
+            return
+        wm = self.wm
+        old, new = self.current, self.canvases[index]
+        focused = wm.focused_window
+        old.focused = focused.id if focused and focused.id in old.windows else None
+
+        for output in wm.outputs.outputs:
+            cam = output.camera
+            old.views[output.name] = (cam.x, cam.y, cam.zoom, cam.saved_spots)
+            cam.x, cam.y, cam.zoom, cam.saved_spots = new.views.get(output.name, (0, 0, 1.0, {}))
+
+        for win in old.windows.values():
+            if win.mapped and not win.hidden_offscreen:
+                win.frame.unmap()
+        for win in new.windows.values():
+            if win.mapped and not win.hidden_offscreen:
+                win.frame.map()
+
+        self.active = index
+        self.publish()
+        wm.navigator.reset()
+        wm.renderer.damage.add_all()
+        target = new.windows.get(new.focused)
+        if target:
+            wm.focus_window(target)
+        else:
+            wm.unfocus_all()
+        wm.scheduler.invalidate()
+        log.debug("✓ Canvas %s (%d windows)", new.name, len(new.windows))
+
+    def move_window(self, win, index):
+        """Send a window, and the windows grouped under it, to another canvas"""
+        if not 0 <= index < len(self.canvases) or index == win.canvas:
+            return
+        wm = self.wm
+        if wm.scene.parent_of(win.id) is not None:
+            wm.scene.detach(win)
+        for win_id in wm.scene.subtree(win.id):
+            member = wm.windows.get(win_id)
+            if member is None:
+                continue
+            leaving = member.canvas == self.active
+            self.canvases[member.canvas].windows.pop(member.id, None)
+            self.canvases[member.canvas].index.remove(member.id)
+            self.add(member, index)
+            if member.mapped and not member.hidden_offscreen:
+                if leaving:
+                    member.frame.unmap()
+                elif index == self.active:
+                    member.frame.map()
+            if member is wm.focused_window and leaving:
+                wm.unfocus_all()
+        wm.scheduler.invalidate()
+
+    def handle_client_message(self, event):
+        """Pager requests; True if the message was one of ours"""
+        if event.client_type == self._NET_CURRENT_DESKTOP:
+            self.switch(event.data[1][0])
+            return True
+        if event.client_type == self._NET_WM_DESKTOP:
+            win = self.wm.windows.get(event.window.id)
+            if win:
+                self.move_window(win, event.data[1][0])
+            return True
+        return False
@@ -0,0 +1,136 @@
+"""
+Config file discovery, validation and change watching.
+
+Search order for config.json:
+    $DRAGON_CONFIG
+    $XDG_CONFIG_HOME/dragondesktop/config.json  (~/.config by default)
+    $XDG_CONFIG_DIRS/dragondesktop/config.json  (/etc/xdg by default)
+    /opt/dragondesktop/config.json
+    ./config.json                                (legacy: install dir)
+"""
+
+import json
+import os
+
+APP_DIR = "dragondesktop"
+INSTALL_DIR = "/opt/dragondesktop"
+
+DEFAULT_CONFIG = {
+    "wallpaper_path": "",
+    "aliases": {
+        "settings": "python3 settings_menu.py"
+    }
+}
+
+SCHEMA = {
+    "wallpaper_path": str,
+    "use_picom": bool,
+    "picom_config": str,
+    "aliases": dict,
+    "minimap": dict,
+    "semantic_zoom": dict,
+    "offscreen_hiding": dict,
+    "guard_band": dict,
+    "zoom_resize_idle_ms": (int, float),
+    "navigation": dict,
+    "keybindings": dict,
+    "placement": dict,
+    "canvases": list,
+    "logging": dict,
+    "frame_pool": dict,
+    "snapping": dict,
+}
+
+
+def user_config_path():
+    """Per-user config file (may not exist yet)"""
+    base = os.environ.get("XDG_CONFIG_HOME") or os.path.expanduser("~/.config")
+    return os.path.join(base, APP_DIR, "config.json")
+
+
+def candidate_paths():
+    paths = []
+    if os.environ.get("DRAGON_CONFIG"):
+        paths.append(os.path.expanduser(os.environ["DRAGON_CONFIG"]))
+    paths.append(user_config_path())
+    for base in (os.environ.get("XDG_CONFIG_DIRS") or "/etc/xdg").split(":"):
+        if base:
+            paths.append(os.path.join(base, APP_DIR, "config.json"))
+    paths.append(os.path.join(INSTALL_DIR, "config.json"))
+    paths.append(os.path.abspath("config.json"))
+    return paths
+
+
+def config_path():
+    """First existing config file, or None"""
+    for path in candidate_paths():
+        if os.path.isfile(path):
+            return path
+    return None
+
+
+def validate(cfg):
+    """Return a list of problems; empty means the config is usable"""
+    if not isinstance(cfg, dict):
+        return ["top level must be a JSON object"]
+    errors = []
+    for key, expected in SCHEMA.items():
+        if key in cfg and not isinstance(cfg[key], expected):
+            names = expected.__name__ if isinstance(expected, type) else "/".join(t.__name__ for t in expected)
+            errors.append(f"'{key}' should be {names}, got {type(cfg[key]).__name__}")
+    aliases = cfg.get("aliases")
+    if isinstance(aliases, dict):
+        for name, cmd in aliases.items():
+            if not isinstance(cmd, str):
+                errors.append(f"alias '{name}' must be a string")
+    return errors
+
+
+def load(path):
+    """Read and validate a config file. Raises ValueError on invalid content."""
+    with open(path, "r") as f:
+        cfg = json.load(f)
+    errors = validate(cfg)
+    if errors:
+        raise ValueError("; ".join(errors))
+    return cfg
+
+
+def diff(old, new):
+    """Top-level keys whose value changed, was added or was removed"""
+    return {k for k in set(old) | set(new) if old.get(k) != new.get(k)}
+
+
+class ConfigWatcher:
+    """
+    Polls the resolved config path's mtime from the WM event loop.
+    Also notices when a higher-priority file appears (e.g. the user saves
+    their first ~/.config/dragondesktop/config.json).
+    """
+    POLL_INTERVAL = 1.0
+
+    def __init__(self, timers, on_change):
+        self.timers = timers
+        self.on_change = on_change
+        self.path = config_path()
+        self.mtime = self._mtime(self.path)
+
+    def _mtime(self, path):
+        try:
+            return os.stat(path).st_mtime_ns if path else None
+        except OSError:
+            return None
+
+    def start(self):
+        self.timers.call_later(self.POLL_INTERVAL, 'config_poll', self.poll)
+
+    def poll(self):
+        try:
+            path = config_path()
+            mtime = self._mtime(path)
+            if path != self.path or mtime != self.mtime:
+                self.path = path
+                self.mtime = mtime
+                self.on_change(path)
+        finally:
+            self.start()
@@ -0,0 +1,113 @@
+class DamageTracker:
+    """
+    Screen regions of the root that need their wallpaper repainted (CPU mode).
+
+    render_world reports the rect every frame ends up at; whatever a frame
+    covered in the previous render but no longer does (it moved, shrank, was
+    culled or went away) is vacated and gets cleared. Root Expose rects are
+    added as they arrive. Newly covered regions need nothing here, the frame
+    paints them itself. flush() clears the accumulated rects, or the whole
+    root when there are too many of them to be worth it.
+    """
+
+    MAX_RECTS = 32
+    FULL_FRACTION = 0.6
+
+    def __init__(self, root, screen_w, screen_h):
+        self.root = root
+        self.screen_w = screen_w
+        self.screen_h = screen_h
+        self.previous = {}
+        self.current = {}
+        self.rects = []
+        self.full = True
+        self.cleared_area = 0
+        self.full_clears = 0
+
+    def add(self, x, y, w, h):
+        x1, y1 = max(0, x), max(0, y)
+        x2, y2 = min(self.screen_w, x + w), min(self.screen_h, y + h)
+        if x2 > x1 and y2 > y1:
+            self.rects.append((x1, y1, x2 - x1, y2 - y1))
+
+    def add_all(self):
+        self.full = True
+
+    def resize(self, screen_w, screen_h):
+        """The root changed size (RandR): clip to the new size and repaint all of it"""
+        self.screen_w = screen_w
+        self.screen_h = screen_h
+        self.full = True
+
+    def reset(self):
+        """Drop pending damage (compositor mode); the next CPU flush clears everything"""
+        self.rects = []
+        self.full = True
+
+    def frame(self, frame_id, rect):
+        """Called for every frame render_world puts on screen"""
+        self.current[frame_id] = rect
+
+    def end_frame(self):
+        """Turn the difference between this render and the last into damage"""
+        for frame_id, old in self.previous.items():
+            new = self.current.get(frame_id)
+            if new != old:
+                for rect in subtract(old, new) if new else [old]:
+                    self.add(*rect)
+        self.previous, self.current = self.current, {}
+
+    def flush(self):
+        if not self.full:
+            rects = merge(self.rects)
+            area = sum(w * h for _, _, w, h in rects)
+            self.full = len(rects) > self.MAX_RECTS or area > self.screen_w * self.screen_h * self.FULL_FRACTION
+        if self.full:
+            self.root.clear_area()
+            self.full_clears += 1
+            self.cleared_area += self.screen_w * self.screen_h
+        else:
+            for x, y, w, h in rects:
+                self.root.clear_area(x=x, y=y, width=w, height=h)
+                self.cleared_area += w * h
+        self.rects = []
+        self.full = False
+
+
+def subtract(a, b):
+    """Parts of rect a not covered by rect b, as up to four rects"""
+    ax, ay, aw, ah = a
+    bx, by, bw, bh = b
+    ax2, ay2, bx2, by2 = ax + aw, ay + ah, bx + bw, by + bh
+    if bx >= ax2 or bx2 <= ax or by >= ay2 or by2 <= ay:
+        return [a]
+    out = []
+    if by > ay:
+        out.append((ax, ay, aw, by - ay))
+    if by2 < ay2:
+        out.append((ax, by2, aw, ay2 - by2))
+    top, bottom = max(ay, by), min(ay2, by2)
+    if bx > ax:
+        out.append((ax, top, bx - ax, bottom - top))
+    if bx2 < ax2:
+        out.append((bx2, top, ax2 - bx2, bottom - top))
+    return out
+
+
+def merge(rects):
+    """Drop contained rects; join overlapping ones whose bounding box is no bigger than the two together"""
+    rects = sorted(set(rects), key=lambda r: -r[2] * r[3])
+    out = []
+    for r in rects:
+        x, y, w, h = r
+        for i, (ox, oy, ow, oh) in enumerate(out):
+            if ox <= x and oy <= y and x + w <= ox + ow and y + h <= oy + oh:
+                break
+            ux, uy = min(x, ox), min(y, oy)
+            uw, uh = max(x + w, ox + ow) - ux, max(y + h, oy + oh) - uy
+            if uw * uh <= w * h + ow * oh:
+                out[i] = (ux, uy, uw, uh)
+                break
+        else:
+            out.append(r)
+    return out
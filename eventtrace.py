@@ -0,0 +1,193 @@
+"""
+Compact binary traces of the event stream seen by WindowManager.run.
+
+File layout: MAGIC, then records. Each record is a fixed header
+
+    <I  microseconds since the previous record
+    B   X event type (ATOM_DEF for atom name records)
+    B   detail (button / motion hint)
+    B   window kind (KIND_*), says how the window id is interpreted
+    B   number of extra int32 values that follow
+    H   modifier state
+    I   window reference (client id for client/frame/button kinds)
+    4h  root_x, root_y, event_x, event_y
+    I   server timestamp
+
+followed by the extra values. ATOM_DEF records reuse state as the name
+length and ref as the atom id, followed by the UTF-8 name; BATCH_END
+records (header only) mark where the event loop drained its queue. Window references are stored relative to
+the managing client (e.g. "frame of client 0x1a00003") so a replay can
+map them onto the windows it creates. Atoms and keysyms are stored
+server-independently: atoms through ATOM_DEF name records, keys as keysyms.
+"""
+
+import struct
+import time
+from Xlib import X
+
+MAGIC = b"DRGNTRC1"
+HEADER = struct.Struct("<IBBBBHIhhhhI")
+ATOM_DEF = 255
+BATCH_END = 254
+
+KIND_NONE = 0
+KIND_ROOT = 1
+KIND_CLIENT = 2
+KIND_FRAME = 3
+KIND_BTN_CLOSE = 4  # titlebar button subwindows, only in traces from older versions
+KIND_BTN_FULL = 5
+KIND_OTHER = 6
+KIND_CMD_BAR = 7
+KIND_MINIMAP = 8
+
+KEY_EVENTS = (X.KeyPress, X.KeyRelease)
+POINTER_EVENTS = (X.ButtonPress, X.ButtonRelease, X.MotionNotify)
+
+
+def _clamp16(v):
+    return max(-32768, min(32767, int(v)))
+
+
+class Recorder:
+    """
+    Appends every dispatched event to a trace file. Enabled with main.py --record FILE.
+    With append (a WM restarted in place) an existing trace is continued.
+    """
+
+    def __init__(self, wm, path, append=False):
+        self.wm = wm
+        self.path = path
+        self.f = open(path, "ab" if append else "wb", buffering=1 << 16)
+        if self.f.tell() == 0:
+            self.f.write(MAGIC)
+        self.last = time.monotonic()
+        self.atoms = set()
+        self.count = 0
+        print(f"● Recording events to {path}")
+
+    def close(self):
+        if self.f:
+            self.f.close()
+            self.f = None
+            print(f"● Recorded {self.count} events to {self.path}")
+
+    def _window_ref(self, window_id):
+        wm = self.wm
+        if window_id == wm.root.id:
+            return KIND_ROOT, 0
+        if window_id in wm.windows:
+            return KIND_CLIENT, window_id
+        if window_id in wm.frame_to_client:
+            return KIND_FRAME, wm.frame_to_client[window_id]
+        if window_id == wm.cmd_window.id:
+            return KIND_CMD_BAR, 0
+        if window_id == wm.minimap.window.id:
+            return KIND_MINIMAP, 0
+        return KIND_OTHER, window_id
+
+    def _atom(self, atom):
+        """Write an ATOM_DEF record the first time an atom is used"""
+        if atom and atom not in self.atoms:
+            self.atoms.add(atom)
+            name = self.wm.d.get_atom_name(atom).encode('utf-8')
+            self.f.write(HEADER.pack(0, ATOM_DEF, 0, 0, 0, len(name), atom, 0, 0, 0, 0, 0))
+            self.f.write(name)
+        return atom
+
+    def _extra(self, event):
+        t = event.type
+        if t in KEY_EVENTS:
+            return [self.wm.d.keycode_to_keysym(event.detail, 0)]
+        if t == X.MapRequest:
+            try:
+                g = event.window.get_geometry()
+                return [g.x, g.y, g.width, g.height]
+            except Exception:
+                return [0, 0, 400, 300]
+        if t == X.ConfigureRequest:
+            return [event.value_mask, event.x, event.y, event.width, event.height,
+                    event.border_width, event.stack_mode]
+        if t == X.ConfigureNotify:
+            return [event.x, event.y, event.width, event.height]
+        if t == X.Expose:
+            return [event.x, event.y, event.width, event.height, event.count]
+        if t == X.PropertyNotify:
+            return [self._atom(event.atom)]
+        if t == X.ClientMessage:
+            data = [int(v) for v in event.data[1]][:5] if event.data[0] == 32 else []
+            if event.client_type == self.wm._NET_WM_STATE and len(data) >= 3:
+                self._atom(data[1])
+                self._atom(data[2])
+            return [self._atom(event.client_type)] + data
+        return []
+
+    def end_batch(self):
+        """Marks where the event loop drained its queue (and the scheduler flushed)"""
+        if self.f and self.count:
+            self.f.write(HEADER.pack(0, BATCH_END, 0, 0, 0, 0, 0, 0, 0, 0, 0, 0))
+
+    def record(self, event):
+        if not self.f:
+            return
+        try:
+            now = time.monotonic()
+            dt = int((now - self.last) * 1e6)
+            self.last = now
+
+            window = getattr(event, 'window', None)
+            kind, ref = self._window_ref(window.id) if window is not None and hasattr(window, 'id') else (KIND_NONE, 0)
+            extra = self._extra(event)
+            detail = getattr(event, 'detail', 0) if event.type not in KEY_EVENTS else 0
+
+            self.f.write(HEADER.pack(
+                min(dt, 0xFFFFFFFF), event.type & 0x7F, int(detail) & 0xFF, kind, len(extra),
+                int(getattr(event, 'state', 0)) & 0xFFFF, ref & 0xFFFFFFFF,
+                _clamp16(getattr(event, 'root_x', 0)), _clamp16(getattr(event, 'root_y', 0)),
+                _clamp16(getattr(event, 'event_x', 0)), _clamp16(getattr(event, 'event_y', 0)),
+                int(getattr(event, 'time', 0)) & 0xFFFFFFFF,
+            ))
+            if extra:
+                self.f.write(struct.pack(f"<{len(extra)}I", *[int(v) & 0xFFFFFFFF for v in extra]))
+            self.count += 1
+        except Exception as e:
+            print(f"Recorder error: {e}")
+
+
+class TraceRecord:
+    __slots__ = ('t', 'type', 'detail', 'kind', 'state', 'ref', 'root_x', 'root_y',
+                 'event_x', 'event_y', 'time', 'extra', 'batch_end')
+
+
+def read_trace(path):
+    """
+    Returns (atom_names, records). atom_names maps recorded atom ids to names;
+    each record's t is seconds since the start of the trace.
+    """
+    atoms = {}
+    records = []
+    with open(path, "rb") as f:
+        if f.read(len(MAGIC)) != MAGIC:
+            raise ValueError(f"{path} is not a DragonDesktop trace")
+        t = 0.0
+        while True:
+            head = f.read(HEADER.size)
+            if len(head) < HEADER.size:
+                break
+            (dt, etype, detail, kind, n_extra, state, ref,
+             root_x, root_y, event_x, event_y, stamp) = HEADER.unpack(head)
+            if etype == ATOM_DEF:
+                atoms[ref] = f.read(state).decode('utf-8')
+                continue
+            if etype == BATCH_END:
+                if records:
+                    records[-1].batch_end = True
+                continue
+            extra = list(struct.unpack(f"<{n_extra}i", f.read(4 * n_extra))) if n_extra else []
+            t += dt / 1e6
+            rec = TraceRecord()
+            rec.t, rec.type, rec.detail, rec.kind, rec.state, rec.ref = t, etype, detail, kind, state, ref
+            rec.root_x, rec.root_y, rec.event_x, rec.event_y, rec.time = root_x, root_y, event_x, event_y, stamp
+            rec.extra = extra
+            rec.batch_end = False
+            records.append(rec)
+    return atoms, records
@@ -0,0 +1,854 @@
+"""
+In-process fake X server for benchmarks and headless replay.
+
+Models what DragonDesktop relies on: the window tree (geometry, stacking,
+map state), properties and atoms, SubstructureRedirect (MapRequest and
+ConfigureRequest go to the redirecting client), Structure/SubstructureNotify,
+PropertyNotify and Expose events, focus, passive grabs, and GC/pixmap/font
+resources. Drawing is accepted and counted but not rasterised. No
+extensions are advertised, so RandR and SYNC take their fallback paths.
+
+Each connection mimics python-xlib's object model (Display, Window, GC...)
+closely enough for the WM to run unmodified. Every request bumps the
+connection's request_serial and is tallied by name in FakeServer.requests;
+requests that wait for a reply are also counted in FakeServer.round_trips.
+"""
+
+import collections
+import struct
+from array import array
+from Xlib import X, Xatom, error
+from Xlib.protocol import rq
+from Xlib.xobject import icccm
+
+ROOT_ID = 0x100
+CLIENT_ID_SHIFT = 21
+
+
+class Reply:
+    """Attribute bag standing in for python-xlib reply objects"""
+
+    def __init__(self, **fields):
+        self.__dict__.update(fields)
+
+
+class FakeEvent(Reply):
+    def __init__(self, type, **fields):
+        self.type = type
+        self.send_event = False
+        super().__init__(**fields)
+
+
+class WindowState:
+    def __init__(self, wid, parent, owner, x, y, width, height, border_width, depth):
+        self.id = wid
+        self.parent = parent
+        self.owner = owner
+        self.children = []
+        self.x, self.y, self.width, self.height = x, y, width, height
+        self.border_width = border_width
+        self.depth = depth
+        self.mapped = False
+        self.override_redirect = False
+        self.properties = {}
+        self.masks = {}
+        self.attributes = {}
+
+
+class FakeServer:
+    def __init__(self, width=1920, height=1080, depth=24):
+        self.width = width
+        self.height = height
+        self.depth = depth
+        self.connections = []
+        self.requests = collections.Counter()
+        self.round_trips = 0
+        self.atoms = {}
+        self.atom_names = {}
+        for name in dir(Xatom):
+            value = getattr(Xatom, name)
+            if name.isupper() and isinstance(value, int) and 0 < value <= Xatom.LAST_PREDEFINED:
+                self.atoms[name] = value
+                self.atom_names[value] = name
+        self.next_atom = Xatom.LAST_PREDEFINED + 1
+
+        self.windows = {}
+        self.root = WindowState(ROOT_ID, None, None, 0, 0, width, height, 0, depth)
+        self.root.mapped = True
+        self.windows[ROOT_ID] = self.root
+        self.resources = {}
+        self.focus = ROOT_ID
+        self.key_grabs = []
+        self.button_grabs = []
+        self.keymap = {}
+        self.keycodes = {}
+        self.pointer = (0, 0)
+
+    def connect(self):
+        conn = FakeDisplay(self, len(self.connections) + 1)
+        self.connections.append(conn)
+        return conn
+
+
+    def intern_atom(self, name, only_if_exists=False):
+        if name not in self.atoms:
+            if only_if_exists:
+                return X.NONE
+            self.atoms[name] = self.next_atom
+            self.atom_names[self.next_atom] = name
+            self.next_atom += 1
+        return self.atoms[name]
+
+    def keysym_to_keycode(self, keysym):
+        if keysym not in self.keymap:
+            code = 8 + len(self.keymap)
+            if code > 255:
+                return 0
+            self.keymap[keysym] = code
+            self.keycodes[code] = keysym
+        return self.keymap[keysym]
+
+
+    def redirector(self, state):
+        if state is None:
+            return None
+        for conn, mask in state.masks.items():
+            if mask & X.SubstructureRedirectMask:
+                return conn
+        return None
+
+    def deliver(self, state, mask, make):
+        """Queue make(conn) on every connection selecting mask on state"""
+        if state is None:
+            return
+        for conn, selected in list(state.masks.items()):
+            if selected & mask:
+                conn.events.append(make(conn, state))
+
+    def notify(self, state, event_type, **fields):
+        """Structure event on the window itself and Substructure event on its parent"""
+        def make(conn, receiver):
+            return FakeEvent(event_type, event=conn.window(receiver.id), window=conn.window(state.id), **fields)
+        self.deliver(state, X.StructureNotifyMask, make)
+        self.deliver(state.parent, X.SubstructureNotifyMask, make)
+
+    def expose(self, state):
+        if state.mapped and self.viewable(state):
+            self.deliver(state, X.ExposureMask, lambda conn, r: FakeEvent(
+                X.Expose, window=conn.window(r.id), x=0, y=0, width=r.width, height=r.height, count=0))
+
+    def viewable(self, state):
+        while state is not None:
+            if not state.mapped:
+                return False
+            state = state.parent
+        return True
+
+    def absolute(self, state):
+        """Root coordinates of the window's inside (origin of its children)"""
+        x = y = 0
+        while state.parent is not None:
+            x += state.x + state.border_width
+            y += state.y + state.border_width
+            state = state.parent
+        return x, y
+
+    def window_at(self, px, py, state=None):
+        """Deepest viewable window containing the root point (px, py)"""
+        state = state or self.root
+        for child in reversed(state.children):
+            if not child.mapped:
+                continue
+            ax, ay = self.absolute(child)
+            bw = child.border_width
+            if ax - bw <= px < ax + child.width + bw and ay - bw <= py < ay + child.height + bw:
+                return self.window_at(px, py, child)
+        return state
+
+    def destroy(self, state):
+        for child in list(state.children):
+            self.destroy(child)
+        if state.mapped:
+            state.mapped = False
+            self.notify(state, X.UnmapNotify, from_configure=False)
+        self.notify(state, X.DestroyNotify)
+        if state.parent:
+            state.parent.children.remove(state)
+        self.windows.pop(state.id, None)
+        self.key_grabs = [g for g in self.key_grabs if g[0] != state.id]
+        self.button_grabs = [g for g in self.button_grabs if g[0] != state.id]
+        if self.focus == state.id:
+            self.focus = ROOT_ID
+
+
+    def _grab_for(self, grabs, window, code, state):
+        for wid, conn, grab_code, modifiers in grabs:
+            if grab_code in (code, X.AnyKey) and modifiers in (state, X.AnyModifier):
+                return conn, wid
+        return None
+
+    def press_key(self, keysym, state=0):
+        """KeyPress/KeyRelease to the grabbing client, else the focus window's owner"""
+        code = self.keysym_to_keycode(keysym)
+        grab = self._grab_for(self.key_grabs, ROOT_ID, code, state)
+        if grab:
+            conn, wid = grab
+        else:
+            target = self.windows.get(self.focus, self.root)
+            conn, wid = target.owner, target.id
+        if conn is None:
+            return
+        for event_type in (X.KeyPress, X.KeyRelease):
+            conn.events.append(FakeEvent(
+                event_type, window=conn.window(wid), root=conn.window(ROOT_ID), child=X.NONE,
+                detail=code, state=state, time=X.CurrentTime, same_screen=1,
+                root_x=self.pointer[0], root_y=self.pointer[1], event_x=0, event_y=0))
+
+    def pointer_event(self, event_type, x, y, button=0, state=0):
+        """Button/motion event routed by passive grabs, then by event mask up the tree"""
+        self.pointer = (x, y)
+        target = self.window_at(x, y)
+        mask = {X.ButtonPress: X.ButtonPressMask, X.ButtonRelease: X.ButtonReleaseMask,
+                X.MotionNotify: X.ButtonMotionMask | X.PointerMotionMask}[event_type]
+
+        receivers = []
+        if event_type == X.ButtonPress:
+            chain = []
+            node = target
+            while node is not None:
+                chain.append(node)
+                node = node.parent
+            for node in reversed(chain):
+                grab = self._grab_for([g for g in self.button_grabs if g[0] == node.id], node.id, button, state)
+                if grab:
+                    receivers = [(grab[0], node)]
+                    break
+        if not receivers:
+            node = target
+            while node is not None:
+                hits = [(conn, node) for conn, m in node.masks.items() if m & mask]
+                if hits:
+                    receivers = hits
+                    break
+                node = node.parent
+
+        for conn, node in receivers:
+            ax, ay = self.absolute(node)
+            conn.events.append(FakeEvent(
+                event_type, window=conn.window(node.id), root=conn.window(ROOT_ID), child=X.NONE,
+                detail=button, state=state, time=X.CurrentTime, same_screen=1,
+                root_x=x, root_y=y, event_x=x - ax, event_y=y - ay))
+
+
+class FakeColormap:
+    def __init__(self, display):
+        self.display = display
+
+    def alloc_named_color(self, name):
+        self.display._request('AllocNamedColor', reply=True)
+        return Reply(pixel={'black': 0x000000, 'white': 0xFFFFFF}.get(name.lower(), 0x808080))
+
+    def alloc_color(self, r, g, b):
+        self.display._request('AllocColor', reply=True)
+        return Reply(pixel=((r >> 8) << 16) | ((g >> 8) << 8) | (b >> 8))
+
+
+class FakeResource:
+    def __init__(self, display, rid, owner=0):
+        self.display = display
+        self.id = rid
+        self.owner = owner
+
+    def __resource__(self):
+        return self.id
+
+    def __eq__(self, obj):
+        if isinstance(obj, FakeResource):
+            return self.id == obj.id
+        return id(self) == id(obj)
+
+    def __ne__(self, obj):
+        return not self == obj
+
+    def __hash__(self):
+        return int(self.id)
+
+    def __repr__(self):
+        return '<%s 0x%08x>' % (self.__class__.__name__, self.id)
+
+    def kill_client(self, onerror=None):
+        """Destroy the owning client's top-level windows, as if it disconnected"""
+        self.display._request('KillClient')
+        server = self.display.server
+        state = server.windows.get(self.id)
+        if state is None or state.owner is None:
+            return
+        for other in list(server.windows.values()):
+            if other.owner is state.owner and other.parent is not None and other.parent.owner is not state.owner:
+                if other.id in server.windows:
+                    server.destroy(other)
+
+
+class FakeGC(FakeResource):
+    def change(self, onerror=None, **keys):
+        self.display._request('ChangeGC')
+
+    def set_clip_rectangles(self, x_origin, y_origin, rectangles, ordering, onerror=None):
+        self.display._request('SetClipRectangles')
+
+    def free(self, onerror=None):
+        self.display._request('FreeGC')
+
+
+class FakeFont(FakeResource):
+    def close(self, onerror=None):
+        self.display._request('CloseFont')
+
+
+class FakeDrawable(FakeResource):
+    __drawable__ = FakeResource.__resource__
+
+    def _state(self):
+        return self.display.server.windows.get(self.id) or self.display.server.resources.get(self.id)
+
+    def get_geometry(self):
+        self.display._request('GetGeometry', reply=True)
+        s = self._state()
+        if s is None:
+            raise ValueError(f"BadDrawable 0x{self.id:x}")
+        return Reply(x=s.x, y=s.y, width=s.width, height=s.height, border_width=s.border_width,
+                     depth=s.depth, root=self.display.window(ROOT_ID))
+
+    def create_pixmap(self, width, height, depth):
+        self.display._request('CreatePixmap')
+        pid = self.display.display.allocate_resource_id()
+        self.display.server.resources[pid] = WindowState(pid, None, self.display, 0, 0, width, height, 0, depth)
+        return FakePixmap(self.display, pid)
+
+    def create_gc(self, onerror=None, **keys):
+        self.display._request('CreateGC')
+        return FakeGC(self.display, self.display.display.allocate_resource_id())
+
+    def fill_rectangle(self, gc, x, y, width, height, onerror=None):
+        self.display._request('PolyFillRectangle')
+
+    def rectangle(self, gc, x, y, width, height, onerror=None):
+        self.display._request('PolyRectangle')
+
+    def line(self, gc, x1, y1, x2, y2, onerror=None):
+        self.display._request('PolySegment')
+
+    def draw_text(self, gc, x, y, text, onerror=None):
+        self.display._request('PolyText8')
+
+    def copy_area(self, gc, src_drawable, src_x, src_y, width, height, dst_x, dst_y, onerror=None):
+        self.display._request('CopyArea')
+
+    def put_image(self, gc, x, y, width, height, format, depth, left_pad, data, onerror=None):
+        self.display._request('PutImage')
+
+
+class FakePixmap(FakeDrawable):
+    def free(self, onerror=None):
+        self.display._request('FreePixmap')
+        self.display.server.resources.pop(self.id, None)
+
+
+class FakeWindow(FakeDrawable):
+    __window__ = FakeResource.__resource__
+
+    def _window_state(self):
+        state = self.display.server.windows.get(self.id)
+        if state is None:
+            raise ValueError(f"BadWindow 0x{self.id:x}")
+        return state
+
+    def create_window(self, x, y, width, height, border_width, depth,
+                      window_class=X.CopyFromParent, visual=X.CopyFromParent,
+                      onerror=None, **keys):
+        d = self.display
+        d._request('CreateWindow')
+        parent = self._window_state()
+        wid = d.display.allocate_resource_id()
+        state = WindowState(wid, parent, d, x, y, width, height, border_width,
+                            parent.depth if depth == X.CopyFromParent else depth)
+        parent.children.append(state)
+        d.server.windows[wid] = state
+        self._apply_attributes(state, keys)
+        d.server.notify(state, X.CreateNotify, parent=d.window(parent.id), x=x, y=y,
+                        width=width, height=height, border_width=border_width,
+                        override_redirect=state.override_redirect)
+        return FakeWindow(d, wid)
+
+    def _apply_attributes(self, state, keys):
+        for key, value in keys.items():
+            if key == 'event_mask':
+                state.masks[self.display] = value
+            elif key == 'override_redirect':
+                state.override_redirect = bool(value)
+            else:
+                state.attributes[key] = value
+
+    def change_attributes(self, onerror=None, **keys):
+        self.display._request('ChangeWindowAttributes')
+        state = self._window_state()
+        redirect = keys.get('event_mask', 0) & X.SubstructureRedirectMask
+        if redirect and any(conn is not self.display and mask & redirect
+                            for conn, mask in state.masks.items()):
+            # only one client may redirect a window's children
+            if onerror:
+                onerror(error.BadAccess(self.display, struct.pack('=BBHLHB21x', 0, X.BadAccess, 0, self.id, 0, 2)), None)
+            return
+        self._apply_attributes(state, keys)
+
+    def get_attributes(self):
+        self.display._request('GetWindowAttributes', reply=True)
+        s = self._window_state()
+        if s.mapped:
+            map_state = X.IsViewable if self.display.server.viewable(s) else X.IsUnviewable
+        else:
+            map_state = X.IsUnmapped
+        all_masks = 0
+        for mask in s.masks.values():
+            all_masks |= mask
+        return Reply(map_state=map_state, override_redirect=s.override_redirect,
+                     win_class=X.InputOutput, your_event_mask=s.masks.get(self.display, 0),
+                     all_event_masks=all_masks, do_not_propagate_mask=0, save_under=0,
+                     backing_store=0, colormap=X.NONE, visual=X.CopyFromParent)
+
+    def query_tree(self):
+        self.display._request('QueryTree', reply=True)
+        s = self._window_state()
+        w = self.display.window
+        return Reply(root=w(ROOT_ID), parent=w(s.parent.id) if s.parent else X.NONE,
+                     children=[w(c.id) for c in s.children])
+
+    def translate_coords(self, src_window, src_x, src_y):
+        """(src_x, src_y) in src_window translated into this window, like TranslateCoordinates"""
+        d = self.display
+        d._request('TranslateCoords', reply=True)
+        server = d.server
+        dst = self._window_state()
+        src = server.windows.get(getattr(src_window, 'id', src_window))
+        if src is None:
+            raise ValueError(f"BadWindow 0x{getattr(src_window, 'id', src_window):x}")
+        sx, sy = server.absolute(src)
+        dx, dy = server.absolute(dst)
+        px, py = sx + src_x, sy + src_y
+        child = X.NONE
+        for c in reversed(dst.children):
+            if not c.mapped:
+                continue
+            ax, ay = server.absolute(c)
+            bw = c.border_width
+            if ax - bw <= px < ax + c.width + bw and ay - bw <= py < ay + c.height + bw:
+                child = d.window(c.id)
+                break
+        return Reply(same_screen=True, child=child, x=px - dx, y=py - dy)
+
+    def map(self, onerror=None):
+        d = self.display
+        d._request('MapWindow')
+        server = d.server
+        s = self._window_state()
+        if s.mapped:
+            return
+        redirect = server.redirector(s.parent)
+        if redirect is not None and redirect is not d and not s.override_redirect:
+            redirect.events.append(FakeEvent(X.MapRequest, parent=redirect.window(s.parent.id),
+                                             window=redirect.window(s.id)))
+            return
+        s.mapped = True
+        server.notify(s, X.MapNotify, override_redirect=s.override_redirect)
+        server.expose(s)
+        for child in s.children:
+            if child.mapped:
+                server.expose(child)
+
+    def unmap(self, onerror=None):
+        self.display._request('UnmapWindow')
+        s = self._window_state()
+        if s.mapped:
+            s.mapped = False
+            self.display.server.notify(s, X.UnmapNotify, from_configure=False)
+
+    def destroy(self, onerror=None):
+        self.display._request('DestroyWindow')
+        s = self.display.server.windows.get(self.id)
+        if s is not None and s.parent is not None:
+            self.display.server.destroy(s)
+
+    def reparent(self, parent, x, y, onerror=None):
+        d = self.display
+        d._request('ReparentWindow')
+        server = d.server
+        s = self._window_state()
+        new_parent = server.windows[parent.id]
+        was_mapped = s.mapped
+        if was_mapped:
+            s.mapped = False
+            server.notify(s, X.UnmapNotify, from_configure=False)
+        s.parent.children.remove(s)
+        old_parent = s.parent
+        s.parent = new_parent
+        new_parent.children.append(s)
+        s.x, s.y = x, y
+
+        def make(conn, receiver):
+            return FakeEvent(X.ReparentNotify, event=conn.window(receiver.id), window=conn.window(s.id),
+                             parent=conn.window(new_parent.id), x=x, y=y,
+                             override_redirect=s.override_redirect)
+        server.deliver(s, X.StructureNotifyMask, make)
+        server.deliver(old_parent, X.SubstructureNotifyMask, make)
+        server.deliver(new_parent, X.SubstructureNotifyMask, make)
+        if was_mapped:
+            s.mapped = True
+            server.notify(s, X.MapNotify, override_redirect=s.override_redirect)
+            server.expose(s)
+
+    def configure(self, onerror=None, **keys):
+        d = self.display
+        d._request('ConfigureWindow')
+        server = d.server
+        s = self._window_state()
+
+        redirect = server.redirector(s.parent)
+        if redirect is not None and redirect is not d and not s.override_redirect:
+            value_mask = 0
+            for bit, name in ((X.CWX, 'x'), (X.CWY, 'y'), (X.CWWidth, 'width'), (X.CWHeight, 'height'),
+                              (X.CWBorderWidth, 'border_width'), (X.CWSibling, 'sibling'),
+                              (X.CWStackMode, 'stack_mode')):
+                if name in keys:
+                    value_mask |= bit
+            sibling = keys.get('sibling')
+            redirect.events.append(FakeEvent(
+                X.ConfigureRequest, parent=redirect.window(s.parent.id), window=redirect.window(s.id),
+                sibling=redirect.window(sibling.id) if sibling else X.NONE,
+                x=keys.get('x', s.x), y=keys.get('y', s.y),
+                width=keys.get('width', s.width), height=keys.get('height', s.height),
+                border_width=keys.get('border_width', s.border_width),
+                stack_mode=keys.get('stack_mode', X.Above), value_mask=value_mask))
+            return
+
+        old = (s.x, s.y, s.width, s.height)
+        s.x = keys.get('x', s.x)
+        s.y = keys.get('y', s.y)
+        s.width = max(1, keys.get('width', s.width))
+        s.height = max(1, keys.get('height', s.height))
+        s.border_width = keys.get('border_width', s.border_width)
+
+        if 'stack_mode' in keys and s.parent is not None:
+            siblings = s.parent.children
+            siblings.remove(s)
+            sibling = keys.get('sibling')
+            if keys['stack_mode'] == X.Above:
+                if sibling is not None and server.windows.get(sibling.id) in siblings:
+                    siblings.insert(siblings.index(server.windows[sibling.id]) + 1, s)
+                else:
+                    siblings.append(s)
+            elif keys['stack_mode'] == X.Below:
+                if sibling is not None and server.windows.get(sibling.id) in siblings:
+                    siblings.insert(siblings.index(server.windows[sibling.id]), s)
+                else:
+                    siblings.insert(0, s)
+            else:
+                siblings.append(s)
+
+        server.notify(s, X.ConfigureNotify, x=s.x, y=s.y, width=s.width, height=s.height,
+                      border_width=s.border_width, above_sibling=X.NONE,
+                      override_redirect=s.override_redirect)
+        if (s.width, s.height) != old[2:] and s.mapped:
+            server.expose(s)
+
+    def raise_window(self, onerror=None):
+        self.configure(stack_mode=X.Above)
+
+    def clear_area(self, x=0, y=0, width=0, height=0, exposures=0, onerror=None):
+        self.display._request('ClearArea')
+
+
+    def change_property(self, property, property_type, format, data, mode=X.PropModeReplace, onerror=None):
+        d = self.display
+        d._request('ChangeProperty')
+        s = self._window_state()
+        if format == 8:
+            value = data.encode('utf-8') if isinstance(data, str) else bytes(data)
+        elif isinstance(data, (bytes, bytearray)):
+            value = list(array('I' if format == 32 else 'H', data))
+        else:
+            value = [int(v) for v in data]
+        if mode != X.PropModeReplace and property in s.properties:
+            old = s.properties[property][2]
+            value = old + value if mode == X.PropModeAppend else value + old
+        s.properties[property] = (property_type, format, value)
+        self._property_notify(s, property, X.PropertyNewValue)
+
+    def delete_property(self, property, onerror=None):
+        self.display._request('DeleteProperty')
+        s = self._window_state()
+        if s.properties.pop(property, None) is not None:
+            self._property_notify(s, property, X.PropertyDelete)
+
+    def _property_notify(self, s, atom, state):
+        self.display.server.deliver(s, X.PropertyChangeMask, lambda conn, r: FakeEvent(
+            X.PropertyNotify, window=conn.window(r.id), atom=atom, state=state, time=X.CurrentTime))
+
+    def get_property(self, property, property_type, offset, length, delete=False):
+        self.display._request('GetProperty', reply=True)
+        s = self._window_state()
+        if property not in s.properties:
+            return None
+        ptype, fmt, value = s.properties[property]
+        if property_type not in (X.AnyPropertyType, ptype):
+            return Reply(property_type=ptype, format=fmt, value=b'' if fmt == 8 else [], bytes_after=0)
+        return Reply(property_type=ptype, format=fmt, value=value, bytes_after=0)
+
+    def get_full_property(self, property, property_type, sizehint=10):
+        prop = self.get_property(property, property_type, 0, sizehint)
+        if prop is None or prop.property_type == X.NONE:
+            return None
+        return prop
+
+    def get_full_text_property(self, property, property_type=X.AnyPropertyType, sizehint=10):
+        prop = self.get_full_property(property, property_type, sizehint)
+        if prop is None or prop.format != 8:
+            return None
+        return prop.value.decode('utf-8', 'replace')
+
+    def list_properties(self):
+        self.display._request('ListProperties', reply=True)
+        return list(self._window_state().properties)
+
+    def set_wm_name(self, name, onerror=None):
+        self.change_property(Xatom.WM_NAME, Xatom.STRING, 8, name)
+
+    def get_wm_name(self):
+        return self.get_full_text_property(Xatom.WM_NAME, Xatom.STRING)
+
+    def set_wm_class(self, inst, cls, onerror=None):
+        self.change_property(Xatom.WM_CLASS, Xatom.STRING, 8, f"{inst}\0{cls}\0")
+
+    def get_wm_class(self):
+        value = self.get_full_text_property(Xatom.WM_CLASS, Xatom.STRING)
+        if value is None:
+            return None
+        parts = value.split('\0')
+        if len(parts) < 2:
+            return None
+        return parts[0], parts[1]
+
+    def set_wm_transient_for(self, window, onerror=None):
+        self.change_property(Xatom.WM_TRANSIENT_FOR, Xatom.WINDOW, 32, [window.id])
+
+    def get_wm_transient_for(self):
+        prop = self.get_property(Xatom.WM_TRANSIENT_FOR, Xatom.WINDOW, 0, 1)
+        if prop is None or prop.format != 32 or len(prop.value) < 1:
+            return None
+        return self.display.window(prop.value[0])
+
+    def set_wm_protocols(self, protocols, onerror=None):
+        self.change_property(self.display.intern_atom('WM_PROTOCOLS'), Xatom.ATOM, 32, protocols)
+
+    def set_wm_normal_hints(self, hints={}, onerror=None, **keys):
+        keys.update(hints)
+        value = icccm.WMNormalHints.to_binary(*(), **keys)
+        self.change_property(Xatom.WM_NORMAL_HINTS, Xatom.WM_SIZE_HINTS, 32, value)
+
+    def get_wm_normal_hints(self):
+        prop = self.get_property(Xatom.WM_NORMAL_HINTS, Xatom.WM_SIZE_HINTS, 0, 18)
+        if prop and prop.format == 32:
+            value = rq.encode_array(array('I', prop.value))
+            if len(value) == icccm.WMNormalHints.static_size:
+                return icccm.WMNormalHints.parse_binary(value, self.display)[0]
+        return None
+
+
+    def grab_key(self, key, modifiers, owner_events, pointer_mode, keyboard_mode, onerror=None):
+        self.display._request('GrabKey')
+        self.display.server.key_grabs.append((self.id, self.display, key, modifiers))
+
+    def ungrab_key(self, key, modifiers, onerror=None):
+        self.display._request('UngrabKey')
+        server = self.display.server
+        server.key_grabs = [g for g in server.key_grabs
+                            if not (g[0] == self.id and key in (g[2], X.AnyKey) and modifiers in (g[3], X.AnyModifier))]
+
+    def grab_button(self, button, modifiers, owner_events, event_mask,
+                    pointer_mode, keyboard_mode, confine_to, cursor, onerror=None):
+        self.display._request('GrabButton')
+        self.display.server.button_grabs.append((self.id, self.display, button, modifiers))
+
+    def ungrab_button(self, button, modifiers, onerror=None):
+        self.display._request('UngrabButton')
+        server = self.display.server
+        server.button_grabs = [g for g in server.button_grabs
+                               if not (g[0] == self.id and button in (g[2], X.AnyButton))]
+
+    def grab_keyboard(self, owner_events, pointer_mode, keyboard_mode, time, onerror=None):
+        self.display._request('GrabKeyboard', reply=True)
+        return X.GrabSuccess
+
+    def grab_pointer(self, owner_events, event_mask, pointer_mode, keyboard_mode,
+                     confine_to, cursor, time, onerror=None):
+        self.display._request('GrabPointer', reply=True)
+        return X.GrabSuccess
+
+    def set_input_focus(self, revert_to, time, onerror=None):
+        self.display.set_input_focus(self, revert_to, time)
+
+    def send_event(self, event, event_mask=0, propagate=False, onerror=None):
+        d = self.display
+        d._request('SendEvent')
+        s = d.server.windows.get(self.id)
+        if s is None:
+            return
+        receivers = [s.owner] if event_mask == 0 else [c for c, m in s.masks.items() if m & event_mask]
+        for conn in receivers:
+            if conn is not None:
+                conn.events.append(event)
+
+
+class FakeScreen:
+    def __init__(self, display):
+        server = display.server
+        self.root = display.window(ROOT_ID)
+        self.root_depth = server.depth
+        self.width_in_pixels = server.width
+        self.height_in_pixels = server.height
+        self.white_pixel = 0xFFFFFF
+        self.black_pixel = 0x000000
+        self.default_colormap = FakeColormap(display)
+
+
+class FakeProtocol:
+    """The display.display attribute: serials and resource ids"""
+
+    def __init__(self, index):
+        self.request_serial = 1
+        self.base = index << CLIENT_ID_SHIFT
+        self.next_id = 1
+        self.freed = []
+
+    def allocate_resource_id(self):
+        if self.freed:
+            return self.freed.pop()
+        rid = self.base | self.next_id
+        self.next_id += 1
+        return rid
+
+    def free_resource_id(self, rid):
+        self.freed.append(rid)
+
+
+class FakeDisplay:
+    """One client connection to a FakeServer"""
+
+    def __init__(self, server, index):
+        self.server = server
+        self.display = FakeProtocol(index)
+        self.events = collections.deque()
+        self.request_count = 0
+        self._screen = None
+
+    def _request(self, name, reply=False):
+        self.display.request_serial = (self.display.request_serial + 1) % 65536
+        self.request_count += 1
+        self.server.requests[name] += 1
+        if reply:
+            self.server.round_trips += 1
+
+    def window(self, wid):
+        return FakeWindow(self, wid)
+
+    def create_resource_object(self, type, id):
+        if type == 'window':
+            return FakeWindow(self, id)
+        if type == 'pixmap':
+            return FakePixmap(self, id)
+        if type == 'gc':
+            return FakeGC(self, id)
+        return FakeResource(self, id)
+
+    def screen(self, sno=None):
+        if self._screen is None:
+            self._screen = FakeScreen(self)
+        return self._screen
+
+    def get_default_screen(self):
+        return 0
+
+    def intern_atom(self, name, only_if_exists=False):
+        self._request('InternAtom', reply=True)
+        return self.server.intern_atom(name, only_if_exists)
+
+    def get_atom(self, name, only_if_exists=False):
+        return self.server.intern_atom(name, only_if_exists)
+
+    def get_atom_name(self, atom):
+        self._request('GetAtomName', reply=True)
+        return self.server.atom_names[atom]
+
+    def keysym_to_keycode(self, keysym):
+        return self.server.keysym_to_keycode(keysym)
+
+    def keycode_to_keysym(self, keycode, index):
+        return self.server.keycodes.get(keycode, X.NoSymbol)
+
+    def has_extension(self, name):
+        return False
+
+    def query_extension(self, name):
+        self._request('QueryExtension', reply=True)
+        return None
+
+    def extension_add_event(self, code, evt, name=None):
+        pass
+
+    def set_input_focus(self, focus, revert_to, time, onerror=None):
+        self._request('SetInputFocus')
+        self.server.focus = focus.id if hasattr(focus, 'id') else focus
+
+    def get_input_focus(self):
+        self._request('GetInputFocus', reply=True)
+        return Reply(focus=self.window(self.server.focus), revert_to=X.RevertToPointerRoot)
+
+    def get_selection_owner(self, selection):
+        self._request('GetSelectionOwner', reply=True)
+        return X.NONE
+
+    def open_font(self, name):
+        self._request('OpenFont')
+        return FakeFont(self, self.display.allocate_resource_id())
+
+    def ungrab_keyboard(self, time, onerror=None):
+        self._request('UngrabKeyboard')
+
+    def ungrab_pointer(self, time, onerror=None):
+        self._request('UngrabPointer')
+
+    def allow_events(self, mode, time, onerror=None):
+        self._request('AllowEvents')
+
+    def set_close_down_mode(self, mode, onerror=None):
+        self._request('SetCloseDownMode')
+
+    def sync(self):
+        self._request('GetInputFocus', reply=True)
+
+    def flush(self):
+        pass
+
+    def pending_events(self):
+        return len(self.events)
+
+    def next_event(self):
+        return self.events.popleft()
+
+    def close(self):
+        for state in list(self.server.windows.values()):
+            if state.owner is self and state.parent is not None and state.id in self.server.windows:
+                self.server.destroy(state)
+        for state in self.server.windows.values():
+            state.masks.pop(self, None)
+        self.server.key_grabs = [g for g in self.server.key_grabs if g[1] is not self]
+        self.server.button_grabs = [g for g in self.server.button_grabs if g[1] is not self]
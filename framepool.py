@@ -0,0 +1,102 @@
+from Xlib import X
+from Xlib import error as XError
+import log
+
+
+class FramePool:
+    """
+    Recycles frame windows so short-lived clients don't cost a CreateWindow
+    and a DestroyWindow each.
+
+    When a client is destroyed its (now empty) frame is unmapped and kept,
+    up to `size` frames; anything beyond that is destroyed as before.
+    acquire() hands out a pooled frame, giving it the new theme colour and
+    geometry, and only creates a window when the pool is empty. Whenever
+    fewer than `prewarm` frames are waiting, more are created off-screen
+    from an idle timer, so the next map finds one ready.
+
+    Config:
+        "frame_pool": {"size": 16, "prewarm": 4}
+    """
+
+    def __init__(self, wm, config):
+        self.wm = wm
+        self.free = []
+        self.hits = 0
+        self.misses = 0
+        self.recycled = 0
+        self.configure(config)
+
+    def configure(self, config):
+        opts = config.get("frame_pool", {})
+        self.size = max(0, int(opts.get("size", 16)))
+        self.prewarm = min(self.size, max(0, int(opts.get("prewarm", 4))))
+        while len(self.free) > self.size:
+            self._destroy(self.free.pop())
+        self.schedule_refill()
+
+    @property
+    def hit_rate(self):
+        total = self.hits + self.misses
+        return self.hits / total if total else 0.0
+
+    def _create(self, x, y, width, height, background):
+        return self.wm.root.create_window(
+            x, y, width, height,
+            border_width=1,
+            depth=X.CopyFromParent,
+            visual=X.CopyFromParent,
+            background_pixel=background,
+            event_mask=self.wm.FRAME_EVENT_MASK
+        )
+
+    def _destroy(self, frame):
+        try:
+            frame.destroy()
+        except XError.BadWindow:
+            pass
+
+    def acquire(self, x, y, width, height, background):
+        """An unmapped frame at the given geometry with the given background pixel"""
+        if self.free:
+            frame = self.free.pop()
+            frame.change_attributes(background_pixel=background)
+            frame.configure(x=x, y=y, width=width, height=height)
+            self.hits += 1
+        else:
+            frame = self._create(x, y, width, height, background)
+            self.misses += 1
+        self.schedule_refill()
+        return frame
+
+    def release(self, frame):
+        """Frame of a client that went away: keep it if there is room, destroy it otherwise"""
+        if len(self.free) >= self.size:
+            self._destroy(frame)
+            return
+        try:
+            frame.unmap()
+        except XError.BadWindow:
+            return
+        self.free.append(frame)
+        self.recycled += 1
+
+    def schedule_refill(self):
+        if len(self.free) < self.prewarm and not self.wm.timers.is_pending('framepool'):
+            self.wm.timers.call_later(0.2, 'framepool', self.refill)
+
+    def refill(self):
+        """Timer callback: top the pool up to `prewarm` frames"""
+        try:
+            while len(self.free) < self.prewarm:
+                self.free.append(self._create(-10, -10, 1, 1, 0))
+            self.wm.d.flush()
+        except Exception as e:
+            log.warning("⚠ Frame pool refill failed: %s", e)
+
+    def clear(self):
+        """Destroy every pooled frame (before a restart)"""
+        self.wm.timers.cancel('framepool')
+        for frame in self.free:
+            self._destroy(frame)
+        self.free = []
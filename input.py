@@ -1,4 +1,5 @@
 from Xlib import X, XK  
+import log
   
 class InputHandler:  
     def __init__(self, wm):  
@@ -6,7 +7,8 @@ class InputHandler:
         self.drag_mode = None   
         self.drag_start_event = None  
         
-        self.drag_start_cam = (0, 0)  
+        self.drag_start_cam = (0, 0)
+        self.raw_pan = False
         self.drag_start_frame = {'x': 0, 'y': 0, 'w': 0, 'h': 0}  
   
     def handle_event(self, event):  
@@ -28,39 +30,22 @@ class InputHandler:
         elif event.type == X.KeyRelease:  
             self._on_key_release(event)  
         
-        elif event.type == X.Expose and hasattr(self.wm, 'cmd_window') and event.window.id == self.wm.cmd_window.id:   
-            self.wm.draw_bar()  
-  
-    def _on_key_normal(self, event):  
-        keysym = self.wm.d.keycode_to_keysym(event.detail, 0)  
-          
-        
-        if keysym == XK.string_to_keysym("Tab") and (event.state & X.Mod1Mask):  
-            
-            reverse = bool(event.state & X.ShiftMask)  
-            self.wm.handle_alt_tab(reverse=reverse)  
-            return  
-          
-        
-        if keysym == XK.XK_F4 and (event.state & X.Mod1Mask):  
-            self.wm.close_focused_window()  
-            return  
-          
-        
-        f_map = { XK.XK_F1: 1, XK.XK_F2: 2, XK.XK_F3: 3, XK.XK_F4: 4 }  
-        if keysym in f_map:  
-            index = f_map[keysym]  
-            
-            if (event.state & X.Mod4Mask) and (event.state & X.ControlMask):  
-                self.wm.save_camera_pos(index)  
-            
-            elif (event.state & X.Mod4Mask):  
-                self.wm.load_camera_pos(index)  
-          
-        
-        elif (event.state & X.Mod4Mask) and keysym == XK.string_to_keysym("space"):  
-            self.wm.toggle_cmd_bar()  
+        elif event.type == X.Expose and hasattr(self.wm, 'cmd_window') and event.window.id == self.wm.cmd_window.id:
+            self.wm.draw_bar()
+        elif event.type == X.Expose and event.window.id == self.wm.minimap.window.id:
+            self.wm.minimap.handle_expose(event)
+        elif event.type == X.Expose and event.window.id == self.wm.root.id:
+            self.wm.renderer.damage.add(event.x, event.y, event.width, event.height)
+            if event.count == 0:
+                self.wm.scheduler.invalidate(restack=False)
+        elif event.type == X.Expose and event.count == 0:
+            win_obj = self.wm.get_window_by_frame(event.window.id)
+            if win_obj:
+                self.wm.renderer.paint_titlebar(win_obj)
   
+    def _on_key_normal(self, event):
+        self.wm.keybindings.dispatch(event)
+
     def _on_key_release(self, event):  
         """Handle key release events"""  
         keysym = self.wm.d.keycode_to_keysym(event.detail, 0)  
@@ -101,38 +86,46 @@ class InputHandler:
                 elif key_str == "underscore": self.wm.cmd_text += "_"  
                 elif key_str == "slash": self.wm.cmd_text += "/"  
         except Exception as e:  
-            print(f"Key Error: {e}")  
+            log.warning("Key Error: %s", e)
           
         self.wm.draw_bar()  
   
-    def _on_click(self, event):  
-        
-        if event.state & X.Mod4Mask and event.detail in [4, 5]:  
-            if self.wm.get_fullscreen_window(): return   
-            self.wm.zoom_camera(1 if event.detail == 4 else -1)  
-            return  
-          
-        
-        if (event.state & X.Mod4Mask) and event.detail == 1:  
+    def _on_click(self, event):
+        self.wm.set_active_output(event.root_x, event.root_y)
+
+        if event.state & X.Mod4Mask and event.detail in [4, 5]:
+            if self.wm.get_fullscreen_window(): return
+            self.wm.navigator.zoom_steps(1 if event.detail == 4 else -1, event.root_x, event.root_y)
+            return
+          
+        
+        if event.window.id == self.wm.minimap.window.id:
+            if event.detail == 1:
+                self.wm.jump_to_minimap(event.event_x, event.event_y)
+            return
+
+        if (event.state & X.Mod4Mask) and event.detail == 1:
             fs_win = self.wm.get_fullscreen_window()  
             if fs_win:  
                 self.wm.toggle_fullscreen(fs_win)  
                 return  
-            self.drag_mode = 'CAMERA'  
-            self.drag_start_event = event  
-            self.drag_start_cam = (self.wm.camera.x, self.wm.camera.y)  
-            return  
-          
-        
-        if event.window.id in self.wm.btn_map:  
-            action, win_obj = self.wm.btn_map[event.window.id]  
-            if action == 'close': self.wm.close_window(win_obj)  
-            elif action == 'maximize': self.wm.toggle_fullscreen(win_obj)  
-            return  
-          
-        
-        win_obj = self.wm.get_window_by_frame(event.window.id)  
-        if win_obj:  
+            self.drag_mode = 'CAMERA'
+            self.drag_start_event = event
+            self.drag_start_cam = (self.wm.camera.x, self.wm.camera.y)
+            self.raw_pan = self.wm.xinput.begin_raw_pan()
+            return
+          
+        
+        win_obj = self.wm.get_window_by_frame(event.window.id)
+        action = self.wm.renderer.titlebar_button_at(win_obj, event.event_x, event.event_y) if win_obj else None
+        if action == 'close':
+            self.wm.close_window(win_obj)
+            return
+        if action == 'maximize':
+            self.wm.toggle_fullscreen(win_obj)
+            return
+
+        if win_obj:
             self.wm.focus_window(win_obj)  
             event.window.configure(stack_mode=X.Above)  
               
@@ -156,9 +149,10 @@ class InputHandler:
                   
                 if is_corner:  
                     self.drag_mode = 'RESIZE'  
-                    print(f"🔧 Resize mode activated (threshold: {resize_threshold}px)")  
+                    log.debug("🔧 Resize mode activated (threshold: %spx)", resize_threshold)
                 else:  
                     self.drag_mode = 'WINDOW'  
+                    self.wm.snapper.begin(win_obj)
                   
                 self.drag_start_event = event  
                 self.drag_start_frame = {  
@@ -173,7 +167,7 @@ class InputHandler:
           
         
         if event.window.id == self.wm.root.id:  
-            print("Desktop clicked - unfocusing all")  
+            log.debug("Desktop clicked - unfocusing all")
             self.wm.unfocus_all()  
             return  
           
@@ -188,9 +182,9 @@ class InputHandler:
                 try:  
                     self.wm.d.allow_events(X.ReplayPointer, event.time)  
                     self.wm.d.sync()  
-                    print(f"✓ Focused and replayed click to: {win_obj.title}")  
+                    log.debug("✓ Focused and replayed click to: %s", win_obj.title)
                 except Exception as e:  
-                    print(f"⚠ Replay failed: {e}")  
+                    log.warning("⚠ Replay failed: %s", e)
                 return  
   
     def _on_motion(self, event):  
@@ -202,18 +196,23 @@ class InputHandler:
         wxdiff = int(xsdiff / safe_zoom)  
         wydiff = int(ysdiff / safe_zoom)  
           
-        if self.drag_mode == 'CAMERA':  
-            self.wm.camera.x = self.drag_start_cam[0] - wxdiff  
+        if self.drag_mode == 'CAMERA':
+            if self.raw_pan:
+                return
+            self.wm.camera.x = self.drag_start_cam[0] - wxdiff
             self.wm.camera.y = self.drag_start_cam[1] - wydiff  
-            self.wm.renderer.render_world(self.wm.camera, self.wm.windows)  
-            self.wm.ensure_polybar_stacking()  
+            self.wm.scheduler.invalidate()
         elif self.drag_mode == 'WINDOW':  
             win_obj = self.wm.get_window_by_frame(self.drag_start_event.window.id)  
             if win_obj:  
-                win_obj.world_x = self.drag_start_frame['x'] + wxdiff  
-                win_obj.world_y = self.drag_start_frame['y'] + wydiff  
-                self.wm.renderer.render_world(self.wm.camera, self.wm.windows)  
-                self.wm.ensure_polybar_stacking()  
+                win_obj.world_x, win_obj.world_y = self.wm.snapper.snap(
+                    win_obj,
+                    self.drag_start_frame['x'] + wxdiff,
+                    self.drag_start_frame['y'] + wydiff,
+                    free=bool(event.state & X.ShiftMask)
+                )
+                self.wm.window_moved(win_obj)
+                self.wm.scheduler.invalidate()
         elif self.drag_mode == 'RESIZE':  
             win_obj = self.wm.get_window_by_frame(self.drag_start_event.window.id)  
             if win_obj:  
@@ -221,10 +220,14 @@ class InputHandler:
                 new_h = self.drag_start_frame['h'] + wydiff  
                 if new_w < 50: new_w = 50  
                 if new_h < 50: new_h = 50  
-                win_obj.world_w = new_w  
-                win_obj.world_h = new_h  
-                self.wm.renderer.render_world(self.wm.camera, self.wm.windows)  
-                self.wm.ensure_polybar_stacking()  
+                win_obj.world_w = new_w
+                win_obj.world_h = new_h
+                self.wm.window_moved(win_obj)
+                self.wm.request_interactive_resize(win_obj)
   
-    def _on_release(self, event):  
-        self.drag_mode = None  
+    def _on_release(self, event):
+        if self.drag_mode == 'CAMERA':
+            self.wm.xinput.end_raw_pan()
+        elif self.drag_mode == 'WINDOW':
+            self.wm.snapper.end()
+        self.drag_mode = None
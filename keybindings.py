@@ -0,0 +1,166 @@
+from Xlib import X, XK
+import log
+
+MODIFIERS = {
+    "super": X.Mod4Mask,
+    "mod4": X.Mod4Mask,
+    "ctrl": X.ControlMask,
+    "control": X.ControlMask,
+    "shift": X.ShiftMask,
+    "alt": X.Mod1Mask,
+    "mod1": X.Mod1Mask,
+}
+
+BINDING_MASK = X.ShiftMask | X.ControlMask | X.Mod1Mask | X.Mod4Mask
+
+IGNORED_MASKS = (0, X.Mod2Mask, X.LockMask, X.Mod2Mask | X.LockMask)
+
+DEFAULT_BINDINGS = {
+    "Super+space": "toggle_cmd_bar",
+    "Super+m": "toggle_minimap",
+    "Super+Shift+r": "restart",
+    "Alt+Tab": "alt_tab",
+    "Alt+Shift+Tab": "alt_tab_reverse",
+    "Alt+F4": "close_window",
+    "Super+g": "group",
+    "Super+Shift+g": "ungroup",
+    "Super+F1": "camera_load 1",
+    "Super+F2": "camera_load 2",
+    "Super+F3": "camera_load 3",
+    "Super+F4": "camera_load 4",
+    "Super+Ctrl+F1": "camera_save 1",
+    "Super+Ctrl+F2": "camera_save 2",
+    "Super+Ctrl+F3": "camera_save 3",
+    "Super+Ctrl+F4": "camera_save 4",
+    "Super+1": "canvas 1",
+    "Super+2": "canvas 2",
+    "Super+3": "canvas 3",
+    "Super+4": "canvas 4",
+    "Super+Shift+1": "move_to_canvas 1",
+    "Super+Shift+2": "move_to_canvas 2",
+    "Super+Shift+3": "move_to_canvas 3",
+    "Super+Shift+4": "move_to_canvas 4",
+    "Super+Shift+l": "dump_log",
+}
+
+
+def _focused(wm, fn):
+    if wm.focused_window:
+        fn(wm.focused_window)
+
+
+ACTIONS = {
+    "toggle_cmd_bar": lambda wm, arg: wm.toggle_cmd_bar(),
+    "toggle_minimap": lambda wm, arg: wm.toggle_minimap(),
+    "toggle_compositor": lambda wm, arg: wm.renderer.toggle_compositor(),
+    "restart": lambda wm, arg: wm.restart(),
+    "alt_tab": lambda wm, arg: wm.handle_alt_tab(reverse=False),
+    "alt_tab_reverse": lambda wm, arg: wm.handle_alt_tab(reverse=True),
+    "close_window": lambda wm, arg: wm.close_focused_window(),
+    "toggle_fullscreen": lambda wm, arg: _focused(wm, wm.toggle_fullscreen),
+    "group": lambda wm, arg: wm.group_focused(),
+    "ungroup": lambda wm, arg: wm.ungroup_focused(),
+    "camera_save": lambda wm, arg: wm.save_camera_pos(int(arg)),
+    "camera_load": lambda wm, arg: wm.load_camera_pos(int(arg)),
+    "zoom_in": lambda wm, arg: wm.zoom_camera(1),
+    "zoom_out": lambda wm, arg: wm.zoom_camera(-1),
+    "launch": lambda wm, arg: wm.launcher.launch(arg),
+    "canvas": lambda wm, arg: wm.canvases.switch(int(arg) - 1),
+    "dump_log": lambda wm, arg: log.dump(),
+    "move_to_canvas": lambda wm, arg: _focused(wm, lambda win: wm.canvases.move_window(win, int(arg) - 1)),
+}
+
+ARG_REQUIRED = ("camera_save", "camera_load", "launch", "canvas", "move_to_canvas")
+
+
+def parse_combo(combo):
+    """'Super+Shift+r' -> (modifier mask, keysym); raises ValueError"""
+    *mods, key = combo.split("+")
+    mask = 0
+    for mod in mods:
+        if mod.strip().lower() not in MODIFIERS:
+            raise ValueError(f"unknown modifier {mod!r}")
+        mask |= MODIFIERS[mod.strip().lower()]
+    keysym = XK.string_to_keysym(key.strip())
+    if keysym == X.NoSymbol:
+        raise ValueError(f"unknown key {key!r}")
+    return mask, keysym
+
+
+def parse_action(spec):
+    """'camera_load 5' -> ('camera_load', '5'); raises ValueError"""
+    name, _, arg = spec.strip().partition(" ")
+    if name not in ACTIONS:
+        raise ValueError(f"unknown action {name!r}")
+    if name in ARG_REQUIRED and not arg:
+        raise ValueError(f"{name} needs an argument")
+    if name in ("camera_save", "camera_load", "canvas", "move_to_canvas"):
+        int(arg)
+    return name, arg.strip() or None
+
+
+class KeyBindings:
+    """
+    Config-driven key bindings, compiled to a (keycode, modifiers) table.
+
+    Bindings map "Mod+Mod+key" combos to "action [argument]" strings and are
+    merged over DEFAULT_BINDINGS; a null value removes a default. compile()
+    resolves keysyms to keycodes once and grabs every binding on the root
+    with the NumLock/CapsLock variants; dispatch() is a single dict lookup.
+    MappingNotify refreshes the keymap and recompiles.
+
+    Config:
+        "keybindings": {"Super+5": "camera_load 5", "Super+Ctrl+5": "camera_save 5",
+                        "Super+Return": "launch alacritty", "Alt+F4": null}
+    Actions: toggle_cmd_bar, toggle_minimap, toggle_compositor, restart,
+    alt_tab, alt_tab_reverse, close_window, toggle_fullscreen, group, ungroup, zoom_in,
+    zoom_out, camera_save N, camera_load N (any N), canvas N, move_to_canvas N
+    (N counts from 1), dump_log, launch COMMAND.
+    """
+
+    def __init__(self, wm, config):
+        self.wm = wm
+        self.table = {}
+        self.configure(config)
+
+    def configure(self, config):
+        bindings = dict(DEFAULT_BINDINGS)
+        bindings.update(config.get("keybindings", {}))
+        self.bindings = {}
+        for combo, spec in bindings.items():
+            if not spec:
+                continue
+            try:
+                self.bindings[parse_combo(combo)] = parse_action(spec)
+            except ValueError as e:
+                log.warning("⚠ Ignoring key binding %s: %s", combo, e)
+
+    def compile(self):
+        """Resolve keycodes and (re)grab everything on the root"""
+        root = self.wm.root
+        root.ungrab_key(X.AnyKey, X.AnyModifier)
+        table = {}
+        for (mask, keysym), (name, arg) in self.bindings.items():
+            keycode = self.wm.d.keysym_to_keycode(keysym)
+            if not keycode:
+                continue
+            table[(keycode, mask)] = (ACTIONS[name], arg)
+            for ignored in IGNORED_MASKS:
+                root.grab_key(keycode, mask | ignored, True, X.GrabModeAsync, X.GrabModeAsync)
+        self.table = table
+
+    def dispatch(self, event):
+        """Run the action bound to a KeyPress; False if nothing is bound"""
+        binding = self.table.get((event.detail, event.state & BINDING_MASK))
+        if binding is None:
+            return False
+        fn, arg = binding
+        fn(self.wm, arg)
+        return True
+
+    def handle_mapping_notify(self, event):
+        if event.request == X.MappingPointer:
+            return
+        self.wm.d.refresh_keyboard_mapping(event)
+        self.compile()
+        log.info("✓ Keyboard mapping changed, key bindings regrabbed")
@@ -0,0 +1,175 @@
+import log
+import os
+import shlex
+import signal
+import time
+
+
+class Launcher:
+    """
+    Spawns commands from the command bar without a shell per launch.
+
+    - Aliases are expanded on the first word, so "term -e htop" works
+    - Plain commands are tokenised with shlex and started via posix_spawnp
+    - Commands using shell syntax (pipes, redirects, $VARS...) fall back to /bin/sh
+    - Children are reaped from the event loop after SIGCHLD; the signal
+      also writes to wakeup_fd so the loop's select() returns for it
+    - Launch-to-first-map latency is recorded per command
+    """
+    SHELL = "/bin/sh"
+    SHELL_CHARS = set("|&;<>()$`\\*?[]{}!#")
+    MAP_TIMEOUT = 30.0
+
+    def __init__(self, config):
+        self.config = config
+        self.children = {}
+        self.pending_maps = []
+        self.latency = {}
+        self.sigchld_pending = False
+        self.wakeup_fd = None
+
+    def install_signal_handler(self):
+        """
+        Flag SIGCHLD; the actual reaping runs in the WM event loop. select()
+        is retried after EINTR (PEP 475), so the signal also writes to a pipe
+        the loop waits on. The first reap() collects anything that exited
+        before (including children of the process we were exec'd from).
+        """
+        if self.wakeup_fd is None:
+            self.wakeup_fd, write_fd = os.pipe()
+            os.set_blocking(self.wakeup_fd, False)
+            os.set_blocking(write_fd, False)
+            signal.set_wakeup_fd(write_fd)
+        signal.signal(signal.SIGCHLD, self._on_sigchld)
+        self.sigchld_pending = True
+
+    def _on_sigchld(self, signum, frame):
+        self.sigchld_pending = True
+
+    def resolve(self, cmd):
+        """Expand an alias used as the first word of the command"""
+        aliases = self.config.get("aliases", {})
+        if cmd in aliases:
+            return aliases[cmd]
+        head, _, rest = cmd.partition(" ")
+        if head in aliases:
+            return f"{aliases[head]} {rest}".strip()
+        return cmd
+
+    def needs_shell(self, cmd):
+        """True if the command uses syntax only a shell can interpret"""
+        if any(c in self.SHELL_CHARS for c in cmd):
+            return True
+        first = cmd.split(None, 1)[0] if cmd.split() else ""
+        return "=" in first and not first.startswith("=")
+
+    def build_argv(self, cmd):
+        if self.needs_shell(cmd):
+            return [self.SHELL, "-c", cmd]
+        try:
+            argv = shlex.split(cmd)
+        except ValueError:
+            return [self.SHELL, "-c", cmd]
+        return [os.path.expanduser(a) if a.startswith("~") else a for a in argv]
+
+    def launch(self, cmd):
+        """Resolve, spawn and start tracking a command. Returns the child pid or None."""
+        cmd = cmd.strip()
+        if not cmd:
+            return None
+        actual_cmd = self.resolve(cmd)
+        if actual_cmd != cmd:
+            log.debug("Alias '%s' -> '%s'", cmd, actual_cmd)
+        argv = self.build_argv(actual_cmd)
+        log.info("Executing: %s", argv)
+        try:
+            pid = os.posix_spawnp(argv[0], argv, os.environ, setsid=True)
+        except FileNotFoundError:
+            log.warning("⚠ Command not found: %s", argv[0])
+            return None
+        except Exception as e:
+            log.error("⚠ Launch failed: %s", e)
+            return None
+
+        now = time.monotonic()
+        self.children[pid] = cmd
+        self.pending_maps.append((pid, cmd, now))
+        return pid
+
+    def reap(self):
+        """
+        Collect every exited child, launched by us or not. Called from the
+        event loop, never from the signal handler.
+        """
+        if not self.sigchld_pending:
+            return
+        self.sigchld_pending = False
+        if self.wakeup_fd is not None:
+            try:
+                while os.read(self.wakeup_fd, 512):
+                    pass
+            except BlockingIOError:
+                pass
+        while True:
+            try:
+                pid, status = os.waitpid(-1, os.WNOHANG)
+            except ChildProcessError:
+                return
+            if pid == 0:
+                return
+            cmd = self.children.pop(pid, None)
+            if cmd is not None and os.WIFEXITED(status) and os.WEXITSTATUS(status) != 0:
+                log.warning("⚠ '%s' exited with status %d", cmd, os.WEXITSTATUS(status))
+
+    def note_map(self, pid=None):
+        """
+        Match a newly managed window to a pending launch and record the latency.
+        With a _NET_WM_PID the launch must be that process or the leader of
+        its session (launches get their own session, so this also covers
+        shell launches, whose windows report the grandchild's pid); a window
+        whose pid matches neither is someone else's and is not counted.
+        Without a pid the oldest pending launch is assumed.
+        """
+        if not self.pending_maps:
+            return
+        now = time.monotonic()
+        self.pending_maps = [p for p in self.pending_maps if now - p[2] < self.MAP_TIMEOUT]
+        if not self.pending_maps:
+            return
+
+        match = 0
+        if pid is not None:
+            match = self._match_pid(pid)
+            if match is None:
+                return
+        _, cmd, started = self.pending_maps.pop(match)
+        elapsed_ms = (now - started) * 1000.0
+
+        stats = self.latency.setdefault(cmd, {'count': 0, 'last': 0.0, 'total': 0.0, 'max': 0.0})
+        stats['count'] += 1
+        stats['last'] = elapsed_ms
+        stats['total'] += elapsed_ms
+        stats['max'] = max(stats['max'], elapsed_ms)
+        log.info("⏱ '%s' mapped in %.0f ms", cmd, elapsed_ms)
+
+    def _match_pid(self, pid):
+        """Index of the pending launch pid belongs to, or None"""
+        try:
+            session = os.getsid(pid)
+        except OSError:
+            session = None
+        for i, p in enumerate(self.pending_maps):
+            if p[0] in (pid, session):
+                return i
+        return None
+
+    def has_pending_maps(self):
+        return bool(self.pending_maps)
+
+    def latency_report(self):
+        """Return (cmd, count, avg_ms, max_ms) sorted slowest first"""
+        rows = [
+            (cmd, s['count'], s['total'] / s['count'], s['max'])
+            for cmd, s in self.latency.items() if s['count']
+        ]
+        return sorted(rows, key=lambda r: r[2], reverse=True)
@@ -0,0 +1,76 @@
+class SemanticZoom:
+    """
+    Level-of-detail tiers for semantic zoom.
+
+    Tiers (per window):
+        TIER_FRAME   - only the frame is drawn, client is unmapped
+        TIER_CONTENT - client is mapped
+        TIER_TITLE   - client is mapped and the title text is drawn
+
+    Each threshold has a hysteresis band: moving up a tier requires
+    zoom > threshold + hysteresis, dropping back requires
+    zoom < threshold - hysteresis. Jitter around a threshold therefore
+    never causes repeated unmap/map of clients.
+
+    Config (all optional):
+        "semantic_zoom": {
+            "content_zoom": 0.5,
+            "title_zoom": 0.7,
+            "hysteresis": 0.05,
+            "overrides": {"mpv": {"content_zoom": 0.0}}
+        }
+    Override keys are matched case-insensitively against WM_CLASS.
+    """
+    TIER_FRAME = 0
+    TIER_CONTENT = 1
+    TIER_TITLE = 2
+
+    DEFAULTS = {
+        "content_zoom": 0.5,
+        "title_zoom": 0.7,
+        "hysteresis": 0.05,
+    }
+
+    def __init__(self, config):
+        self.configure(config)
+
+    def configure(self, config):
+        opts = config.get("semantic_zoom", {})
+        self.base = {k: float(opts.get(k, v)) for k, v in self.DEFAULTS.items()}
+        self.overrides = {
+            name.lower(): values
+            for name, values in opts.get("overrides", {}).items()
+        }
+        self._app_cache = {}
+
+    def thresholds_for(self, app_class):
+        """(content_zoom, title_zoom, hysteresis) for an application, cached per class"""
+        key = (app_class or "").lower()
+        cached = self._app_cache.get(key)
+        if cached is None:
+            values = dict(self.base)
+            values.update({k: float(v) for k, v in self.overrides.get(key, {}).items() if k in self.DEFAULTS})
+            cached = (values["content_zoom"], values["title_zoom"], values["hysteresis"])
+            self._app_cache[key] = cached
+        return cached
+
+    def tier_for(self, win, zoom):
+        """Compute the window's tier for this zoom, applying hysteresis against its last tier"""
+        content_zoom, title_zoom, band = self.thresholds_for(win.app_class)
+        current = win.lod_tier
+
+        tier = self.TIER_FRAME
+        for level, threshold in ((self.TIER_CONTENT, content_zoom), (self.TIER_TITLE, title_zoom)):
+            if current is None:
+                needed = threshold
+            elif current >= level:
+                needed = threshold - band
+            else:
+                needed = threshold + band
+            if zoom > needed:
+                tier = level
+            else:
+                break
+
+        win.lod_tier = tier
+        return tier
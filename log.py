@@ -0,0 +1,139 @@
+import os
+import sys
+import tempfile
+import time
+import traceback
+from collections import deque
+
+DEBUG, INFO, WARNING, ERROR = 10, 20, 30, 40
+LEVELS = {"debug": DEBUG, "info": INFO, "warning": WARNING, "error": ERROR}
+NAMES = {v: k.upper() for k, v in LEVELS.items()}
+
+
+def dump_path():
+    base = os.environ.get("XDG_RUNTIME_DIR") or tempfile.gettempdir()
+    return os.path.join(base, f"dragondesktop-log-{os.getuid()}.txt")
+
+
+class Logger:
+    """
+    Levelled log with per-message rate limiting and a ring buffer of recent events.
+
+    Call sites pass a %-format string and its arguments; text is only built
+    when something is written. Every message, whatever its level, goes into
+    the ring buffer as a tuple, so dump() shows what led up to a problem
+    even with debug output off. Messages at or above the configured level
+    are printed, at most `burst` per format string every `interval`
+    seconds; how many were dropped is appended to the next one printed.
+
+    Hot paths (focus, zoom, alt-tab, clicks, map/unmap) log at debug, which
+    is not printed by default.
+
+    Config:
+        "logging": {"level": "info", "burst": 5, "interval": 1.0, "ring_size": 2000}
+    """
+
+    def __init__(self, clock=time.time):
+        self.clock = clock
+        self.stream = None
+        self.level = INFO
+        self.burst = 5
+        self.interval = 1.0
+        self.ring = deque(maxlen=2000)
+        self.buckets = {}
+
+    def configure(self, config):
+        opts = config.get("logging", {})
+        self.level = LEVELS.get(str(opts.get("level", "info")).lower(), INFO)
+        self.burst = max(1, int(opts.get("burst", 5)))
+        self.interval = float(opts.get("interval", 1.0))
+        size = max(1, int(opts.get("ring_size", 2000)))
+        if size != self.ring.maxlen:
+            self.ring = deque(self.ring, maxlen=size)
+
+    def log(self, level, msg, *args):
+        now = self.clock()
+        if args:
+            args = tuple(str(a) if isinstance(a, BaseException) else a for a in args)
+        self.ring.append((now, level, msg, args))
+        if level < self.level:
+            return
+
+        bucket = self.buckets.get(msg)
+        suppressed = 0
+        if bucket is None or now - bucket[0] >= self.interval:
+            suppressed = bucket[2] if bucket else 0
+            bucket = self.buckets[msg] = [now, 0, 0]
+        if bucket[1] >= self.burst:
+            bucket[2] += 1
+            return
+        bucket[1] += 1
+
+        text = format_message(msg, args)
+        if suppressed:
+            text += f" ({suppressed} similar suppressed)"
+        print(text, file=self.stream or sys.stdout)
+
+    def debug(self, msg, *args):
+        self.log(DEBUG, msg, *args)
+
+    def info(self, msg, *args):
+        self.log(INFO, msg, *args)
+
+    def warning(self, msg, *args):
+        self.log(WARNING, msg, *args)
+
+    def error(self, msg, *args):
+        self.log(ERROR, msg, *args)
+
+    def exception(self, msg, *args):
+        """error() with the traceback of the exception being handled"""
+        self.log(ERROR, msg + "\n%s", *args, traceback.format_exc().rstrip())
+
+    def dump(self, path=None):
+        """Write the ring buffer to path (default: the runtime dir); returns the path"""
+        path = path or dump_path()
+        with open(path, "w") as f:
+            for stamp, level, msg, args in self.ring:
+                clock = time.strftime("%H:%M:%S", time.localtime(stamp))
+                f.write(f"{clock}.{int(stamp * 1000) % 1000:03d} {NAMES.get(level, level):7} "
+                        f"{format_message(msg, args)}\n")
+        return path
+
+
+def format_message(msg, args):
+    if not args:
+        return msg
+    try:
+        return msg % args
+    except (TypeError, ValueError):
+        return f"{msg} {args}"
+
+
+logger = Logger()
+configure = logger.configure
+debug = logger.debug
+info = logger.info
+warning = logger.warning
+error = logger.error
+exception = logger.exception
+
+
+def dump(path=None):
+    try:
+        path = logger.dump(path)
+        print(f"✓ Recent log written to {path}")
+    except Exception as e:
+        print(f"⚠ Log dump failed: {e}")
+
+
+def install_crash_dump():
+    """Dump the ring buffer when an exception escapes to the top level"""
+    previous = sys.excepthook
+
+    def hook(kind, value, tb):
+        logger.log(ERROR, "Crash: %s", "".join(traceback.format_exception(kind, value, tb)).rstrip())
+        dump()
+        previous(kind, value, tb)
+
+    sys.excepthook = hook
@@ -1,5 +1,22 @@
 # main.py
+import argparse
+from backend import XlibBackend, get_backend
 from wm import WindowManager
+import log
 
 if __name__ == "__main__":
-    WindowManager().run()
\ No newline at end of file
+    parser = argparse.ArgumentParser(description="DragonDesktop window manager")
+    parser.add_argument("--restore", metavar="SNAPSHOT", help="adopt windows from a restart snapshot")
+    parser.add_argument("--record", metavar="TRACE", help="record the event stream to a trace file (see replay.py)")
+    parser.add_argument("--backend", choices=("xlib", "xcb"), default="xlib",
+                        help="xcb pipelines window queries through xcffib (optional dependency)")
+    args = parser.parse_args()
+    log.install_crash_dump()
+
+    try:
+        backend = get_backend(args.backend)
+    except ImportError:
+        print("⚠ xcffib is not installed, falling back to python-xlib. Run: pip install xcffib")
+        backend = XlibBackend()
+
+    WindowManager(restore_path=args.restore, record_path=args.record, backend=backend).run()
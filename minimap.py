@@ -0,0 +1,272 @@
+from Xlib import X
+import log
+
+
+class Minimap:
+    """
+    Overview of the infinite canvas in a corner of the screen.
+
+    Every mapped ZWindow is drawn as a scaled rectangle plus an outline for the
+    current viewport. Drawing goes into a cached pixmap; on update only the
+    rectangles of windows that moved, appeared or disappeared (and the old/new
+    viewport) are repainted, clipped to the damaged area, then copied to screen.
+    The whole pixmap is only redrawn when the world bounds have to grow.
+    """
+    PADDING = 0.1
+
+    def __init__(self, root, display, renderer, config):
+        self.root = root
+        self.display = display
+        self.renderer = renderer
+
+        opts = config.get("minimap", {})
+        self._read_options(opts)
+        self.visible = False
+        self.focused = None
+
+        screen = root.get_geometry()
+        self.screen_x = 0
+        self.screen_y = 0
+        self.screen_w = screen.width
+        self.screen_h = screen.height
+
+        self.bounds = None
+        self.scale = 1.0
+        self.world_rects = {}
+        self.view_rect = None
+        self.needs_full_redraw = True
+
+        x, y = self._position()
+        self.window = root.create_window(
+            x, y, self.width, self.height,
+            border_width=1,
+            depth=X.CopyFromParent, visual=X.CopyFromParent,
+            background_pixel=renderer.get_pixel(8000, 8000, 10000),
+            event_mask=X.ExposureMask | X.ButtonPressMask,
+            override_redirect=True
+        )
+        self.pixmap = self.window.create_pixmap(self.width, self.height, renderer.depth)
+
+        self.bg_gc = self.pixmap.create_gc(foreground=renderer.get_pixel(8000, 8000, 10000))
+        self.win_gc = self.pixmap.create_gc(foreground=renderer.get_pixel(20000, 26000, 36000))
+        self.focus_gc = self.pixmap.create_gc(foreground=renderer.get_pixel(30000, 42000, 60000))
+        self.edge_gc = self.pixmap.create_gc(foreground=renderer.get_pixel(45000, 45000, 50000))
+        self.view_gc = self.pixmap.create_gc(foreground=renderer.get_pixel(65535, 52000, 20000))
+        self.copy_gc = self.window.create_gc()
+        self.draw_gcs = [self.bg_gc, self.win_gc, self.focus_gc, self.edge_gc, self.view_gc]
+
+        if opts.get("enabled", False):
+            self.show()
+
+    def _read_options(self, opts):
+        self.width = int(opts.get("width", 240))
+        self.height = int(opts.get("height", 160))
+        self.margin = int(opts.get("margin", 10))
+        self.corner = opts.get("corner", "bottom-right")
+
+    def configure(self, config):
+        """Apply changed minimap options from a reloaded config"""
+        opts = config.get("minimap", {})
+        old_size = (self.width, self.height)
+        self._read_options(opts)
+        if (self.width, self.height) != old_size:
+            self.pixmap.free()
+            self.pixmap = self.window.create_pixmap(self.width, self.height, self.renderer.depth)
+            self.window.configure(width=self.width, height=self.height)
+            for gc in self.draw_gcs:
+                gc.change(clip_mask=X.NONE)
+        self.needs_full_redraw = True
+
+        if opts.get("enabled", False) != self.visible:
+            self.toggle()
+
+    def _position(self):
+        if "right" in self.corner:
+            x = self.screen_w - self.width - self.margin - 2
+        else:
+            x = self.margin
+        if "bottom" in self.corner:
+            y = self.screen_h - self.height - self.margin - 2
+        else:
+            y = self.margin
+        return self.screen_x + x, self.screen_y + y
+
+    def place(self, output):
+        """Move the minimap into the configured corner of an output"""
+        self.screen_x, self.screen_y = output.x, output.y
+        self.screen_w, self.screen_h = output.width, output.height
+        x, y = self._position()
+        self.window.configure(x=x, y=y)
+
+    def show(self):
+        self.visible = True
+        self.needs_full_redraw = True
+        self.window.map()
+        self.window.configure(stack_mode=X.Above)
+
+    def hide(self):
+        self.visible = False
+        self.window.unmap()
+
+    def toggle(self):
+        if self.visible:
+            self.hide()
+        else:
+            self.show()
+        return self.visible
+
+    def _viewport(self, camera):
+        """World rect currently covered by the screen"""
+        zoom = max(camera.zoom, 0.01)
+        vw = camera.screen_w / zoom
+        vh = camera.screen_h / zoom
+        return (int(camera.x - vw / 2), int(camera.y - vh / 2), int(vw), int(vh))
+
+    def _contains(self, rect):
+        if self.bounds is None:
+            return False
+        bx, by, bw, bh = self.bounds
+        x, y, w, h = rect[:4]
+        return x >= bx and y >= by and x + w <= bx + bw and y + h <= by + bh
+
+    def _fit(self, rects):
+        """Recompute world bounds so every rect fits, keeping the minimap's aspect ratio"""
+        min_x = min(r[0] for r in rects)
+        min_y = min(r[1] for r in rects)
+        max_x = max(r[0] + r[2] for r in rects)
+        max_y = max(r[1] + r[3] for r in rects)
+        w = max(1, max_x - min_x)
+        h = max(1, max_y - min_y)
+        pad_w = w * self.PADDING
+        pad_h = h * self.PADDING
+        w += pad_w * 2
+        h += pad_h * 2
+
+        self.scale = min(self.width / w, self.height / h)
+        world_w = self.width / self.scale
+        world_h = self.height / self.scale
+        cx = (min_x + max_x) / 2
+        cy = (min_y + max_y) / 2
+        self.bounds = (cx - world_w / 2, cy - world_h / 2, world_w, world_h)
+
+    def to_map(self, rect):
+        bx, by, _, _ = self.bounds
+        x, y, w, h = rect[:4]
+        mx = int((x - bx) * self.scale)
+        my = int((y - by) * self.scale)
+        return (mx, my, max(2, int(w * self.scale)), max(2, int(h * self.scale)))
+
+    def to_world(self, mx, my):
+        bx, by, _, _ = self.bounds
+        return (int(bx + mx / self.scale), int(by + my / self.scale))
+
+    def update(self, camera, windows):
+        """Called after every render; repaints only what changed since the last call"""
+        if not self.visible:
+            return
+
+        current = {}
+        for cid, win in windows.items():
+            if win.mapped:
+                current[cid] = (win.world_x, win.world_y, win.world_w, win.world_h, win is self.focused)
+        view = self._viewport(camera)
+
+        if not self.needs_full_redraw:
+            for rect in current.values():
+                if not self._contains(rect):
+                    self.needs_full_redraw = True
+                    break
+            else:
+                if not self._contains(view):
+                    self.needs_full_redraw = True
+
+        if self.needs_full_redraw:
+            self._fit(list(current.values()) + [view])
+            self.world_rects = current
+            self.view_rect = view
+            self._redraw_full()
+            return
+
+        damage = []
+        for cid in set(current) | set(self.world_rects):
+            old = self.world_rects.get(cid)
+            new = current.get(cid)
+            if old == new:
+                continue
+            if old:
+                damage.append(self._grow(self.to_map(old)))
+            if new:
+                damage.append(self._grow(self.to_map(new)))
+        if view != self.view_rect:
+            damage.append(self._grow(self.to_map(self.view_rect)))
+            damage.append(self._grow(self.to_map(view)))
+
+        self.world_rects = current
+        self.view_rect = view
+        if damage:
+            self._redraw_damage(damage)
+
+    def _grow(self, rect):
+        """Damage rects include the 1px outline drawn around each rectangle"""
+        x, y, w, h = rect
+        return (x - 1, y - 1, w + 2, h + 2)
+
+    def _draw_contents(self, damage=None):
+        """Draw windows (in stacking order) and the viewport, skipping anything outside damage"""
+        for rect in self.world_rects.values():
+            mrect = self.to_map(rect)
+            if damage and not any(self._intersects(mrect, d) for d in damage):
+                continue
+            x, y, w, h = mrect
+            gc = self.focus_gc if rect[4] else self.win_gc
+            self.pixmap.fill_rectangle(gc, x, y, w, h)
+            self.pixmap.rectangle(self.edge_gc, x, y, w - 1, h - 1)
+
+        if self.view_rect:
+            x, y, w, h = self.to_map(self.view_rect)
+            self.pixmap.rectangle(self.view_gc, x, y, w - 1, h - 1)
+
+    def _intersects(self, a, b):
+        return a[0] < b[0] + b[2] and b[0] < a[0] + a[2] and a[1] < b[1] + b[3] and b[1] < a[1] + a[3]
+
+    def _redraw_full(self):
+        self.needs_full_redraw = False
+        for gc in self.draw_gcs:
+            gc.change(clip_mask=X.NONE)
+        self.pixmap.fill_rectangle(self.bg_gc, 0, 0, self.width, self.height)
+        self._draw_contents()
+        self.blit(0, 0, self.width, self.height)
+
+    def _redraw_damage(self, damage):
+        clip = [
+            {'x': max(0, x), 'y': max(0, y), 'width': max(1, w), 'height': max(1, h)}
+            for x, y, w, h in damage
+        ]
+        for gc in self.draw_gcs:
+            gc.set_clip_rectangles(0, 0, clip, X.Unsorted)
+        for r in clip:
+            self.pixmap.fill_rectangle(self.bg_gc, r['x'], r['y'], r['width'], r['height'])
+        self._draw_contents(damage)
+
+        x1 = max(0, min(d[0] for d in damage))
+        y1 = max(0, min(d[1] for d in damage))
+        x2 = min(self.width, max(d[0] + d[2] for d in damage))
+        y2 = min(self.height, max(d[1] + d[3] for d in damage))
+        if x2 > x1 and y2 > y1:
+            self.blit(x1, y1, x2 - x1, y2 - y1)
+
+    def blit(self, x, y, w, h):
+        """Copy a region of the cached pixmap onto the minimap window"""
+        try:
+            self.window.copy_area(self.copy_gc, self.pixmap, x, y, w, h, x, y)
+        except Exception as e:
+            log.warning("Minimap blit error: %s", e)
+
+    def handle_expose(self, event):
+        self.blit(event.x, event.y, event.width, event.height)
+
+    def world_at(self, mx, my):
+        """World coordinates under a click on the minimap, or None before the first draw"""
+        if self.bounds is None:
+            return None
+        return self.to_world(mx, my)
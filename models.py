@@ -5,21 +5,30 @@ class Camera:
         self.y = 0  
         self.zoom = 1.0  
         
-        self.saved_spots = {}  
+        self.saved_spots = {}
+
+        self.screen_x = 0
+        self.screen_y = 0
+        self.screen_w = 0
+        self.screen_h = 0
+
+    def set_viewport(self, x, y, width, height):
+        """Screen rect (one monitor) this camera renders into"""
+        self.screen_x = x
+        self.screen_y = y
+        self.screen_w = width
+        self.screen_h = height
   
   
 class ZWindow:  
-    def __init__(self, client_id, client_window, frame_window, close_btn, full_btn, x, y, w, h, title=""):  
-        
-        self.id = client_id  
-        self.client = client_window  
-        self.frame = frame_window  
-        self.title = title  
-          
-        
-        self.btn_close = close_btn  
-        self.btn_full = full_btn  
-          
+    def __init__(self, client_id, client_window, frame_window, x, y, w, h, title=""):
+
+        self.id = client_id
+        self.client = client_window
+        self.frame = frame_window
+        self.title = title
+        self.theme = None
+
         
         self.world_x = x  
         self.world_y = y  
@@ -40,6 +49,26 @@ class ZWindow:
         self.mapped = False  
           
         
-        self.is_dialog = False  
-        self.transient_for = None  
-        self.hidden_by_zoom = False 
+        self.is_dialog = False
+        self.transient_for = None
+        self.canvas = 0
+        self.hidden_by_zoom = False
+
+        self.app_class = ""
+        self.lod_tier = None
+        self.client_mapped = False
+        self.client_geometry = None
+        self.frame_rect = None
+        self.title_h = 0
+        self.titlebar_painted = None
+
+        self.hidden_offscreen = False
+        self.parked = False
+        self.offscreen_since = None
+        self.ignore_unmaps = 0
+
+        self.sync_counter = None
+        self.sync_alarm = None
+        self.sync_value = 0
+        self.sync_pending = False
+        self.sync_deferred = False
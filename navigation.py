@@ -0,0 +1,91 @@
+class Navigator:
+    """
+    Accumulates zoom and pan input between renders and applies it once per frame.
+
+    Wheel notches, smooth-scroll deltas, pinch scale changes and raw pointer
+    motion only add to the pending state; RenderScheduler.flush calls apply()
+    right before render_world, so a burst of input costs one render. Zoom
+    keeps the world point under its anchor (the pointer) fixed on screen.
+
+    Config:
+        "navigation": {"zoom_step": 0.1, "scroll_pan_px": 60}
+    zoom_step is the zoom change per wheel notch, scroll_pan_px the pan per
+    notch of horizontal scrolling.
+    """
+
+    MIN_ZOOM = 0.11
+    MAX_ZOOM = 5.0
+
+    def __init__(self, wm, config):
+        self.wm = wm
+        self.configure(config)
+        self.zoom_delta = 0.0
+        self.zoom_scale = 1.0
+        self.anchor = None
+        self.pan_x = 0.0
+        self.pan_y = 0.0
+        self.applied = 0
+
+    def configure(self, config):
+        opts = config.get("navigation", {})
+        self.zoom_step = float(opts.get("zoom_step", 0.1))
+        self.scroll_pan_px = float(opts.get("scroll_pan_px", 60))
+
+    @property
+    def pending(self):
+        return bool(self.zoom_delta or self.zoom_scale != 1.0 or self.pan_x or self.pan_y)
+
+    def zoom_steps(self, steps, x, y):
+        """Wheel notches (fractional for smooth scrolling), anchored at screen (x, y)"""
+        self.zoom_delta += self.zoom_step * steps
+        self.anchor = (x, y)
+        self.wm.scheduler.invalidate()
+
+    def zoom_by(self, factor, x, y):
+        """Multiplicative zoom (pinch), anchored at screen (x, y)"""
+        self.zoom_scale *= factor
+        self.anchor = (x, y)
+        self.wm.scheduler.invalidate()
+
+    def pan_by(self, dx, dy):
+        """Move the canvas content by (dx, dy) screen pixels"""
+        self.pan_x += dx
+        self.pan_y += dy
+        self.wm.scheduler.invalidate()
+
+    def scroll_pan(self, notches_x, notches_y):
+        self.pan_by(-notches_x * self.scroll_pan_px, -notches_y * self.scroll_pan_px)
+
+    def reset(self):
+        self.zoom_delta = 0.0
+        self.zoom_scale = 1.0
+        self.anchor = None
+        self.pan_x = self.pan_y = 0.0
+
+    def apply(self):
+        """Fold everything accumulated since the last render into the camera"""
+        if not self.pending:
+            return
+        wm = self.wm
+        if wm.get_fullscreen_window():
+            self.reset()
+            return
+        cam = wm.camera
+
+        old = cam.zoom
+        new = max(self.MIN_ZOOM, min((old + self.zoom_delta) * self.zoom_scale, self.MAX_ZOOM))
+        if new != old:
+            if self.anchor:
+                ax = self.anchor[0] - (cam.screen_x + cam.screen_w // 2)
+                ay = self.anchor[1] - (cam.screen_y + cam.screen_h // 2)
+                cam.x += ax / old - ax / new
+                cam.y += ay / old - ay / new
+            cam.zoom = new
+            wm.begin_zoom_gesture()
+
+        if self.pan_x or self.pan_y:
+            cam.x -= self.pan_x / cam.zoom
+            cam.y -= self.pan_y / cam.zoom
+
+        self.reset()
+        self.applied += 1
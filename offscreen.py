@@ -0,0 +1,109 @@
+from Xlib import X, Xatom
+from lod import SemanticZoom
+import log
+
+WM_STATE_NORMAL = 1
+WM_STATE_ICONIC = 3
+
+
+class OffscreenHider:
+    """
+    Iconifies clients that have been far outside the viewport for a while.
+
+    A window whose frame has stayed outside the renderer's guard band (see
+    Renderer.guard_for) for `grace_seconds` gets its client and frame
+    unmapped, WM_STATE set to Iconic and _NET_WM_STATE_HIDDEN added, so the
+    application can throttle its own rendering. As soon as a render finds it
+    inside the band again it is restored, before it actually scrolls into
+    view. The band is stretched ahead of camera motion, so windows about to
+    scroll in come back earlier and windows left behind start their grace
+    period sooner.
+
+    Config:
+        "offscreen_hiding": {"enabled": true, "grace_seconds": 2.0}
+    """
+
+    def __init__(self, wm, config):
+        self.wm = wm
+        self._NET_WM_STATE_HIDDEN = wm.d.intern_atom('_NET_WM_STATE_HIDDEN')
+        self.configure(config)
+
+    def configure(self, config):
+        opts = config.get("offscreen_hiding", {})
+        self.enabled = bool(opts.get("enabled", True))
+        self.grace = float(opts.get("grace_seconds", 2.0))
+        if not self.enabled:
+            for win in self.wm.windows.values():
+                win.offscreen_since = None
+                if win.hidden_offscreen:
+                    self.restore(win)
+
+    def cull(self, win, near):
+        """
+        Called from render_world for each projected window, with whether the
+        renderer found it inside the guard band (or pinned on screen).
+        Returns True if the window is hidden off-screen and should be skipped.
+        """
+        if not self.enabled:
+            return False
+
+        if near:
+            win.offscreen_since = None
+            if win.hidden_offscreen:
+                self.restore(win)
+            return False
+
+        if win.hidden_offscreen:
+            return True
+        if win.offscreen_since is None:
+            win.offscreen_since = self.wm.timers.clock()
+            if not self.wm.timers.is_pending('offscreen'):
+                self.wm.timers.call_later(self.grace, 'offscreen', self.hide_due)
+        return False
+
+    def hide_due(self):
+        """Timer callback: iconify windows whose grace period has expired"""
+        now = self.wm.timers.clock()
+        next_due = None
+        for win in list(self.wm.windows.values()):
+            if win.offscreen_since is None or win.hidden_offscreen or not win.mapped:
+                continue
+            due = win.offscreen_since + self.grace
+            if due <= now:
+                self.hide(win)
+            elif next_due is None or due < next_due:
+                next_due = due
+        if next_due is not None:
+            self.wm.timers.call_later(next_due - now, 'offscreen', self.hide_due)
+        self.wm.d.flush()
+
+    def hide(self, win):
+        win.hidden_offscreen = True
+        try:
+            if win.client_mapped:
+                win.client_mapped = False
+                win.ignore_unmaps += 1
+                win.client.unmap()
+            win.frame.unmap()
+            self._set_state(win, WM_STATE_ICONIC, hidden=True)
+        except Exception as e:
+            log.warning("Offscreen hide error: %s", e)
+
+    def restore(self, win):
+        win.hidden_offscreen = False
+        try:
+            self._set_state(win, WM_STATE_NORMAL, hidden=False)
+            win.frame.map()
+            if not win.client_mapped and (win.lod_tier or 0) >= SemanticZoom.TIER_CONTENT:
+                win.client.map()
+                win.client_mapped = True
+        except Exception as e:
+            log.warning("Offscreen restore error: %s", e)
+
+    def _set_state(self, win, wm_state, hidden):
+        win.client.change_property(self.wm.WM_STATE, self.wm.WM_STATE, 32, [wm_state, X.NONE])
+        prop = win.client.get_full_property(self.wm._NET_WM_STATE, Xatom.ATOM)
+        states = [a for a in (prop.value if prop else []) if a != self._NET_WM_STATE_HIDDEN]
+        if hidden:
+            states.append(self._NET_WM_STATE_HIDDEN)
+        win.client.change_property(self.wm._NET_WM_STATE, Xatom.ATOM, 32, states)
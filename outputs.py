@@ -0,0 +1,188 @@
+from models import Camera
+import log
+
+
+class Output:
+    """One monitor: its screen rect and the camera looking onto the canvas through it"""
+
+    def __init__(self, name, x, y, width, height, camera=None):
+        self.name = name
+        self.camera = camera or Camera()
+        self.reserved = (0, 0, 0, 0)
+        self.set_geometry(x, y, width, height)
+
+    def set_geometry(self, x, y, width, height):
+        self.x = x
+        self.y = y
+        self.width = width
+        self.height = height
+        self.reserve(*self.reserved)
+
+    def reserve(self, left, right, top, bottom):
+        """Space taken by docks on each edge; the camera renders into the rest"""
+        self.reserved = (left, right, top, bottom)
+        self.camera.set_viewport(self.x + left, self.y + top,
+                                 max(1, self.width - left - right), max(1, self.height - top - bottom))
+
+    def contains(self, px, py):
+        return self.x <= px < self.x + self.width and self.y <= py < self.y + self.height
+
+
+class OutputManager:
+    """
+    RandR output discovery with hotplug.
+
+    Output geometry is queried once at startup and again only when RandR
+    reports a change, so rendering never asks the server for screen size.
+    Without RandR (or with no active CRTCs) the whole root window is one output.
+    Cameras of outputs that survive a hotplug (matched by name) are kept.
+    Dock struts (_NET_WM_STRUT_PARTIAL) are kept per dock window and shrink
+    the viewport of every output they overlap.
+    """
+
+    def __init__(self, d, root):
+        self.d = d
+        self.root = root
+        self.outputs = []
+        self.struts = {}
+        self.randr = None
+        self.screen_change_event = None
+        self.notify_event = None
+
+        try:
+            if self.d.has_extension('RANDR'):
+                info = self.d.query_extension('RANDR')
+                self.randr = info
+                self.screen_change_event = info.first_event
+                self.notify_event = info.first_event + 1
+                from Xlib.ext import randr
+                self.root.xrandr_select_input(
+                    randr.RRScreenChangeNotifyMask |
+                    randr.RRCrtcChangeNotifyMask |
+                    randr.RROutputChangeNotifyMask
+                )
+        except Exception as e:
+            log.warning("⚠ RandR unavailable, using single output: %s", e)
+            self.randr = None
+
+        self.refresh()
+
+    def _query(self):
+        """Return [(name, x, y, w, h)] for every active output"""
+        found = []
+        if self.randr:
+            try:
+                try:
+                    res = self.root.xrandr_get_screen_resources_current()
+                except AttributeError:
+                    res = self.root.xrandr_get_screen_resources()
+                for output in res.outputs:
+                    info = self.d.xrandr_get_output_info(output, res.config_timestamp)
+                    if info.connection != 0 or not info.crtc:
+                        continue
+                    crtc = self.d.xrandr_get_crtc_info(info.crtc, res.config_timestamp)
+                    if crtc.width and crtc.height:
+                        name = info.name if isinstance(info.name, str) else info.name.decode('utf-8', 'ignore')
+                        found.append((name, crtc.x, crtc.y, crtc.width, crtc.height))
+            except Exception as e:
+                log.warning("⚠ RandR query failed: %s", e)
+                found = []
+
+        unique = []
+        seen = set()
+        for entry in found:
+            if entry[1:] not in seen:
+                seen.add(entry[1:])
+                unique.append(entry)
+
+        if not unique:
+            geom = self.root.get_geometry()
+            unique = [("default", 0, 0, geom.width, geom.height)]
+        return sorted(unique, key=lambda e: (e[1], e[2]))
+
+    def refresh(self):
+        """Re-read output geometry. Returns True if anything changed."""
+        found = self._query()
+        old = {o.name: o for o in self.outputs}
+        before = [(o.name, o.x, o.y, o.width, o.height) for o in self.outputs]
+
+        outputs = []
+        for name, x, y, w, h in found:
+            output = old.get(name)
+            if output:
+                output.set_geometry(x, y, w, h)
+            else:
+                camera = Camera()
+                if self.outputs:
+                    camera.x = self.outputs[0].camera.x
+                    camera.y = self.outputs[0].camera.y
+                    camera.zoom = self.outputs[0].camera.zoom
+                output = Output(name, x, y, w, h, camera)
+            outputs.append(output)
+        self.outputs = outputs
+        self.apply_struts()
+
+        after = [(o.name, o.x, o.y, o.width, o.height) for o in self.outputs]
+        if after != before:
+            for o in self.outputs:
+                log.info("✓ Output %s: %dx%d+%d+%d", o.name, o.width, o.height, o.x, o.y)
+            return True
+        return False
+
+    def set_strut(self, window_id, strut):
+        """Record (or with None, drop) a dock's strut. Returns True if any viewport changed."""
+        if strut:
+            self.struts[window_id] = strut
+        elif self.struts.pop(window_id, None) is None:
+            return False
+        return self.apply_struts()
+
+    def apply_struts(self):
+        if not self.outputs:
+            return False
+        _, _, root_w, root_h = self.bounds()
+        changed = False
+        for o in self.outputs:
+            left = right = top = bottom = 0
+            for (l, r, t, b, ly1, ly2, ry1, ry2, tx1, tx2, bx1, bx2) in self.struts.values():
+                if l and ly1 < o.y + o.height and ly2 >= o.y:
+                    left = max(left, l - o.x)
+                if r and ry1 < o.y + o.height and ry2 >= o.y:
+                    right = max(right, o.x + o.width - (root_w - r))
+                if t and tx1 < o.x + o.width and tx2 >= o.x:
+                    top = max(top, t - o.y)
+                if b and bx1 < o.x + o.width and bx2 >= o.x:
+                    bottom = max(bottom, o.y + o.height - (root_h - b))
+            reserved = (min(max(0, left), o.width // 2), min(max(0, right), o.width // 2),
+                        min(max(0, top), o.height // 2), min(max(0, bottom), o.height // 2))
+            if reserved != o.reserved:
+                o.reserve(*reserved)
+                changed = True
+        return changed
+
+    def is_randr_event(self, event):
+        return self.randr is not None and event.type in (self.screen_change_event, self.notify_event)
+
+    @property
+    def cameras(self):
+        return [o.camera for o in self.outputs]
+
+    def output_at(self, px, py):
+        for o in self.outputs:
+            if o.contains(px, py):
+                return o
+        return self.outputs[0]
+
+    def output_for_camera(self, camera):
+        for o in self.outputs:
+            if o.camera is camera:
+                return o
+        return self.outputs[0]
+
+    def bounds(self):
+        """Bounding rect of all outputs (x, y, w, h)"""
+        x1 = min(o.x for o in self.outputs)
+        y1 = min(o.y for o in self.outputs)
+        x2 = max(o.x + o.width for o in self.outputs)
+        y2 = max(o.y + o.height for o in self.outputs)
+        return x1, y1, x2 - x1, y2 - y1
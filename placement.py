@@ -0,0 +1,201 @@
+import heapq
+
+
+class SpatialIndex:
+    """
+    Uniform grid over world coordinates: cell -> ids of the rects touching it.
+
+    Kept up to date incrementally: update() is called for a window when it
+    is mapped, unmapped, moved or resized and only touches the grid if its
+    occupied rect changed; remove() when it goes away. query() returns
+    candidates whose cells intersect a rect; callers do the exact overlap
+    test.
+    """
+
+    def __init__(self, cell=512):
+        self.cell = cell
+        self.cells = {}
+        self.rects = {}
+        self.free = {}
+
+    def _cells(self, rect):
+        x, y, w, h = rect
+        c = self.cell
+        for cx in range(x // c, (x + w - 1) // c + 1):
+            for cy in range(y // c, (y + h - 1) // c + 1):
+                yield cx, cy
+
+    def insert(self, key, rect):
+        self.rects[key] = rect
+        for cell in self._cells(rect):
+            self.cells.setdefault(cell, set()).add(key)
+
+    def remove(self, key):
+        rect = self.rects.pop(key, None)
+        if rect is None:
+            return
+        self.free.clear()
+        for cell in self._cells(rect):
+            bucket = self.cells.get(cell)
+            if bucket:
+                bucket.discard(key)
+                if not bucket:
+                    del self.cells[cell]
+
+    def update(self, key, win):
+        """Re-index one window after a map, unmap, move or resize"""
+        rect = occupied_rect(win)
+        if self.rects.get(key) == rect:
+            return
+        self.remove(key)
+        if rect is not None:
+            self.insert(key, rect)
+
+    def free_edges(self, w, h, gap):
+        """
+        Placer's cache for w x h windows: key -> edge-aligned spots next to
+        that window which were free when last tested. Inserting never frees
+        space, so a spot missing here stays taken until a remove() resets it.
+        """
+        return self.free.setdefault((w, h, gap), {})
+
+    def query(self, rect):
+        found = set()
+        x, y, w, h = rect
+        c = self.cell
+        cx1, cy1, cx2, cy2 = x // c, y // c, (x + w - 1) // c, (y + h - 1) // c
+        if (cx2 - cx1 + 1) * (cy2 - cy1 + 1) > len(self.cells):
+            for (cx, cy), bucket in self.cells.items():
+                if cx1 <= cx <= cx2 and cy1 <= cy <= cy2:
+                    found |= bucket
+            return found
+        for cell in self._cells(rect):
+            bucket = self.cells.get(cell)
+            if bucket:
+                found |= bucket
+        return found
+
+    def is_free(self, rect, gap=0):
+        """True if no indexed rect comes within gap of rect"""
+        x, y, w, h = rect
+        x1, y1, x2, y2 = x - gap, y - gap, x + w + gap, y + h + gap
+        c = self.cell
+        rects = self.rects
+        cells = self.cells
+        for cx in range(x1 // c, (x2 - 1) // c + 1):
+            for cy in range(y1 // c, (y2 - 1) // c + 1):
+                bucket = cells.get((cx, cy))
+                if not bucket:
+                    continue
+                for key in bucket:
+                    ox, oy, ow, oh = rects[key]
+                    if ox < x2 and x1 < ox + ow and oy < y2 and y1 < oy + oh:
+                        return False
+        return True
+
+
+def occupied_rect(win):
+    """World rect a window claims on the canvas, None if it claims none"""
+    if not win.mapped:
+        return None
+    if win.is_fullscreen:
+        return win.saved_geometry
+    return (win.world_x, win.world_y, win.world_w, win.world_h)
+
+
+class Placer:
+    """
+    Picks where a new window goes: the free spot nearest the viewport centre.
+
+    Candidates are the centred position plus positions flush against each
+    window near the centre: beside it aligned with its top or bottom edge or
+    with the centre line, above or below it aligned with its left or right
+    edge or the centre line. They are tried nearest-first against the
+    spatial index while the search radius doubles up to max_radius; if
+    nothing is free the window goes to the centre as before.
+
+    place() never rescans the windows: it reads the index, which the WM
+    updates as windows map, move and go away. The index also remembers
+    which edge-aligned spots around each window were taken, so in a dense
+    cluster the windows already boxed in are skipped outright and only
+    the ones on its rim are looked at.
+
+    Config:
+        "placement": {"enabled": true, "gap": 20, "max_radius": 20000}
+    """
+
+    def __init__(self, config):
+        self.configure(config)
+
+    def configure(self, config):
+        opts = config.get("placement", {})
+        self.enabled = bool(opts.get("enabled", True))
+        self.gap = int(opts.get("gap", 20))
+        self.max_radius = int(opts.get("max_radius", 20000))
+
+    def _edges(self, rect, w, h):
+        """(x, y) positions flush against rect and aligned with one of its edges"""
+        ox, oy, ow, oh = rect
+        gap = self.gap
+        right, left = ox + ow + gap, ox - gap - w
+        below, above = oy + oh + gap, oy - gap - h
+        return (
+            (right, oy), (right, oy + oh - h), (left, oy), (left, oy + oh - h),
+            (ox, below), (ox + ow - w, below), (ox, above), (ox + ow - w, above),
+        )
+
+    def _centred(self, rect, x0, y0, w, h):
+        """(x, y) positions flush against rect on the viewport centre lines"""
+        ox, oy, ow, oh = rect
+        gap = self.gap
+        return (
+            (ox + ow + gap, y0), (ox - gap - w, y0),
+            (x0, oy + oh + gap), (x0, oy - gap - h),
+        )
+
+    def place(self, index, cx, cy, w, h):
+        """
+        Top-left world position for a w x h window, as close to (cx, cy) as
+        possible among the windows in index (a SpatialIndex)
+        """
+        x0, y0 = int(cx - w / 2), int(cy - h / 2)
+        if not self.enabled:
+            return x0, y0
+        gap = self.gap
+        if index.is_free((x0, y0, w, h), gap):
+            return x0, y0
+
+        rects = index.rects
+        spots = index.free_edges(w, h, gap)
+        expanded = set()
+        seen = {(x0, y0)}
+        heap = []
+        radius = max(w, h)
+        while True:
+            area = (x0 - radius, y0 - radius, w + 2 * radius, h + 2 * radius)
+            for key in index.query(area) - expanded:
+                expanded.add(key)
+                rect = rects[key]
+                free = spots.get(key)
+                if free is None:
+                    free = spots[key] = {p for p in self._edges(rect, w, h)
+                                         if index.is_free((p[0], p[1], w, h), gap)}
+                elif not free:
+                    continue
+                for x, y in free:
+                    if (x, y) not in seen:
+                        seen.add((x, y))
+                        heapq.heappush(heap, ((x - x0) ** 2 + (y - y0) ** 2, x, y, key))
+                for x, y in self._centred(rect, x0, y0, w, h):
+                    if (x, y) not in seen:
+                        seen.add((x, y))
+                        heapq.heappush(heap, ((x - x0) ** 2 + (y - y0) ** 2, x, y, None))
+            while heap and heap[0][0] <= radius * radius:
+                _, x, y, key = heapq.heappop(heap)
+                if index.is_free((x, y, w, h), gap):
+                    return x, y
+                if key is not None:
+                    spots[key].discard((x, y))
+            if radius >= self.max_radius:
+                return x0, y0
+            radius = min(radius * 2, self.max_radius)
@@ -3,7 +3,11 @@ from Xlib import error as XError
 import hashlib    
 from PIL import Image    
 import sys    
-import subprocess    
+import subprocess
+import time
+from lod import SemanticZoom
+from damage import DamageTracker
+import log
   
 class Renderer:  
     """  
@@ -20,8 +24,22 @@ class Renderer:
         self.screen = display.screen()  
         self.colormap = self.screen.default_colormap  
         self.depth = self.screen.root_depth  
-        self.config = config  
-        self.color_cache = {}  
+        self.config = config
+        self.color_cache = {}
+        self.overlays = []
+        self.semantic_zoom = SemanticZoom(config)
+        self.offscreen = None
+        self.scene = None
+        self.cameras = []
+        self.clock = time.monotonic
+        self.focused = lambda: None
+        self.motion = {}
+        self.guards = {}
+        self.configure_guard()
+        self.damage = DamageTracker(root, self.screen.width_in_pixels, self.screen.height_in_pixels)
+
+        self.zoom_gesture = False
+        self.zoom_idle = float(config.get("zoom_resize_idle_ms", 150)) / 1000.0
           
         
         self.bg_pixmap = None  
@@ -196,13 +214,12 @@ class Renderer:
         except Exception as e:  
             print(f"⚠ Failed to set wallpaper: {e}")  
   
-    def draw_wallpaper_cpu(self):  
-        """  
-        CPU MODE: Trigger X11 to repaint the background.  
-        """  
-        
-        
-        self.root.clear_area()  
+    def draw_wallpaper_cpu(self):
+        """
+        CPU MODE: Trigger X11 to repaint the background, only where
+        frames moved away since the last render (see DamageTracker).
+        """
+        self.damage.flush()
   
     def alloc_color(self, name):  
         try:  
@@ -248,21 +265,157 @@ class Renderer:
   
     def project(self, camera, wx, wy, ww, wh):  
         """  
-        Transform world coordinates to screen coordinates.  
-        This ALWAYS runs regardless of compositor mode.  
-        """  
-        screen = self.root.get_geometry()  
-        half_w = screen.width // 2  
-        half_h = screen.height // 2  
-        sx = int((wx - camera.x) * camera.zoom + half_w)  
-        sy = int((wy - camera.y) * camera.zoom + half_h)  
+        Transform world coordinates to screen coordinates.
+        This ALWAYS runs regardless of compositor mode.
+        Uses the camera's cached output rect, never a server round-trip.
+        """
+        half_w = camera.screen_x + camera.screen_w // 2
+        half_h = camera.screen_y + camera.screen_h // 2
+        sx = int((wx - camera.x) * camera.zoom + half_w)
+        sy = int((wy - camera.y) * camera.zoom + half_h)
         sw = int(ww * camera.zoom)  
         sh = int(wh * camera.zoom)  
         sw = max(5, min(sw, 30000))  
         sh = max(5, min(sh, 30000))  
         return sx, sy, sw, sh  
   
-    def render_world(self, camera, windows):  
+    def camera_for(self, win, camera):
+        """
+        Pick the output camera that renders a window: the active camera if the
+        window is on its output, otherwise the first output showing it.
+        """
+        if len(self.cameras) < 2:
+            return camera
+        for cam in [camera] + [c for c in self.cameras if c is not camera]:
+            sx, sy, sw, sh = self.project(cam, win.world_x, win.world_y, win.world_w, win.world_h)
+            if (sx < cam.screen_x + cam.screen_w and sx + sw > cam.screen_x and
+                    sy < cam.screen_y + cam.screen_h and sy + sh > cam.screen_y):
+                return cam
+        return camera
+
+    def configure_guard(self):
+        """
+        Guard band around each output: windows inside it are configured and
+        mapped, windows outside are parked off-screen and left alone.
+
+        Config:
+            "guard_band": {"margin": 0.5, "lookahead_seconds": 0.3, "max_lead": 2.0}
+        margin and max_lead are fractions of the screen size.
+        """
+        opts = self.config.get("guard_band", {})
+        self.guard_margin = float(opts.get("margin", self.config.get("offscreen_hiding", {}).get("margin", 0.5)))
+        self.lookahead = float(opts.get("lookahead_seconds", 0.3))
+        self.max_lead = float(opts.get("max_lead", 2.0))
+
+    def begin_render(self):
+        """Sample every camera's velocity and work out this render's guard bands"""
+        now = self.clock()
+        self.guards = {}
+        for camera in self.cameras:
+            self._track(camera, now)
+            self.guards[id(camera)] = self.guard_for(camera)
+
+    def _track(self, camera, now):
+        last = self.motion.get(id(camera))
+        vx = vy = 0.0
+        if last is not None:
+            t, x, y, zoom, lvx, lvy = last
+            dt = now - t
+            if dt <= 0:
+                return
+            if zoom == camera.zoom and dt < 0.25:
+                ix = (camera.x - x) * camera.zoom / dt
+                iy = (camera.y - y) * camera.zoom / dt
+                vx, vy = (lvx + ix) / 2, (lvy + iy) / 2
+        self.motion[id(camera)] = (now, camera.x, camera.y, camera.zoom, vx, vy)
+
+    def velocity(self, camera):
+        """Smoothed screen-space velocity of the camera in pixels per second"""
+        last = self.motion.get(id(camera))
+        return (last[4], last[5]) if last else (0.0, 0.0)
+
+    def guard_for(self, camera):
+        """
+        Output rect of the camera grown by the margin as (x1, y1, x2, y2).
+        Moving, the side ahead grows by velocity * lookahead (up to max_lead
+        screens) and the side behind shrinks by as much, down to the screen
+        edge, so what scrolls in is mapped early and what is left behind is
+        parked sooner.
+        """
+        mx = camera.screen_w * self.guard_margin
+        my = camera.screen_h * self.guard_margin
+        vx, vy = self.velocity(camera)
+        lead_x = max(-camera.screen_w * self.max_lead, min(vx * self.lookahead, camera.screen_w * self.max_lead))
+        lead_y = max(-camera.screen_h * self.max_lead, min(vy * self.lookahead, camera.screen_h * self.max_lead))
+        x1 = camera.screen_x - int(max(0, mx - lead_x))
+        x2 = camera.screen_x + camera.screen_w + int(max(0, mx + lead_x))
+        y1 = camera.screen_y - int(max(0, my - lead_y))
+        y2 = camera.screen_y + camera.screen_h + int(max(0, my + lead_y))
+        return (x1, y1, x2, y2)
+
+    def near(self, camera, sx, sy, sw, sh):
+        """True if screen rect (sx, sy, sw, sh) reaches into camera's guard band"""
+        guard = self.guards.get(id(camera))
+        gx1, gy1, gx2, gy2 = guard if guard else self.guard_for(camera)
+        return sx < gx2 and sx + sw > gx1 and sy < gy2 and sy + sh > gy1
+
+    def near_any(self, box):
+        """True if world box (x1, y1, x2, y2) reaches into the guard band of any output"""
+        x1, y1, x2, y2 = box
+        return any(self.near(cam, *self.project(cam, x1, y1, x2 - x1, y2 - y1))
+                   for cam in self.cameras)
+
+    def _near_window(self, win, camera, sx, sy, sw, sh):
+        if self.near(camera, sx, sy, sw, sh):
+            return True
+        return any(self.near(other, *self.project(other, win.world_x, win.world_y, win.world_w, win.world_h))
+                   for other in self.cameras if other is not camera)
+
+    def titlebar_buttons(self, win):
+        """Frame-relative (x, y, size) of the maximize and close buttons"""
+        size = win.title_h
+        width = win.frame_rect[2]
+        return {'maximize': (width - size * 2, 0, size), 'close': (width - size, 0, size)}
+
+    def titlebar_button_at(self, win, x, y):
+        """'close', 'maximize' or None for a click at frame-relative (x, y)"""
+        if not win.frame_rect or win.title_h <= 0:
+            return None
+        for action, (bx, by, size) in self.titlebar_buttons(win).items():
+            if bx <= x < bx + size and by <= y < by + size:
+                return action
+        return None
+
+    def paint_titlebar(self, win):
+        """
+        Title text and the close/maximize buttons, painted straight into the
+        frame (no button subwindows). Also used to repaint on Expose.
+        """
+        if not win.frame_rect or win.title_h <= 0:
+            return
+        win.titlebar_painted = (win.frame_rect[2], win.title_h, win.lod_tier, win.title)
+        if win.theme is None:
+            win.theme = self.create_theme(win.app_class)
+        size = win.title_h
+        text_area_w = win.frame_rect[2] - size * 2
+        try:
+            if text_area_w > 10:
+                win.frame.clear_area(x=0, y=0, width=text_area_w, height=size)
+                if win.lod_tier is not None and win.lod_tier >= SemanticZoom.TIER_TITLE:
+                    self.gc.change(foreground=self.get_pixel(0, 0, 0))
+                    win.frame.draw_text(self.gc, 5, int(size * 0.7), win.title.encode('utf-8'))
+
+            buttons = self.titlebar_buttons(win)
+            for action, color in (('maximize', win.theme['full']), ('close', win.theme['close'])):
+                bx, by, bsize = buttons[action]
+                self.gc.change(foreground=color)
+                win.frame.fill_rectangle(self.gc, bx, by, bsize, bsize)
+                self.gc.change(foreground=self.get_pixel(0, 0, 0))
+                win.frame.rectangle(self.gc, bx, by, bsize - 1, bsize - 1)
+        except:
+            pass
+
+    def render_world(self, camera, windows):
         """  
         SPLIT ARCHITECTURE:  
         - Layout calculations (project, configure) ALWAYS run  
@@ -278,94 +431,76 @@ class Renderer:
         - Window positioning (ConfigureWindow)  
         - Semantic zoom calculations  
         - Layout logic  
+
+        Returns the ids of windows that turned out to be gone (BadWindow);
+        they are left out of this render and the WM unmanages them.
         """  
         
         
         
-        if self.mode == self.MODE_CPU:  
-            
-            self.draw_wallpaper_cpu()  
-        
-          
-        
-        
-        
-        show_content = camera.zoom > 0.5  
-        dead_windows = []  
+        dead_windows = []
+        skip = ()
+        self.begin_render()
+        if self.scene:
+            skip = self.scene.cull(windows, self.near_any)
+        focused = self.focused()
           
         for frame_id, win in windows.items():  
             try:  
                 
-                if not win.mapped:  
-                    continue  
-                  
-                
-                if win.is_fullscreen:  
-                    scaled_title = 0  
+                if not win.mapped or frame_id in skip:
+                    continue
+
+                cam = self.camera_for(win, camera)
+
+                if win.is_fullscreen:
+                    scaled_title = 0
                 else:  
-                    scaled_title = int(25 * camera.zoom)  
+                    scaled_title = int(25 * cam.zoom)  
                     if scaled_title < 8:  
                         scaled_title = 8  
                   
                 sx, sy, sw, sh = self.project(  
-                    camera, win.world_x, win.world_y, win.world_w, win.world_h  
+                    cam, win.world_x, win.world_y, win.world_w, win.world_h  
                 )  
                   
                 
-                if sw < 5 or sh < 5:  
-                    continue  
+                if sw < 5 or sh < 5:
+                    continue
+
+                near = win.is_fullscreen or win is focused or self._near_window(win, cam, sx, sy, sw, sh)
+                if self.offscreen and self.offscreen.cull(win, near):
+                    continue
+                if near:
+                    win.parked = False
+                elif win.parked:
+                    # placed outside the guard band last render: leave it there
+                    continue
+                else:
+                    win.parked = True
+
+                tier = self.semantic_zoom.tier_for(win, cam.zoom)
+                show_content = tier >= SemanticZoom.TIER_CONTENT
                   
                 is_fixed_size = (win.min_w == win.max_w) and (win.min_w > 0)  
                 if is_fixed_size and not win.is_fullscreen:  
-                    sw = int(win.min_w * camera.zoom)  
-                    sh = int(win.min_h * camera.zoom) + scaled_title  
+                    sw = int(win.min_w * cam.zoom)  
+                    sh = int(win.min_h * cam.zoom) + scaled_title  
                   
                 
-                try:  
-                    win.frame.configure(x=sx, y=sy, width=sw, height=sh)  
-                    win.frame.map()  
-                except XError.BadWindow:  
-                    dead_windows.append(frame_id)  
-                    continue  
-                  
-                
-                if scaled_title > 0 and not win.is_fullscreen:  
-                    try:  
-                        win.btn_close.map()  
-                        win.btn_full.map()  
-                        win.btn_close.configure(  
-                            x=sw - scaled_title,  
-                            y=0,  
-                            width=scaled_title,  
-                            height=scaled_title  
-                        )  
-                        win.btn_full.configure(  
-                            x=sw - (scaled_title * 2),  
-                            y=0,  
-                            width=scaled_title,  
-                            height=scaled_title  
-                        )  
-                    except:  
-                        pass  
-                      
-                    
-                    text_area_w = sw - (scaled_title * 2)  
-                    if text_area_w > 10:  
-                        try:  
-                            win.frame.clear_area(x=0, y=0, width=text_area_w, height=scaled_title)  
-                            if show_content and camera.zoom > 0.7:  
-                                text_y = int(scaled_title * 0.7)  
-                                win.frame.draw_text(self.gc, 5, text_y, win.title.encode('utf-8'))  
-                        except:  
-                            pass  
-                else:  
-                    
-                    try:  
-                        win.btn_close.unmap()  
-                        win.btn_full.unmap()  
-                    except:  
-                        pass  
-                  
+                try:
+                    win.frame.configure(x=sx, y=sy, width=sw, height=sh)
+                    win.frame.map()
+                except XError.BadWindow:
+                    dead_windows.append(frame_id)
+                    continue
+                win.frame_rect = (sx, sy, sw, sh)
+                win.title_h = scaled_title
+                self.damage.frame(frame_id, win.frame_rect)
+
+                if scaled_title > 0 and win.titlebar_painted != (sw, scaled_title, win.lod_tier, win.title):
+                    self.paint_titlebar(win)
+
                 
                 try:  
                     grip_size = min(scaled_title, 15)  
@@ -387,18 +522,17 @@ class Renderer:
                     
                     try:  
                         
-                        if hasattr(win, 'hidden_by_zoom') and win.hidden_by_zoom:  
-                            win.client.map()  
-                            win.hidden_by_zoom = False  
-                          
-                        
-                        win.client.map()  
+                        newly_mapped = not win.client_mapped
+                        if newly_mapped:
+                            win.client.map()
+                            win.client_mapped = True
+                        win.hidden_by_zoom = False
                           
                         avail_w = sw  
                         avail_h = sh - scaled_title  
                           
-                        scaled_min_w = int(win.min_w * camera.zoom) if win.min_w > 0 else avail_w  
-                        scaled_min_h = int(win.min_h * camera.zoom) if win.min_h > 0 else avail_h  
+                        scaled_min_w = int(win.min_w * cam.zoom) if win.min_w > 0 else avail_w  
+                        scaled_min_h = int(win.min_h * cam.zoom) if win.min_h > 0 else avail_h  
                           
                         final_w = max(avail_w, scaled_min_w)  
                         final_h = max(avail_h, scaled_min_h)  
@@ -406,11 +540,14 @@ class Renderer:
                         off_x = max(0, (avail_w - final_w) // 2)  
                         off_y = max(0, scaled_title + (avail_h - final_h) // 2)  
                           
-                        win.client.configure(  
-                            x=off_x, y=off_y,  
-                            width=final_w, height=final_h,  
-                            border_width=0  
-                        )  
+                        geometry = (off_x, off_y, final_w, final_h)
+                        if geometry != win.client_geometry and (newly_mapped or not self.zoom_gesture):
+                            win.client.configure(
+                                x=off_x, y=off_y,
+                                width=final_w, height=final_h,
+                                border_width=0
+                            )
+                            win.client_geometry = geometry
                     except XError.BadWindow:  
                         dead_windows.append(frame_id)  
                         continue  
@@ -420,9 +557,11 @@ class Renderer:
                     
                     try:  
                         
-                        if not hasattr(win, 'hidden_by_zoom') or not win.hidden_by_zoom:  
-                            win.hidden_by_zoom = True  
-                            win.client.unmap()  
+                        if win.client_mapped:
+                            win.hidden_by_zoom = True
+                            win.client_mapped = False
+                            win.ignore_unmaps += 1
+                            win.client.unmap()
                           
                         win.frame.clear_area(  
                             x=0, y=0,  
@@ -434,17 +573,28 @@ class Renderer:
             except XError.BadWindow:  
                 dead_windows.append(frame_id)  
             except Exception as e:  
-                print(f"Render error on win {frame_id}: {e}")  
-                import traceback  
-                traceback.print_exc()  
+                log.exception("Render error on win %s: %s", frame_id, e)
           
         
-        for fid in dead_windows:  
-            if fid in windows:  
-                del windows[fid]  
-          
+        for fid in dead_windows:
+            if fid in windows:
+                del windows[fid]
+
+        self.damage.end_frame()
+        if self.mode == self.MODE_CPU:
+            self.draw_wallpaper_cpu()
+        else:
+            self.damage.reset()
+
+        for overlay in self.overlays:
+            try:
+                overlay.update(camera, windows)
+            except Exception as e:
+                log.warning("Overlay update error: %s", e)
+
         
         self.display.flush()  
+        return dead_windows
   
     def toggle_compositor(self):  
         """  
@@ -477,7 +627,33 @@ class Renderer:
                     pass  
             return True  
   
-    def get_mode_string(self):  
+    def apply_config(self, changed):
+        """Apply the parts of a reloaded config the renderer owns (changed = set of keys)"""
+        if "semantic_zoom" in changed:
+            self.semantic_zoom.configure(self.config)
+        if "zoom_resize_idle_ms" in changed:
+            self.zoom_idle = float(self.config.get("zoom_resize_idle_ms", 150)) / 1000.0
+
+        if "use_picom" in changed or "picom_config" in changed:
+            if "picom_config" in changed and self.picom_process and self.picom_process.poll() is None:
+                try:
+                    self.picom_process.terminate()
+                    self.picom_process.wait(timeout=2)
+                    print("✓ Stopped picom to apply new config")
+                except Exception as e:
+                    print(f"⚠ Failed to stop picom: {e}")
+                self.mode = self.MODE_CPU
+            want_picom = self.config.get("use_picom", True)
+            if want_picom != (self.mode == self.MODE_COMPOSITOR):
+                self.toggle_compositor()
+
+        if "wallpaper_path" in changed:
+            self._setup_wallpaper()
+
+        if "guard_band" in changed or "offscreen_hiding" in changed:
+            self.configure_guard()
+
+    def get_mode_string(self):
         """Return human-readable mode string"""  
         if self.mode == self.MODE_COMPOSITOR:  
             return f"COMPOSITOR ({self.compositor_name})"  
@@ -0,0 +1,286 @@
+"""
+Deterministic offline replay of traces recorded with main.py --record.
+
+    Xvfb :9 -screen 0 1920x1080x24 &
+    DISPLAY=:9 python3 replay.py session.trace
+
+Runs a real WindowManager against the server named by DISPLAY (use a
+headless one), stands in for the recorded clients with plain windows on a
+second connection, and feeds the recorded events through handle_event in
+order. Events the server generates in response are discarded, so every run
+sees exactly the recorded stream, and the render scheduler is flushed at
+the recorded batch boundaries. Timers run on a virtual clock driven by
+the trace timestamps: a replay takes as long as the work, not the session.
+
+With --fake the WM runs on the in-process fake server instead (no Xvfb).
+
+Reports render count/time, X requests issued and handler time per event type.
+"""
+
+import argparse
+import contextlib
+import io
+import os
+import sys
+import time
+from Xlib import X
+from Xlib.protocol import event as xevent
+import eventtrace
+from eventtrace import (KIND_ROOT, KIND_CLIENT, KIND_FRAME, KIND_BTN_CLOSE,
+                        KIND_BTN_FULL, KIND_OTHER, KIND_CMD_BAR, KIND_MINIMAP)
+from backend import XlibBackend, FakeBackend
+from wm import WindowManager
+
+
+class ReplayEvent:
+    """Stands in for an Xlib event: just the attributes the handlers read"""
+
+    def __init__(self, **fields):
+        self.send_event = False
+        self.__dict__.update(fields)
+
+
+class Stats:
+    def __init__(self):
+        self.count = 0
+        self.requests = 0
+        self.seconds = 0.0
+
+
+class Replayer:
+    def __init__(self, path, verbose=False, backend=None):
+        self.atom_names, self.records = eventtrace.read_trace(path)
+        self.verbose = verbose
+        self.now = 0.0
+
+        backend = backend or XlibBackend()
+        with self._output():
+            self.wm = WindowManager(backend=backend)
+        self.cd = backend.open_display()
+        self.standins = {}
+        self.atoms = {}
+
+        self.wm.timers.clock = lambda: self.now
+        self.wm.timers.cancel('config_poll')
+        self.wm.launcher.launch = lambda cmd: None
+        self.wm.restart = lambda: None
+
+        self.renders = 0
+        self.render_seconds = 0.0
+        self.render_max = 0.0
+        self.per_type = {}
+        self.timer_stats = Stats()
+        self.flush_stats = Stats()
+        self.skipped = 0
+        self.errors = 0
+        self._wrap_render()
+
+    def _output(self):
+        return contextlib.nullcontext() if self.verbose else contextlib.redirect_stdout(io.StringIO())
+
+    def _wrap_render(self):
+        render_world = self.wm.renderer.render_world
+
+        def counted(*args, **kwargs):
+            start = time.perf_counter()
+            try:
+                return render_world(*args, **kwargs)
+            finally:
+                elapsed = time.perf_counter() - start
+                self.renders += 1
+                self.render_seconds += elapsed
+                self.render_max = max(self.render_max, elapsed)
+
+        self.wm.renderer.render_world = counted
+
+    def atom(self, recorded):
+        """Recorded atom id -> atom on the replay server"""
+        if recorded not in self.atoms:
+            name = self.atom_names.get(recorded)
+            self.atoms[recorded] = self.wm.d.intern_atom(name) if name else recorded
+        return self.atoms[recorded]
+
+    def create_standin(self, client_id, x, y, width, height):
+        screen = self.cd.screen()
+        w = screen.root.create_window(x, y, max(1, width), max(1, height), 0, screen.root_depth,
+                                      background_pixel=screen.white_pixel)
+        w.set_wm_name(f"replay {client_id:#x}")
+        self.cd.sync()
+        window = self.wm.d.create_resource_object('window', w.id)
+        self.standins[client_id] = (w, window)
+        return window
+
+    def resolve(self, kind, ref):
+        wm = self.wm
+        if kind == KIND_ROOT:
+            return wm.root
+        if kind == KIND_CMD_BAR:
+            return wm.cmd_window
+        if kind == KIND_MINIMAP:
+            return wm.minimap.window
+        entry = self.standins.get(ref)
+        if entry is None:
+            return None
+        window = entry[1]
+        if kind in (KIND_CLIENT, KIND_OTHER):
+            return window
+        zwin = wm.windows.get(window.id)
+        if zwin is None:
+            return None
+        if kind in (KIND_FRAME, KIND_BTN_CLOSE, KIND_BTN_FULL):
+            return zwin.frame
+        return None
+
+    def button_offset(self, kind, ref):
+        """Older traces record titlebar buttons as their own windows: frame-relative offset of the button"""
+        zwin = self.wm.windows.get(self.standins[ref][1].id)
+        if not zwin.frame_rect:
+            return 0
+        bx, by, size = self.wm.renderer.titlebar_buttons(zwin)['close' if kind == KIND_BTN_CLOSE else 'maximize']
+        return bx
+
+    def build(self, rec):
+        """TraceRecord -> ReplayEvent, or None if it can't be replayed here"""
+        if rec.type >= X.LASTEvent:
+            return None
+        e = rec.extra
+
+        if rec.type == X.MapRequest:
+            if rec.ref not in self.standins:
+                x, y, w, h = e if len(e) == 4 else (0, 0, 400, 300)
+                self.create_standin(rec.ref, x, y, w, h)
+            standin = self.standins[rec.ref][0]
+            standin.map()
+            self.cd.sync()
+
+        window = self.resolve(rec.kind, rec.ref)
+        if window is None:
+            return None
+
+        fields = dict(type=rec.type, window=window, detail=rec.detail, state=rec.state,
+                      root_x=rec.root_x, root_y=rec.root_y, event_x=rec.event_x, event_y=rec.event_y,
+                      time=rec.time, root=self.wm.root, child=X.NONE, same_screen=1)
+        if rec.kind in (KIND_BTN_CLOSE, KIND_BTN_FULL):
+            fields['event_x'] += self.button_offset(rec.kind, rec.ref)
+
+        if rec.type in eventtrace.KEY_EVENTS:
+            fields['detail'] = self.wm.d.keysym_to_keycode(e[0]) if e else 0
+        elif rec.type == X.ConfigureRequest and len(e) == 7:
+            fields.update(value_mask=e[0], x=e[1], y=e[2], width=e[3], height=e[4],
+                          border_width=e[5], stack_mode=e[6])
+        elif rec.type == X.ConfigureNotify and len(e) == 4:
+            fields.update(x=e[0], y=e[1], width=e[2], height=e[3])
+        elif rec.type == X.Expose and len(e) == 5:
+            fields.update(x=e[0], y=e[1], width=e[2], height=e[3], count=e[4])
+        elif rec.type == X.PropertyNotify and e:
+            fields['atom'] = self.atom(e[0])
+        elif rec.type == X.ClientMessage and e:
+            client_type = self.atom(e[0])
+            data = list(e[1:]) + [0] * (6 - len(e))
+            if self.atom_names.get(e[0]) == '_NET_WM_STATE':
+                data[1] = self.atom(data[1]) if data[1] else 0
+                data[2] = self.atom(data[2]) if data[2] else 0
+            fields.update(client_type=client_type, data=(32, data))
+        elif rec.type in (X.UnmapNotify, X.DestroyNotify) and rec.kind == KIND_CLIENT:
+            standin = self.standins[rec.ref][0]
+            try:
+                standin.unmap() if rec.type == X.UnmapNotify else standin.destroy()
+                self.cd.sync()
+            except Exception:
+                pass
+            fields['event'] = self.wm.root
+
+        return ReplayEvent(**fields)
+
+    def _drain(self):
+        """Drop events the server generated in response to what we replayed"""
+        d = self.wm.d
+        while d.pending_events():
+            d.next_event()
+        while self.cd.pending_events():
+            self.cd.next_event()
+
+    def _serial(self):
+        return self.wm.d.display.request_serial
+
+    def step(self, stats, fn):
+        serial = self._serial()
+        start = time.perf_counter()
+        try:
+            fn()
+        except Exception:
+            self.errors += 1
+        stats.seconds += time.perf_counter() - start
+        stats.requests += (self._serial() - serial) % 65536
+        stats.count += 1
+
+    def run(self):
+        start = time.perf_counter()
+        with self._output():
+            for rec in self.records:
+                self.now = rec.t
+                timeout = self.wm.timers.timeout()
+                if timeout is not None and timeout <= 0:
+                    self.step(self.timer_stats, self.wm.timers.run_due)
+                    self.step(self.flush_stats, self.wm.scheduler.flush)
+
+                ev = self.build(rec)
+                if ev is None:
+                    self.skipped += 1
+                else:
+                    name = xevent.event_class[rec.type].__name__ if rec.type in xevent.event_class else str(rec.type)
+                    stats = self.per_type.setdefault(name, Stats())
+                    self.step(stats, lambda: self.wm.handle_event(ev))
+                if rec.batch_end:
+                    self.step(self.flush_stats, self.wm.scheduler.flush)
+                self._drain()
+
+            self.now += 3600
+            self.step(self.timer_stats, self.wm.timers.run_due)
+            self.step(self.flush_stats, self.wm.scheduler.flush)
+            self.wm.d.sync()
+        self.wall = time.perf_counter() - start
+
+    def report(self):
+        replayed = sum(s.count for s in self.per_type.values())
+        duration = self.records[-1].t if self.records else 0.0
+        total_requests = (sum(s.requests for s in self.per_type.values()) +
+                          self.timer_stats.requests + self.flush_stats.requests)
+        print(f"Replayed {replayed} events ({self.skipped} skipped, {self.errors} errors) "
+              f"in {self.wall:.3f}s, trace covers {duration:.1f}s")
+        mean = self.render_seconds / self.renders * 1000 if self.renders else 0.0
+        print(f"  renders:    {self.renders}  ({self.render_seconds * 1000:.1f} ms total, "
+              f"{mean:.2f} ms mean, {self.render_max * 1000:.2f} ms max)")
+        print(f"  X requests: {total_requests}")
+        print(f"  {'event':<18}{'count':>8}{'requests':>10}{'req/evt':>9}{'ms':>10}")
+        rows = sorted(self.per_type.items(), key=lambda kv: -kv[1].seconds)
+        if self.timer_stats.count:
+            rows.append(("(timers)", self.timer_stats))
+        if self.flush_stats.count:
+            rows.append(("(render flush)", self.flush_stats))
+        for name, s in rows:
+            print(f"  {name:<18}{s.count:>8}{s.requests:>10}{s.requests / s.count:>9.1f}{s.seconds * 1000:>10.1f}")
+
+
+def main():
+    parser = argparse.ArgumentParser(description="Replay a DragonDesktop event trace against a headless X server")
+    parser.add_argument("trace", help="trace file written by main.py --record")
+    parser.add_argument("-v", "--verbose", action="store_true", help="show the WM's own output")
+    parser.add_argument("--fake", action="store_true", help="replay on the in-process fake X server")
+    args = parser.parse_args()
+
+    if args.fake:
+        backend = FakeBackend()
+    elif not os.environ.get("DISPLAY"):
+        print("⚠ DISPLAY is not set; start Xvfb (or Xephyr) and point DISPLAY at it, or use --fake")
+        sys.exit(1)
+    else:
+        backend = XlibBackend()
+
+    replayer = Replayer(args.trace, verbose=args.verbose, backend=backend)
+    replayer.run()
+    replayer.report()
+
+
+if __name__ == "__main__":
+    main()
@@ -0,0 +1,241 @@
+"""
+In-place restart: snapshot the live session, re-exec, adopt it back.
+
+Before exec the connection's close-down mode is set to RetainPermanent,
+so frames survive the disconnect and nothing on screen is unmapped
+(titlebar buttons are painted into the frame, so there is nothing else to
+keep). The new process reads the snapshot and re-adopts those frames and
+their clients instead of creating new ones. It is started with our own
+command-line options, so a --record trace carries on in the same file.
+"""
+
+import json
+import os
+import sys
+import tempfile
+from Xlib import X
+from models import ZWindow
+
+
+def snapshot_path():
+    base = os.environ.get("XDG_RUNTIME_DIR") or tempfile.gettempdir()
+    return os.path.join(base, f"dragondesktop-restart-{os.getuid()}.json")
+
+
+def snapshot(wm):
+    """Serialise camera, windows, focus and MRU order into plain data"""
+    windows = []
+    for zwin in wm.windows.values():
+        windows.append({
+            'client': zwin.client.id,
+            'frame': zwin.frame.id,
+            'title': zwin.title,
+            'app_class': zwin.app_class,
+            'geometry': [zwin.world_x, zwin.world_y, zwin.world_w, zwin.world_h],
+            'size_hints': [zwin.min_w, zwin.min_h, zwin.max_w, zwin.max_h],
+            'is_fullscreen': zwin.is_fullscreen,
+            'saved_geometry': zwin.saved_geometry,
+            'mapped': zwin.mapped,
+            'is_dialog': zwin.is_dialog,
+            'transient_for': zwin.transient_for.id if zwin.transient_for else None,
+            'scene_parent': wm.scene.parent_of(zwin.id),
+            'canvas': zwin.canvas,
+            'hidden_by_zoom': zwin.hidden_by_zoom,
+            'hidden_offscreen': zwin.hidden_offscreen,
+            'client_mapped': zwin.client_mapped,
+            'lod_tier': zwin.lod_tier,
+        })
+
+    cameras = {}
+    for output in wm.outputs.outputs:
+        cam = output.camera
+        cameras[output.name] = {
+            'x': cam.x, 'y': cam.y, 'zoom': cam.zoom,
+            'saved_spots': {str(k): list(v) for k, v in cam.saved_spots.items()},
+        }
+
+    canvas_views = []
+    for canvas in wm.canvases.canvases:
+        canvas_views.append({
+            name: {'x': x, 'y': y, 'zoom': zoom, 'saved_spots': {str(k): list(v) for k, v in spots.items()}}
+            for name, (x, y, zoom, spots) in canvas.views.items()
+        })
+
+    return {
+        'version': 2,
+        'windows': windows,
+        'cameras': cameras,
+        'active_output': wm.outputs.output_for_camera(wm.camera).name,
+        'focused': wm.focused_window.id if wm.focused_window else None,
+        'window_stack': [w.id for w in wm.window_stack],
+        'polybar_windows': [w.id for w in wm.polybar_windows],
+        'active_canvas': wm.canvases.active,
+        'canvas_views': canvas_views,
+    }
+
+
+def save(state, path):
+    tmp = path + ".tmp"
+    with open(tmp, "w") as f:
+        json.dump(state, f)
+    os.replace(tmp, path)
+
+
+def release_transient_resources(wm):
+    """Free what the new process recreates anyway, so RetainPermanent only keeps frames"""
+    for zwin in wm.windows.values():
+        if zwin.sync_alarm is not None:
+            try:
+                wm.xsync.destroy_alarm(zwin.sync_alarm)
+            except Exception:
+                pass
+    wm.frame_pool.clear()
+    for window in [wm.cmd_window, wm.minimap.window] + list(wm.snapper.guide_windows.values()):
+        try:
+            window.destroy()
+        except Exception:
+            pass
+    try:
+        wm.minimap.pixmap.free()
+        for gc in wm.minimap.draw_gcs + [wm.minimap.copy_gc, wm.renderer.gc]:
+            gc.free()
+        if wm.renderer.font:
+            wm.renderer.font.close()
+    except Exception:
+        pass
+
+
+def restart(wm):
+    """Snapshot the session and exec a fresh WM process that adopts it"""
+    path = snapshot_path()
+    try:
+        save(snapshot(wm), path)
+    except Exception as e:
+        print(f"⚠ Restart aborted, snapshot failed: {e}")
+        return
+
+    if wm.recorder:
+        wm.recorder.close()
+    print(f"↻ Restarting DragonDesktop ({len(wm.windows)} windows saved to {path})")
+    release_transient_resources(wm)
+    wm.d.set_close_down_mode(X.RetainPermanent)
+    wm.d.sync()
+
+    main = os.path.abspath(sys.argv[0])
+    os.execv(sys.executable, [sys.executable, main] + exec_args(sys.argv[1:], path, wm.backend.name))
+
+
+def exec_args(argv, path, backend):
+    """The options we were started with (--record and all), restoring from path on backend"""
+    args = []
+    skip = False
+    for arg in argv:
+        if skip:
+            skip = False
+        elif arg in ("--restore", "--backend"):
+            skip = True
+        elif not arg.startswith(("--restore=", "--backend=")):
+            args.append(arg)
+    return args + ["--restore", path, "--backend", backend]
+
+
+def restore(wm, path):
+    """Adopt frames/clients and camera state saved by restart()"""
+    try:
+        with open(path, "r") as f:
+            state = json.load(f)
+    except Exception as e:
+        print(f"⚠ Could not read restart snapshot {path}: {e}")
+        return
+    finally:
+        try:
+            os.remove(path)
+        except OSError:
+            pass
+
+    for output in wm.outputs.outputs:
+        saved = state.get('cameras', {}).get(output.name)
+        if not saved:
+            continue
+        cam = output.camera
+        cam.x, cam.y, cam.zoom = saved['x'], saved['y'], saved['zoom']
+        cam.saved_spots = {int(k): tuple(v) for k, v in saved.get('saved_spots', {}).items()}
+        if output.name == state.get('active_output'):
+            wm.camera = cam
+
+    canvases = wm.canvases
+    for canvas, views in zip(canvases.canvases, state.get('canvas_views', [])):
+        canvas.views = {
+            name: (v['x'], v['y'], v['zoom'], {int(k): tuple(s) for k, s in v['saved_spots'].items()})
+            for name, v in views.items()
+        }
+    canvases.active = min(state.get('active_canvas', 0), len(canvases.canvases) - 1)
+    canvases.publish()
+
+    resource = wm.d.create_resource_object
+    adopted = {}
+    for w in state.get('windows', []):
+        client = resource('window', w['client'])
+        frame = resource('window', w['frame'])
+        for key in ('btn_close', 'btn_full'):
+            if key in w:
+                try:
+                    resource('window', w[key]).destroy()
+                except Exception:
+                    pass
+        try:
+            tree = client.query_tree()
+            if tree.parent.id != frame.id:
+                raise ValueError("client no longer in its frame")
+        except Exception as e:
+            print(f"⚠ Dropping window {w['client']} from snapshot: {e}")
+            try:
+                frame.destroy()
+            except Exception:
+                pass
+            continue
+
+        x, y, width, height = w['geometry']
+        zwin = ZWindow(client.id, client, frame, x, y, width, height, title=w['title'])
+        zwin.min_w, zwin.min_h, zwin.max_w, zwin.max_h = w['size_hints']
+        zwin.is_fullscreen = w['is_fullscreen']
+        zwin.saved_geometry = tuple(w['saved_geometry']) if w['saved_geometry'] else None
+        zwin.mapped = w['mapped']
+        zwin.is_dialog = w['is_dialog']
+        zwin.app_class = w['app_class']
+        zwin.hidden_by_zoom = w['hidden_by_zoom']
+        zwin.hidden_offscreen = w['hidden_offscreen']
+        zwin.client_mapped = w['client_mapped']
+        zwin.lod_tier = w['lod_tier']
+        zwin.theme = wm.renderer.create_theme(zwin.app_class)
+
+        frame.change_attributes(event_mask=wm.FRAME_EVENT_MASK)
+        wm.select_client_input(client, zwin.title)
+
+        wm.windows[client.id] = zwin
+        wm.frame_to_client[frame.id] = client.id
+        canvases.add(zwin, w.get('canvas', 0))
+        adopted[client.id] = (zwin, w['transient_for'], w.get('scene_parent'))
+
+    zwins = [zwin for zwin, _, _ in adopted.values()]
+    for zwin, info in zip(zwins, wm.backend.fetch_window_info(wm.d, [z.client for z in zwins])):
+        wm.setup_sync(zwin, info)
+
+    for zwin, parent_id, scene_parent in adopted.values():
+        if parent_id is not None:
+            zwin.transient_for = resource('window', parent_id)
+        if scene_parent in wm.windows:
+            wm.scene.attach(zwin, wm.windows[scene_parent])
+
+    wm.window_stack = [wm.windows[i] for i in state.get('window_stack', []) if i in wm.windows]
+    for dock_id in state.get('polybar_windows', []):
+        dock = resource('window', dock_id)
+        wm.window_kinds[dock_id] = 'dock'
+        wm.add_dock(dock, wm.read_strut(dock))
+
+    print(f"✓ Restored {len(adopted)} windows from restart snapshot")
+    focused = wm.windows.get(state.get('focused'))
+    if focused:
+        wm.focus_window(focused)
+    wm._update_client_list()
+    wm.scheduler.invalidate()
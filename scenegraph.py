@@ -0,0 +1,178 @@
+class SceneGraph:
+    """
+    Parent/child hierarchy over managed windows: transients and user groups.
+
+    A child keeps an offset from its parent. Whoever changes a window's
+    geometry reports it through moved(); update() runs once per render and
+    only looks at what was reported: a moved child gets a new offset, a
+    moved parent carries the children that did not move themselves along
+    by theirs. So moving a parent, however it happens, moves the whole
+    subtree in the same render.
+
+    Every group node (a window with children) keeps the bounding rect of
+    its subtree, refreshed bottom-up from the moved windows only. cull()
+    tests those rects against the view so render_world can drop a whole
+    group with one intersection instead of projecting each member.
+
+    Windows stay in wm.windows with absolute world coordinates; everything
+    outside this module keeps working on those.
+    """
+
+    def __init__(self):
+        self.parent = {}
+        self.children = {}
+        self.offset = {}
+        self.bounds = {}
+        self.moved_ids = set()
+        self.stale = set()
+        self.culled = set()
+
+    def attach(self, child, parent):
+        """Make window child follow window parent; False if that would form a cycle"""
+        node = parent.id
+        while node is not None:
+            if node == child.id:
+                return False
+            node = self.parent.get(node)
+        self.detach(child)
+        self.parent[child.id] = parent.id
+        self.children.setdefault(parent.id, []).append(child.id)
+        self.offset[child.id] = (child.world_x - parent.world_x, child.world_y - parent.world_y)
+        self.stale.add(parent.id)
+        return True
+
+    def detach(self, win):
+        """Cut win (and its own subtree) loose from its parent"""
+        parent_id = self.parent.pop(win.id, None)
+        self.offset.pop(win.id, None)
+        if parent_id is not None:
+            self._unlink(win.id, parent_id)
+
+    def _unlink(self, win_id, parent_id):
+        siblings = self.children.get(parent_id, [])
+        if win_id in siblings:
+            siblings.remove(win_id)
+        if not siblings:
+            self.children.pop(parent_id, None)
+            self.bounds.pop(parent_id, None)
+        self.stale.add(parent_id)
+
+    def forget(self, win_id):
+        """Window is gone: its children become roots where they are"""
+        for child_id in self.children.pop(win_id, []):
+            self.parent.pop(child_id, None)
+            self.offset.pop(child_id, None)
+        parent_id = self.parent.pop(win_id, None)
+        if parent_id is not None:
+            self._unlink(win_id, parent_id)
+        self.offset.pop(win_id, None)
+        self.bounds.pop(win_id, None)
+        self.moved_ids.discard(win_id)
+        self.stale.discard(win_id)
+        self.culled.discard(win_id)
+
+    def moved(self, win):
+        """win's position or size was changed (drag, resize, client request, fullscreen)"""
+        if win.id in self.parent or win.id in self.children:
+            self.moved_ids.add(win.id)
+
+    def parent_of(self, win_id):
+        return self.parent.get(win_id)
+
+    def subtree(self, win_id):
+        """win_id and all its descendants, parents before children"""
+        out = [win_id]
+        for node in out:
+            out.extend(self.children.get(node, ()))
+        return out
+
+    def depth(self, win_id):
+        d = 0
+        node = self.parent.get(win_id)
+        while node is not None:
+            d += 1
+            node = self.parent.get(node)
+        return d
+
+    def update(self, windows):
+        """
+        Propagate reported moves to children and refresh the affected group
+        bounds; returns the ids of the windows carried along
+        """
+        carried = []
+        if not self.moved_ids and not self.stale:
+            return carried
+        moved, self.moved_ids = self.moved_ids, set()
+        groups, self.stale = self.stale, set()
+
+        for win_id in sorted(moved, key=self.depth):
+            win = windows.get(win_id)
+            if win is None:
+                continue
+            parent_id = self.parent.get(win_id)
+            if parent_id is not None and parent_id in windows:
+                parent = windows[parent_id]
+                self.offset[win_id] = (win.world_x - parent.world_x, win.world_y - parent.world_y)
+            for node in self.subtree(win_id):
+                if node != win_id and node not in moved and node in windows:
+                    parent = windows[self.parent[node]]
+                    dx, dy = self.offset[node]
+                    windows[node].world_x = parent.world_x + dx
+                    windows[node].world_y = parent.world_y + dy
+                    carried.append(node)
+                if node in self.children:
+                    groups.add(node)
+            groups.add(win_id)
+
+        for node in list(groups):
+            node = self.parent.get(node)
+            while node is not None and node not in groups:
+                groups.add(node)
+                node = self.parent.get(node)
+
+        for node in sorted(groups, key=self.depth, reverse=True):
+            if node in self.children and node in windows:
+                self._refresh(node, windows)
+        self.culled.difference_update(groups)
+        return carried
+
+    def _refresh(self, node, windows):
+        win = windows[node]
+        x1, y1 = win.world_x, win.world_y
+        x2, y2 = x1 + win.world_w, y1 + win.world_h
+        for child_id in self.children[node]:
+            box = self.bounds.get(child_id)
+            if box is None:
+                child = windows.get(child_id)
+                if child is None:
+                    continue
+                box = (child.world_x, child.world_y,
+                       child.world_x + child.world_w, child.world_y + child.world_h)
+            x1, y1 = min(x1, box[0]), min(y1, box[1])
+            x2, y2 = max(x2, box[2]), max(y2, box[3])
+        self.bounds[node] = (x1, y1, x2, y2)
+
+    def cull(self, windows, visible):
+        """
+        Ids of the windows in group subtrees whose bounds visible((x1, y1,
+        x2, y2)) rejects, for render_world to skip. Tested top-down, so a
+        rejected group's members are never looked at. A group is only
+        skipped from the second render it spends out of view: the first
+        one still places its frames off-screen.
+        """
+        skip = set()
+        out = set()
+        stack = [node for node in self.bounds if node not in self.parent and node in windows]
+        while stack:
+            node = stack.pop()
+            box = self.bounds.get(node)
+            if box is None:
+                continue
+            if not visible(box):
+                out.add(node)
+                if node in self.culled:
+                    skip.update(self.subtree(node))
+                continue
+            stack.extend(self.children[node])
+        self.culled = out
+        return skip
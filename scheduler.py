@@ -0,0 +1,63 @@
+class RenderScheduler:
+    """
+    Coalesces render/restack requests into one pass per event batch.
+
+    Handlers call invalidate() (world changed), restack() (only stacking
+    changed) or configure_notify(zwin) (client needs a synthetic
+    ConfigureNotify once its new geometry is on screen). The event loop
+    calls flush() after draining all pending events, so a burst of motion
+    events or several property changes cost one render_world and one
+    ensure_polybar_stacking.
+    """
+
+    def __init__(self, wm):
+        self.wm = wm
+        self.render_pending = False
+        self.restack_pending = False
+        self.notify_pending = {}
+        self.invalidations = 0
+        self.renders = 0
+
+    def invalidate(self, restack=True):
+        self.invalidations += 1
+        self.render_pending = True
+        if restack:
+            self.restack_pending = True
+
+    def restack(self):
+        self.restack_pending = True
+
+    def configure_notify(self, zwin):
+        self.notify_pending[zwin.id] = zwin
+
+    @property
+    def pending(self):
+        return self.render_pending or self.restack_pending or bool(self.notify_pending)
+
+    def flush(self):
+        if not self.pending:
+            return
+        wm = self.wm
+        if self.render_pending:
+            self.render_pending = False
+            self.renders += 1
+            wm.navigator.apply()
+            for win_id in wm.scene.update(wm.windows):
+                wm.canvases.reindex(wm.windows[win_id])
+            for win_id in wm.renderer.render_world(wm.camera, wm.canvases.windows):
+                if win_id in wm.windows:
+                    wm.unmanage(wm.windows[win_id])
+        if self.restack_pending:
+            self.restack_pending = False
+            wm.ensure_polybar_stacking()
+        if self.notify_pending:
+            pending, self.notify_pending = self.notify_pending, {}
+            for zwin in pending.values():
+                if zwin.id in wm.windows:
+                    wm.send_configure_notify(zwin)
+        wm.d.flush()
+
+    def render_now(self):
+        """For callers that need the result of the render immediately"""
+        self.invalidate()
+        self.flush()
@@ -6,36 +6,51 @@ A simple GUI for changing wallpaper and other settings.
   
 import tkinter as tk  
 from tkinter import filedialog, messagebox  
-import json  
-import os  
+import json
+import os
+import config
   
 class SettingsMenu:  
     def __init__(self):  
         self.root = tk.Tk()  
         self.root.title("Desktop Settings")  
         self.root.geometry("400x300")  
-        self.config_path = "config.json"  
+        self.config_path = config.config_path()
         self.config = self.load_config()  
           
         self.setup_ui()  
       
-    def load_config(self):  
-        try:  
-            if os.path.exists(self.config_path):  
+    def load_config(self):
+        try:
+            if self.config_path and os.path.exists(self.config_path):
                 with open(self.config_path, "r") as f:  
                     return json.load(f)  
         except Exception as e:  
             print(f"Config load error: {e}")  
         return {"wallpaper_path": "", "aliases": {}}  
       
-    def save_config(self):  
-        try:  
-            with open(self.config_path, "w") as f:  
-                json.dump(self.config, f, indent=4)  
-            return True  
-        except Exception as e:  
-            print(f"Config save error: {e}")  
-            return False  
+    def save_config(self):
+        """
+        Save back to the file the config was loaded from, the one the WM
+        watches; with none loaded, to the first place the WM looks.
+        Returns False (reason in save_error) if that file cannot be written.
+        """
+        path = self.config_path or config.candidate_paths()[0]
+        self.save_error = None
+        if os.path.exists(path) and not os.access(path, os.W_OK):
+            self.save_error = f"{path} is not writable"
+        else:
+            try:
+                os.makedirs(os.path.dirname(path), exist_ok=True)
+                with open(path, "w") as f:
+                    json.dump(self.config, f, indent=4)  
+            except Exception as e:  
+                self.save_error = f"{path}: {e}"
+        if self.save_error:
+            print(f"⚠ Config save error: {self.save_error}")
+            return False
+        self.config_path = path
+        return True
       
     def setup_ui(self):  
         
@@ -66,9 +81,9 @@ class SettingsMenu:
         info_frame = tk.Frame(self.root)  
         info_frame.pack(pady=10)  
           
-        info_text = "⚠️ Restart Desktop to apply changes"  
-        info_label = tk.Label(info_frame, text=info_text,   
-                             fg="orange", font=("Arial", 10))  
+        info_text = "Changes are applied automatically"
+        info_label = tk.Label(info_frame, text=info_text,
+                             fg="gray", font=("Arial", 10))
         info_label.pack()  
       
     def choose_wallpaper(self):  
@@ -84,19 +99,17 @@ class SettingsMenu:
             self.config["wallpaper_path"] = filename  
             if self.save_config():  
                 self.wp_label.config(text=f"Current: {os.path.basename(filename)}")  
-                messagebox.showinfo("Success",   
-                                   "Wallpaper set!\nRestart DragonDesktop to see changes.")  
+                messagebox.showinfo("Success", "Wallpaper set!")
             else:  
-                messagebox.showerror("Error", "Failed to save configuration.")  
+                messagebox.showerror("Error", f"Failed to save configuration:\n{self.save_error}")  
       
     def clear_wallpaper(self):  
         self.config["wallpaper_path"] = ""  
         if self.save_config():  
             self.wp_label.config(text="Current: None")  
-            messagebox.showinfo("Success",   
-                               "Wallpaper cleared!\nRestart DragonDesktop to see changes.")  
+            messagebox.showinfo("Success", "Wallpaper cleared!")
         else:  
-            messagebox.showerror("Error", "Failed to save configuration.")  
+            messagebox.showerror("Error", f"Failed to save configuration:\n{self.save_error}")  
       
     def run(self):  
         self.root.mainloop()  
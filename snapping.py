@@ -0,0 +1,168 @@
+from bisect import bisect_left
+from Xlib import X
+
+
+class EdgeIndex:
+    """
+    Sorted world coordinates of window edges and centres along one axis.
+
+    Built once when a drag starts; nearest() is two bisections per probe,
+    so lookups stay logarithmic in the number of windows however many
+    motion events the drag produces.
+    """
+
+    def __init__(self, spans):
+        """spans: (start, end, key) per window along this axis"""
+        edges = sorted([(s, k) for s, e, k in spans] + [(e, k) for s, e, k in spans])
+        centres = sorted(((s + e) / 2, k) for s, e, k in spans)
+        self.edges = [v for v, _ in edges]
+        self.edge_keys = [k for _, k in edges]
+        self.centres = [v for v, _ in centres]
+        self.centre_keys = [k for _, k in centres]
+
+    @staticmethod
+    def _closest(values, keys, probe):
+        i = bisect_left(values, probe)
+        best = None
+        for j in (i - 1, i):
+            if 0 <= j < len(values):
+                d = abs(values[j] - probe)
+                if best is None or d < best[0]:
+                    best = (d, values[j], keys[j])
+        return best
+
+    def nearest(self, start, length, tolerance):
+        """
+        Best snap for a span [start, start + length): (new start, line, key)
+        matching its edges to edges and its centre to centres, or None
+        """
+        best = None
+        probes = ((self.edges, self.edge_keys, start, 0),
+                  (self.edges, self.edge_keys, start + length, length),
+                  (self.centres, self.centre_keys, start + length / 2, length / 2))
+        for values, keys, probe, offset in probes:
+            hit = self._closest(values, keys, probe)
+            if hit and hit[0] <= tolerance and (best is None or hit[0] < best[0]):
+                best = (hit[0], int(round(hit[1] - offset)), hit[1], hit[2])
+        return best[1:] if best else None
+
+
+class Snapper:
+    """
+    Snaps a dragged window to the edges and centres of the windows around it.
+
+    begin() indexes the other windows on screen (not the dragged one or the
+    windows grouped under it) into one EdgeIndex per axis; snap() then
+    adjusts every proposed position in O(log n). Holding Shift drags
+    freely. While a snap is active a thin line per axis is shown over the
+    aligned edges; it is an overlay updated by render_world like the
+    minimap.
+
+    Config:
+        "snapping": {"enabled": true, "threshold": 12, "guides": true}
+    threshold is in screen pixels.
+    """
+
+    def __init__(self, wm, config):
+        self.wm = wm
+        self.x_index = None
+        self.y_index = None
+        self.dragged = None
+        self.camera = None
+        self.lines = {}
+        self.guide_windows = {}
+        color = wm.renderer.get_pixel(52000, 58000, 65535)
+        for axis in ("x", "y"):
+            self.guide_windows[axis] = wm.root.create_window(
+                0, 0, 1, 1,
+                border_width=0,
+                depth=X.CopyFromParent, visual=X.CopyFromParent,
+                background_pixel=color,
+                override_redirect=True
+            )
+        self.mapped = set()
+        self.configure(config)
+
+    def configure(self, config):
+        opts = config.get("snapping", {})
+        self.enabled = bool(opts.get("enabled", True))
+        self.threshold = float(opts.get("threshold", 12))
+        self.guides = bool(opts.get("guides", True))
+
+    def begin(self, win):
+        """Drag of win starts: index the edges of every other window in view of its output"""
+        wm = self.wm
+        self.dragged = win
+        self.camera = cam = wm.renderer.camera_for(win, wm.camera)
+        self.lines = {}
+        if not self.enabled:
+            return
+        skip = set(wm.scene.subtree(win.id))
+        half_w = cam.screen_w / 2 / cam.zoom
+        half_h = cam.screen_h / 2 / cam.zoom
+        xs, ys = [], []
+        for key, other in wm.canvases.windows.items():
+            if key in skip or not other.mapped or other.hidden_offscreen or other.is_fullscreen:
+                continue
+            if (other.world_x > cam.x + half_w or other.world_x + other.world_w < cam.x - half_w or
+                    other.world_y > cam.y + half_h or other.world_y + other.world_h < cam.y - half_h):
+                continue
+            xs.append((other.world_x, other.world_x + other.world_w, key))
+            ys.append((other.world_y, other.world_y + other.world_h, key))
+        self.x_index = EdgeIndex(xs)
+        self.y_index = EdgeIndex(ys)
+
+    def snap(self, win, x, y, free=False):
+        """Snapped world position for win proposed at (x, y)"""
+        self.lines = {}
+        if not self.enabled or free or win is not self.dragged or self.x_index is None:
+            return x, y
+        tolerance = self.threshold / max(self.camera.zoom, 0.1)
+        hit_x = self.x_index.nearest(x, win.world_w, tolerance)
+        hit_y = self.y_index.nearest(y, win.world_h, tolerance)
+        if hit_x:
+            x = hit_x[0]
+            self.lines["x"] = (hit_x[1], hit_x[2])
+        if hit_y:
+            y = hit_y[0]
+            self.lines["y"] = (hit_y[1], hit_y[2])
+        return x, y
+
+    def end(self):
+        self.dragged = None
+        self.camera = None
+        self.x_index = self.y_index = None
+        self.lines = {}
+        if self.mapped:
+            self.wm.scheduler.invalidate(restack=False)
+
+    def update(self, camera, windows):
+        """Overlay hook from render_world: place or hide the guide lines"""
+        win = self.dragged
+        shown = set()
+        if self.guides and win is not None:
+            renderer = self.wm.renderer
+            camera = self.camera or camera
+            for axis, (line, key) in self.lines.items():
+                other = windows.get(key)
+                if other is None:
+                    continue
+                if axis == "x":
+                    y1 = min(win.world_y, other.world_y)
+                    y2 = max(win.world_y + win.world_h, other.world_y + other.world_h)
+                    sx, sy, _, sh = renderer.project(camera, line, y1, 0, y2 - y1)
+                    geometry = (sx, sy, 1, sh)
+                else:
+                    x1 = min(win.world_x, other.world_x)
+                    x2 = max(win.world_x + win.world_w, other.world_x + other.world_w)
+                    sx, sy, sw, _ = renderer.project(camera, x1, line, x2 - x1, 0)
+                    geometry = (sx, sy, sw, 1)
+                guide = self.guide_windows[axis]
+                x, y, w, h = geometry
+                guide.configure(x=x, y=y, width=w, height=h, stack_mode=X.Above)
+                if axis not in self.mapped:
+                    guide.map()
+                shown.add(axis)
+        for axis in self.mapped - shown:
+            self.guide_windows[axis].unmap()
+        self.mapped = shown
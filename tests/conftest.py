@@ -0,0 +1,49 @@
+import contextlib
+import io
+import os
+import sys
+
+import pytest
+
+sys.path.insert(0, os.path.dirname(os.path.dirname(os.path.abspath(__file__))))
+
+from backend import FakeBackend
+from wm import WindowManager
+
+
+class Session:
+    """A WindowManager on the fake X server plus a client connection to drive it"""
+
+    def __init__(self, record_path=None):
+        self.backend = FakeBackend()
+        self.server = self.backend.server
+        with contextlib.redirect_stdout(io.StringIO()):
+            self.wm = WindowManager(backend=self.backend, record_path=record_path)
+        self.client = self.backend.open_display()
+        self.root = self.client.screen().root
+
+    def pump(self):
+        """Handle everything pending the way the main loop does, recording if enabled"""
+        wm, d = self.wm, self.wm.d
+        with contextlib.redirect_stdout(io.StringIO()):
+            while d.pending_events():
+                while d.pending_events():
+                    ev = d.next_event()
+                    if wm.recorder:
+                        wm.recorder.record(ev)
+                    wm.handle_event(ev)
+                if wm.recorder:
+                    wm.recorder.end_batch()
+                wm.scheduler.flush()
+
+    def map_window(self, x=0, y=0, width=300, height=200, name="client"):
+        w = self.root.create_window(x, y, width, height, 0, self.server.depth)
+        w.set_wm_name(name)
+        w.map()
+        self.pump()
+        return w
+
+
+@pytest.fixture
+def session():
+    return Session()
@@ -0,0 +1,18 @@
+from Xlib import Xatom
+
+
+def test_strut_without_dock_type_reserves_space(session):
+    wm = session.wm
+    panel = session.root.create_window(0, 0, 1920, 30, 0, session.server.depth)
+    panel.set_wm_name("panel")
+    strut = session.client.intern_atom('_NET_WM_STRUT_PARTIAL')
+    panel.change_property(strut, Xatom.CARDINAL, 32, [0, 0, 30, 0, 0, 0, 0, 0, 0, 1919, 0, 0])
+
+    info = wm.backend.fetch_window_info(wm.d, [wm.d.create_resource_object('window', panel.id)])[0]
+    assert info.strut == (0, 0, 30, 0, 0, 0, 0, 0, 0, 1919, 0, 0)
+
+    panel.map()
+    session.pump()
+    assert wm.window_kinds.get(panel.id) == 'dock'
+    assert panel.id not in wm.windows
+    assert wm.outputs.outputs[0].reserved[2] == 30
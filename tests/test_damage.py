@@ -0,0 +1,13 @@
+def test_screen_change_resizes_damage(session):
+    wm = session.wm
+    damage = wm.renderer.damage
+    assert (damage.screen_w, damage.screen_h) == (1920, 1080)
+
+    session.server.root.width, session.server.root.height = 2560, 1440
+    wm.handle_screen_change()
+    assert (damage.screen_w, damage.screen_h) == (2560, 1440)
+    assert damage.full
+
+    damage.full = False
+    damage.add(2000, 1200, 400, 200)
+    assert damage.rects == [(2000, 1200, 400, 200)]
@@ -0,0 +1,30 @@
+import os
+import select
+import signal
+
+from launcher import Launcher
+
+
+def test_reap_collects_unknown_children_and_wakes_select():
+    old_handler = signal.getsignal(signal.SIGCHLD)
+    old_fd = signal.set_wakeup_fd(-1)
+    launcher = Launcher({})
+    try:
+        launcher.install_signal_handler()
+        launcher.reap()
+        # spawned behind the launcher's back, like a child of the process we were exec'd from
+        pid = os.posix_spawnp("true", ["true"], os.environ)
+        ready, _, _ = select.select([launcher.wakeup_fd], [], [], 5)
+        assert ready == [launcher.wakeup_fd]
+        assert launcher.sigchld_pending
+        launcher.reap()
+        assert not launcher.sigchld_pending
+        try:
+            os.waitpid(pid, os.WNOHANG)
+        except ChildProcessError:
+            pass
+        else:
+            raise AssertionError("child was left unreaped")
+    finally:
+        signal.set_wakeup_fd(old_fd)
+        signal.signal(signal.SIGCHLD, old_handler)
@@ -0,0 +1,29 @@
+from Xlib import Xatom
+
+
+def test_fullscreen_refits_to_strut_without_toggling(session):
+    wm = session.wm
+    client = session.map_window(name="video")
+    zwin = wm.windows[client.id]
+    before = (zwin.world_x, zwin.world_y, zwin.world_w, zwin.world_h)
+    wm.toggle_fullscreen(zwin)
+    full_h = zwin.world_h
+
+    toggles = []
+    toggle = wm.toggle_fullscreen
+    wm.toggle_fullscreen = lambda win: toggles.append(win) or toggle(win)
+    panel = session.root.create_window(0, 0, 1920, 40, 0, session.server.depth)
+    strut = session.client.intern_atom('_NET_WM_STRUT_PARTIAL')
+    panel.change_property(strut, Xatom.CARDINAL, 32, [0, 0, 40, 0, 0, 0, 0, 0, 0, 1919, 0, 0])
+    panel.map()
+    session.pump()
+
+    assert not toggles
+    assert zwin.is_fullscreen
+    assert zwin.world_h == int(wm.camera.screen_h / wm.camera.zoom) < full_h
+    assert zwin.saved_geometry == before
+
+    session.server.root.width = 2560
+    wm.handle_screen_change()
+    assert not toggles
+    assert zwin.world_w == int(2560 / wm.camera.zoom)
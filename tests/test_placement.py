@@ -0,0 +1,35 @@
+def rect(win):
+    return (win.world_x, win.world_y, win.world_w, win.world_h)
+
+
+def overlaps(a, b):
+    return a[0] < b[0] + b[2] and b[0] < a[0] + a[2] and a[1] < b[1] + b[3] and b[1] < a[1] + a[3]
+
+
+def test_index_follows_map_move_and_destroy(session):
+    wm = session.wm
+    index = wm.canvases.current.index
+    clients = [session.map_window(name=f"w{i}") for i in range(4)]
+    wins = [wm.windows[c.id] for c in clients]
+    assert all(index.rects[w.id] == rect(w) for w in wins)
+    assert not any(overlaps(rect(a), rect(b)) for a in wins for b in wins if a is not b)
+
+    wins[0].world_x += 5000
+    wm.window_moved(wins[0])
+    assert index.rects[wins[0].id] == rect(wins[0])
+
+    clients[1].destroy()
+    session.pump()
+    assert wins[1].id not in index.rects
+
+
+def test_place_does_not_rescan_windows(session):
+    wm = session.wm
+    for i in range(3):
+        session.map_window(name=f"w{i}")
+    index = wm.canvases.current.index
+    before = dict(index.rects)
+    for win in wm.windows.values():
+        win.world_x += 100000
+    wm.placer.place(index, wm.camera.x, wm.camera.y, 300, 225)
+    assert index.rects == before
@@ -0,0 +1,56 @@
+from Xlib import error as XError
+
+
+class Gone(XError.BadWindow):
+    def __init__(self):
+        pass
+
+
+def test_dead_frame_is_unmanaged_everywhere(session):
+    wm = session.wm
+    client = session.map_window(name="doomed")
+    zwin = wm.windows[client.id]
+    frame = zwin.frame
+
+    def configure(**kwargs):
+        raise Gone()
+    frame.configure = configure
+    wm.scheduler.invalidate()
+    wm.scheduler.flush()
+
+    assert client.id not in wm.windows
+    assert frame.id not in wm.frame_to_client
+    assert client.id not in wm.canvases.windows
+    assert client.id not in wm.canvases.current.index.rects
+    assert wm.scene.parent_of(client.id) is None
+    assert frame in wm.frame_pool.free
+
+
+def test_guard_band_follows_pan_without_hiding(session):
+    wm = session.wm
+    wm.offscreen.configure({"offscreen_hiding": {"enabled": False}})
+    renderer, cam = wm.renderer, wm.camera
+    now = [100.0]
+    wm.timers.clock = lambda: now[0]
+
+    ahead = wm.windows[session.map_window(name="ahead").id]
+    behind = wm.windows[session.map_window(name="behind").id]
+    wm.focused_window = None
+    for win, sx in ((ahead, cam.screen_w * 1.6), (behind, -cam.screen_w * 0.45)):
+        win.world_x = int(cam.x + (sx - cam.screen_w // 2) / cam.zoom)
+        win.world_y = int(cam.y)
+        wm.window_moved(win)
+    wm.scheduler.render_now()
+    assert ahead.parked and not behind.parked
+
+    # pan right quickly: the band stretches ahead and shrinks behind
+    configured = []
+    for step in range(3):
+        now[0] += 0.02
+        cam.x += 100 / cam.zoom
+        configure = ahead.frame.configure
+        ahead.frame.configure = lambda **kw: configured.append(kw) or configure(**kw)
+        wm.scheduler.render_now()
+        ahead.frame.configure = configure
+    assert not ahead.parked and configured
+    assert behind.parked
@@ -0,0 +1,50 @@
+from Xlib import X
+
+import log
+from backend import FakeBackend
+from conftest import Session
+from replay import Replayer, ReplayEvent
+
+
+def test_translate_coords_uses_parent_offsets(session):
+    w = session.map_window()
+    zwin = session.wm.windows[w.id]
+    frame = session.server.windows[zwin.frame.id]
+    client = session.server.windows[w.id]
+    root = session.wm.root
+
+    reply = root.translate_coords(zwin.client, 0, 0)
+    assert (reply.x, reply.y) == (frame.x + frame.border_width + client.x,
+                                  frame.y + frame.border_width + client.y)
+    assert reply.child.id == zwin.frame.id
+
+    back = zwin.frame.translate_coords(root, reply.x, reply.y)
+    assert (back.x, back.y) == (client.x, client.y)
+
+
+def test_replayed_configure_request_sends_configure_notify(tmp_path, monkeypatch):
+    path = str(tmp_path / "session.trace")
+    recording = Session(record_path=path)
+    w = recording.map_window()
+    wm = recording.wm
+    request = ReplayEvent(
+        type=X.ConfigureRequest, window=wm.windows[w.id].client, parent=wm.root, sibling=X.NONE,
+        x=0, y=0, width=500, height=320, border_width=0,
+        value_mask=X.CWWidth | X.CWHeight, stack_mode=X.Above)
+    wm.recorder.record(request)
+    wm.handle_event(request)
+    wm.recorder.end_batch()
+    wm.scheduler.flush()
+    wm.recorder.close()
+
+    warnings = []
+    monkeypatch.setattr(log, "warning", lambda msg, *args: warnings.append(msg % args))
+    backend = FakeBackend()
+    replayer = Replayer(path, backend=backend)
+    sent = backend.server.requests['SendEvent']
+    replayer.run()
+
+    assert replayer.per_type['ConfigureRequest'].count == 1
+    assert replayer.errors == 0
+    assert backend.server.requests['SendEvent'] > sent
+    assert not [m for m in warnings if m.startswith("ConfigureNotify")]
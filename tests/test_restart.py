@@ -0,0 +1,52 @@
+import contextlib
+import io
+
+import pytest
+
+import restart
+import wm as wm_module
+from wm import WindowManager
+
+
+def test_exec_args_keep_record_and_replace_restore():
+    argv = ["--record", "/tmp/t.trace", "--restore", "/old.json", "--backend=xcb"]
+    assert restart.exec_args(argv, "/new.json", "xlib") == [
+        "--record", "/tmp/t.trace", "--restore", "/new.json", "--backend", "xlib"]
+
+
+def test_second_wm_is_refused_redirect(session):
+    with contextlib.redirect_stdout(io.StringIO()), pytest.raises(SystemExit):
+        WindowManager(backend=session.backend)
+
+
+def test_restart_waits_for_old_connection(session, monkeypatch, tmp_path):
+    sleeps = []
+
+    def sleep(delay):
+        # the old process's connection goes away while the new one retries
+        sleeps.append(delay)
+        session.wm.d.close()
+    monkeypatch.setattr(wm_module.time, "sleep", sleep)
+
+    with contextlib.redirect_stdout(io.StringIO()):
+        new = WindowManager(backend=session.backend, restore_path=str(tmp_path / "snapshot.json"))
+    assert len(sleeps) == 1
+    assert new.root.get_attributes().your_event_mask & wm_module.X.SubstructureRedirectMask
+
+
+def test_restarted_recorder_continues_trace(tmp_path):
+    import eventtrace
+    from conftest import Session
+
+    path = str(tmp_path / "session.trace")
+    session = Session(record_path=path)
+    session.map_window(name="before")
+    with contextlib.redirect_stdout(io.StringIO()):
+        session.wm.recorder.close()
+        _, first = eventtrace.read_trace(path)
+        session.wm.recorder = eventtrace.Recorder(session.wm, path, append=True)
+    session.map_window(name="after")
+    with contextlib.redirect_stdout(io.StringIO()):
+        session.wm.recorder.close()
+    _, records = eventtrace.read_trace(path)
+    assert first and len(records) > len(first)
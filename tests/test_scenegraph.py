@@ -0,0 +1,35 @@
+def group(session, count=3):
+    wm = session.wm
+    wins = [wm.windows[session.map_window(name=f"w{i}").id] for i in range(count)]
+    for child in wins[1:]:
+        assert wm.scene.attach(child, wins[0])
+    wm.focused_window = None
+    return wins
+
+
+def test_moving_parent_carries_children_and_bounds(session):
+    wm = session.wm
+    parent, a, b = group(session)
+    offset = (a.world_x - parent.world_x, a.world_y - parent.world_y)
+    parent.world_x += 700
+    wm.window_moved(parent)
+    wm.scheduler.render_now()
+    assert (a.world_x - parent.world_x, a.world_y - parent.world_y) == offset
+    x1, y1, x2, y2 = wm.scene.bounds[parent.id]
+    for win in (parent, a, b):
+        assert x1 <= win.world_x and win.world_x + win.world_w <= x2
+        assert y1 <= win.world_y and win.world_y + win.world_h <= y2
+
+
+def test_group_out_of_view_is_culled_without_visiting_members(session):
+    wm = session.wm
+    wins = group(session)
+    wins[0].world_x += 10 ** 6
+    wm.window_moved(wins[0])
+    wm.scheduler.render_now()
+
+    visited = []
+    cull = wm.offscreen.cull
+    wm.offscreen.cull = lambda win, *args: visited.append(win) or cull(win, *args)
+    wm.scheduler.render_now()
+    assert not set(visited) & set(wins)
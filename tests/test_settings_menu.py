@@ -0,0 +1,33 @@
+import json
+
+import config
+from settings_menu import SettingsMenu
+
+
+def menu_for(path):
+    menu = SettingsMenu.__new__(SettingsMenu)
+    menu.config_path = path
+    menu.config = menu.load_config()
+    return menu
+
+
+def test_save_goes_back_to_dragon_config(tmp_path, monkeypatch):
+    chosen = tmp_path / "chosen.json"
+    chosen.write_text(json.dumps({"wallpaper_path": "", "aliases": {}}))
+    monkeypatch.setenv("DRAGON_CONFIG", str(chosen))
+    monkeypatch.setenv("XDG_CONFIG_HOME", str(tmp_path / "xdg"))
+
+    menu = menu_for(config.config_path())
+    menu.config["wallpaper_path"] = "/walls/a.png"
+    assert menu.save_config()
+    assert json.loads(chosen.read_text())["wallpaper_path"] == "/walls/a.png"
+    assert not (tmp_path / "xdg").exists()
+
+
+def test_unwritable_config_is_reported(tmp_path):
+    blocked = tmp_path / "file"
+    blocked.write_text("")
+    menu = menu_for(None)
+    menu.config_path = str(blocked / "config.json")
+    assert not menu.save_config()
+    assert menu.save_error.startswith(str(blocked / "config.json"))
@@ -0,0 +1,23 @@
+from models import Camera
+
+
+def test_snap_tolerance_uses_the_dragged_windows_output(session):
+    wm = session.wm
+    second = Camera()
+    second.set_viewport(1920, 0, 1920, 1080)
+    second.x, second.y, second.zoom = 50000, 0, 0.5
+    wm.renderer.cameras = [wm.camera, second]
+    wm.camera.zoom = 2.0
+
+    anchor = wm.windows[session.map_window(name="anchor").id]
+    dragged = wm.windows[session.map_window(name="dragged").id]
+    for win, x in ((anchor, 49000), (dragged, 49600)):
+        win.world_x, win.world_y = x, 0
+        wm.window_moved(win)
+
+    wm.snapper.begin(dragged)
+    assert wm.snapper.camera is second
+    # 20 world px is 10 screen px on the 0.5 output: within the 12 px threshold
+    gap = anchor.world_x + anchor.world_w + 20
+    assert wm.snapper.snap(dragged, gap, 0)[0] == anchor.world_x + anchor.world_w
+    wm.snapper.end()
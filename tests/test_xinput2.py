@@ -0,0 +1,39 @@
+import struct
+
+from Xlib import X
+
+import xinput2
+
+VERTICAL = (2, 3)
+
+
+def motion(value, child=X.NONE, x=400, y=300):
+    """XI_Motion payload carrying one vertical scroll valuator"""
+    deviceid, number = VERTICAL
+    head = xinput2.DEVICE_EVENT.pack(deviceid, 0, 0, 0, 0, child, x << 16, y << 16, 0, 0,
+                                     0, 1, deviceid, 0, 0, 0, 0, 0, 0, 0, 0, 0)
+    return head + struct.pack("=I", 1 << number) + struct.pack("=iI", value, 0)
+
+
+def scroller(session):
+    xi = xinput2.XInput2(session.wm)
+    xi.scroll = {VERTICAL: (xinput2.ScrollTypeVertical, 120.0)}
+    zooms = []
+    session.wm.navigator.zoom_steps = lambda steps, x, y: zooms.append(steps)
+    return xi, zooms
+
+
+def test_scroll_over_desktop_zooms(session):
+    xi, zooms = scroller(session)
+    xi._on_motion(motion(1000))
+    xi._on_motion(motion(880))
+    assert zooms == [1.0]
+
+
+def test_scroll_over_window_does_not_zoom(session):
+    w = session.map_window()
+    frame = session.wm.windows[w.id].frame
+    xi, zooms = scroller(session)
+    xi._on_motion(motion(1000, child=frame.id))
+    xi._on_motion(motion(880, child=frame.id))
+    assert zooms == []
@@ -0,0 +1,63 @@
+import heapq
+import log
+import time
+
+
+class TimerQueue:
+    """
+    One-shot timers for the WM event loop.
+
+    Timers are keyed, so scheduling a key that is already pending replaces it
+    (useful for "do X once things have been idle for N seconds").
+    The event loop uses timeout() as its select() timeout and calls run_due().
+    clock can be swapped for a virtual one (replay.py drives timers from trace time).
+    """
+
+    def __init__(self, clock=time.monotonic):
+        self.clock = clock
+        self._heap = []
+        self._active = {}
+        self._seq = 0
+
+    def call_later(self, delay, key, callback):
+        self._seq += 1
+        deadline = self.clock() + delay
+        self._active[key] = (deadline, self._seq)
+        heapq.heappush(self._heap, (deadline, self._seq, key, callback))
+
+    def cancel(self, key):
+        self._active.pop(key, None)
+
+    def is_pending(self, key):
+        return key in self._active
+
+    def deadline(self, key):
+        entry = self._active.get(key)
+        return entry[0] if entry else None
+
+    def _drop_stale(self):
+        while self._heap:
+            deadline, seq, key, _ = self._heap[0]
+            if self._active.get(key) == (deadline, seq):
+                return
+            heapq.heappop(self._heap)
+
+    def timeout(self):
+        """Seconds until the next timer fires, or None if nothing is scheduled"""
+        self._drop_stale()
+        if not self._heap:
+            return None
+        return max(0.0, self._heap[0][0] - self.clock())
+
+    def run_due(self):
+        now = self.clock()
+        while True:
+            self._drop_stale()
+            if not self._heap or self._heap[0][0] > now:
+                return
+            deadline, seq, key, callback = heapq.heappop(self._heap)
+            del self._active[key]
+            try:
+                callback()
+            except Exception as e:
+                log.exception("Timer '%s' error: %s", key, e)
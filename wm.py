@@ -1,32 +1,71 @@
-import subprocess    
-from Xlib import X, display, XK, Xatom    
+from Xlib import X, Xatom    
 from Xlib import error as XError    
 from Xlib.protocol import event    
-from models import Camera, ZWindow    
+from models import ZWindow
 from renderer import Renderer    
-from input import InputHandler    
-import json    
-import os    
+from input import InputHandler
+from launcher import Launcher
+from minimap import Minimap
+from offscreen import OffscreenHider
+from timers import TimerQueue
+from scheduler import RenderScheduler
+from xsync import XSync
+from xinput2 import XInput2
+from navigation import Navigator
+from keybindings import KeyBindings
+from placement import Placer
+from scenegraph import SceneGraph
+from canvases import CanvasManager
+from framepool import FramePool
+from snapping import Snapper
+from outputs import OutputManager
+from backend import XlibBackend
+import config
+import log
+import restart
+import eventtrace
+import json
+import select
+import time
   
-class WindowManager:  
-    def __init__(self):  
-        self.d = display.Display()  
+class WindowManager:
+    SYNC_TIMEOUT = 0.2
+    REDIRECT_RETRIES = 20
+    REDIRECT_RETRY_DELAY = 0.1
+
+    FRAME_EVENT_MASK = (
+        X.SubstructureNotifyMask |
+        X.ButtonPressMask |
+        X.ButtonReleaseMask |
+        X.ButtonMotionMask |
+        X.ExposureMask
+    )
+
+    def __init__(self, restore_path=None, record_path=None, backend=None):
+        self.backend = backend or XlibBackend()
+        self.d = self.backend.open_display()  
         self.root = self.d.screen().root  
         self.config = self.load_config()  
-        self.camera = Camera()  
+        log.configure(self.config)
+        self.outputs = OutputManager(self.d, self.root)
+        self.camera = self.outputs.outputs[0].camera
         self.renderer = Renderer(self.root, self.d, self.config)  
-        self.input = InputHandler(self)  
+        self.renderer.cameras = self.outputs.cameras
+        self.input = InputHandler(self)
+        self.launcher = Launcher(self.config)
+        self.timers = TimerQueue()
+        self.scheduler = RenderScheduler(self)
           
         
         self.windows = {}  
         self.frame_to_client = {}  
-        self.btn_map = {}  
         self.cmd_active = False  
         self.cmd_text = ""  
         self.focused_window = None  
           
         
-        self.polybar_windows = []  
+        self.polybar_windows = []
+        self.window_kinds = {}
         self.window_stack = []  
         self.alt_tab_index = 0  
         self.alt_tab_active = False  
@@ -43,37 +82,96 @@ class WindowManager:
         
         self._NET_SUPPORTED = self.d.intern_atom('_NET_SUPPORTED')  
         self._NET_WM_STATE = self.d.intern_atom('_NET_WM_STATE')  
-        self._NET_WM_STATE_FULLSCREEN = self.d.intern_atom('_NET_WM_STATE_FULLSCREEN')  
+        self._NET_WM_STATE_FULLSCREEN = self.d.intern_atom('_NET_WM_STATE_FULLSCREEN')
+        self._NET_WM_WINDOW_TYPE_DOCK = self.d.intern_atom('_NET_WM_WINDOW_TYPE_DOCK')
+        self._NET_WM_STRUT_PARTIAL = self.d.intern_atom('_NET_WM_STRUT_PARTIAL')
+        self.popup_types = {self.d.intern_atom(f'_NET_WM_WINDOW_TYPE_{t}') for t in
+                            ('DROPDOWN_MENU', 'POPUP_MENU', 'TOOLTIP', 'NOTIFICATION', 'COMBO', 'DND')}
         self._NET_ACTIVE_WINDOW = self.d.intern_atom('_NET_ACTIVE_WINDOW')  
         self._NET_CLIENT_LIST = self.d.intern_atom('_NET_CLIENT_LIST')  
         self._NET_SUPPORTING_WM_CHECK = self.d.intern_atom('_NET_SUPPORTING_WM_CHECK')  
-        self._NET_WM_NAME = self.d.intern_atom('_NET_WM_NAME') 
+        self._NET_WM_NAME = self.d.intern_atom('_NET_WM_NAME')
+        self._NET_WM_PID = self.d.intern_atom('_NET_WM_PID')
+        self._NET_WM_SYNC_REQUEST = self.d.intern_atom('_NET_WM_SYNC_REQUEST')
+        self._NET_WM_SYNC_REQUEST_COUNTER = self.d.intern_atom('_NET_WM_SYNC_REQUEST_COUNTER')
+
+        self.xsync = XSync(self.d)
+        self.sync_alarms = {}
+        self.navigator = Navigator(self, self.config)
+        self.keybindings = KeyBindings(self, self.config)
+        self.placer = Placer(self.config)
+        self.frame_pool = FramePool(self, self.config)
+        self.scene = SceneGraph()
+        self.group_pick = None
+        self.xinput = XInput2(self)
           
-        self.cmd_window = self._create_cmd_bar()  
+        self.cmd_window = self._create_cmd_bar()
+        self.minimap = Minimap(self.root, self.d, self.renderer, self.config)
+        self.minimap.place(self.outputs.outputs[0])
+        self.renderer.overlays.append(self.minimap)
+        self.offscreen = OffscreenHider(self, self.config)
+        self.renderer.offscreen = self.offscreen
+        self.renderer.clock = lambda: self.timers.clock()
+        self.renderer.focused = lambda: self.focused_window
+        self.renderer.scene = self.scene
+        self.canvases = CanvasManager(self, self.config)
+        self.snapper = Snapper(self, self.config)
+        self.renderer.overlays.append(self.snapper)
           
         
-        self.root.change_attributes(  
-            event_mask=(  
-                X.SubstructureRedirectMask |  
-                X.SubstructureNotifyMask |  
-                X.StructureNotifyMask |  
-                X.PropertyChangeMask |  
-                X.ButtonPressMask |  
-                X.KeyPressMask  
-            )  
-        )  
+        self._select_root_events(self.REDIRECT_RETRIES if restore_path else 0)
           
         self._setup_ewmh()  
-        self._setup_grabs()  
-        print("DragonDesktop Running with Full X11 Protocol Support...")  
+        self._setup_grabs()
+        self.launcher.install_signal_handler()
+        self.config_watcher = config.ConfigWatcher(self.timers, self.reload_config)
+        self.config_watcher.start()
+        if restore_path:
+            restart.restore(self, restore_path)
+        self.recorder = eventtrace.Recorder(self, record_path, append=bool(restore_path)) if record_path else None
+        print("DragonDesktop Running with Full X11 Protocol Support...")
   
+    def _select_root_events(self, retries):
+        """
+        Take SubstructureRedirect on the root. Only one client can hold it and
+        the refusal (BadAccess) is asynchronous, so sync and check. After an
+        in-place restart the old connection may still be closing; retry for a
+        moment before giving up.
+        """
+        for attempt in range(retries + 1):
+            catch = XError.CatchError(XError.BadAccess)
+            self.root.change_attributes(  
+                event_mask=(  
+                    X.SubstructureRedirectMask |  
+                    X.SubstructureNotifyMask |  
+                    X.StructureNotifyMask |  
+                    X.PropertyChangeMask |  
+                    X.ButtonPressMask |  
+                    X.KeyPressMask |
+                    X.ExposureMask
+                ),
+                onerror=catch
+            )  
+            self.d.sync()
+            if catch.get_error() is None:
+                return
+            if attempt < retries:
+                time.sleep(self.REDIRECT_RETRY_DELAY)
+        raise SystemExit("⚠ Another window manager is running (BadAccess on SubstructureRedirect)")
+
     def print_status(self):  
         """Print current WM status (for debugging)"""  
         print("\n=== DragonDesktop Status ===")  
         print(f"Rendering Mode: {self.renderer.get_mode_string()}")  
         print(f"Camera: x={self.camera.x}, y={self.camera.y}, zoom={self.camera.zoom:.2f}")  
         print(f"Windows: {len(self.windows)}")  
-        print(f"Focused: {self.focused_window.title if self.focused_window else 'None'}")  
+        print(f"Focused: {self.focused_window.title if self.focused_window else 'None'}")
+        print(f"Running children: {len(self.launcher.children)}")
+        print(f"Renders: {self.scheduler.renders} for {self.scheduler.invalidations} invalidations")
+        pool = self.frame_pool
+        print(f"Frame pool: {len(pool.free)} ready, {pool.hits} hits / {pool.misses} misses ({pool.hit_rate:.0%})")
+        for cmd, count, avg_ms, max_ms in self.launcher.latency_report():
+            print(f"  {cmd}: {count} launches, avg {avg_ms:.0f} ms, max {max_ms:.0f} ms to first map")
         print("============================\n")  
   
     def _setup_ewmh(self):  
@@ -106,9 +204,12 @@ class WindowManager:
                 self._NET_CLIENT_LIST,  
                 self._NET_ACTIVE_WINDOW,  
                 self._NET_WM_NAME,  
-                self._NET_WM_STATE,  
-                self._NET_WM_STATE_FULLSCREEN  
-            ]  
+                self._NET_WM_STATE,
+                self._NET_WM_STATE_FULLSCREEN,
+                self.offscreen._NET_WM_STATE_HIDDEN,
+                self._NET_WM_SYNC_REQUEST,
+                self._NET_WM_SYNC_REQUEST_COUNTER
+            ] + self.canvases.atoms
             self.root.change_property(  
                 self._NET_SUPPORTED,  
                 Xatom.ATOM,  
@@ -135,8 +236,10 @@ class WindowManager:
         """Remove focus from all windows"""  
         try:  
             
-            self.d.set_input_focus(self.root, X.RevertToPointerRoot, X.CurrentTime)  
-            self.focused_window = None  
+            self.d.set_input_focus(self.root, X.RevertToPointerRoot, X.CurrentTime)
+            self.focused_window = None
+            self.minimap.focused = None
+            self.minimap.update(self.camera, self.canvases.windows)
             
             try:  
                 self.root.change_property(  
@@ -148,16 +251,20 @@ class WindowManager:
             except:  
                 pass  
             self.d.sync()  
-            print("Unfocused all windows")  
+            log.debug("Unfocused all windows")
         except Exception as e:  
-            print(f"Unfocus error: {e}")  
+            log.warning("Unfocus error: %s", e)
   
     def focus_window(self, zwin):  
         try:  
             
-            if not zwin.mapped:  
-                print(f"Cannot focus unmapped window: {zwin.title}")  
-                return  
+            if not zwin.mapped:
+                log.debug("Cannot focus unmapped window: %s", zwin.title)
+                return
+            if not self.canvases.is_visible(zwin):
+                self.canvases.switch(zwin.canvas)
+            if zwin.hidden_offscreen:
+                self.offscreen.restore(zwin)
               
             
             protocols = self.get_wm_protocols(zwin.client)  
@@ -169,9 +276,11 @@ class WindowManager:
                 )  
               
             
-            self.d.set_input_focus(zwin.client, X.RevertToParent, X.CurrentTime)  
-            zwin.frame.configure(stack_mode=X.Above)  
-            self.focused_window = zwin  
+            self.d.set_input_focus(zwin.client, X.RevertToParent, X.CurrentTime)
+            zwin.frame.configure(stack_mode=X.Above)
+            self.focused_window = zwin
+            self.minimap.focused = zwin
+            self.minimap.update(self.camera, self.canvases.windows)
               
             
             self.update_window_stack(zwin)  
@@ -188,33 +297,79 @@ class WindowManager:
                 pass  
               
             self.d.sync()  
-            print(f"Focused window: {zwin.title}")  
+            log.debug("Focused window: %s", zwin.title)
         except XError.BadMatch:  
             pass  
         except XError.BadWindow:  
-            print(f"Window {zwin.client.id} disappeared during focus.")  
+            log.debug("Window %s disappeared during focus.", zwin.client.id)
             self.close_window(zwin)  
         except Exception as e:  
-            print(f"Focus Error: {e}")  
+            log.warning("Focus Error: %s", e)
   
-    def load_config(self):  
-        try:  
-            if os.path.exists("config.json"):  
-                with open("config.json", "r") as f:  
-                    return json.load(f)  
-        except Exception as e:  
-            print(f"Config Error: {e}")  
-        return {  
-            "wallpaper_path": "",  
-            "aliases": {  
-                "settings": "python3 settings_menu.py"  
-            }  
-        }  
-  
-    def _create_cmd_bar(self):  
-        s = self.root.get_geometry()  
-        w = 600; h = 40  
-        x = (s.width - w) // 2; y = (s.height - h) // 2  
+    def load_config(self, path=None):
+        path = path or config.config_path()
+        try:
+            if path:
+                cfg = config.load(path)
+                cfg.update(self.backend.config_overrides)
+                print(f"✓ Config loaded: {path}")
+                return cfg
+        except Exception as e:
+            print(f"Config Error ({path}): {e}")
+        cfg = json.loads(json.dumps(config.DEFAULT_CONFIG))
+        cfg.update(self.backend.config_overrides)
+        return cfg
+
+    def reload_config(self, path):
+        """
+        Config file changed on disk: validate it, then apply only what changed.
+        An invalid file is reported and ignored; the running config stays.
+        """
+        if path is None:
+            new = json.loads(json.dumps(config.DEFAULT_CONFIG))
+        else:
+            try:
+                new = config.load(path)
+            except Exception as e:
+                print(f"⚠ Config reload rejected ({path}): {e}")
+                return
+        new.update(self.backend.config_overrides)
+
+        changed = config.diff(self.config, new)
+        if not changed:
+            return
+        print(f"✓ Config reloaded, changed: {', '.join(sorted(changed))}")
+
+        self.config.clear()
+        self.config.update(new)
+
+        self.renderer.apply_config(changed)
+        if "offscreen_hiding" in changed:
+            self.offscreen.configure(self.config)
+        if "navigation" in changed:
+            self.navigator.configure(self.config)
+        if "logging" in changed:
+            log.configure(self.config)
+        if "canvases" in changed:
+            self.canvases.configure(self.config)
+        if "snapping" in changed:
+            self.snapper.configure(self.config)
+        if "frame_pool" in changed:
+            self.frame_pool.configure(self.config)
+        if "placement" in changed:
+            self.placer.configure(self.config)
+        if "keybindings" in changed:
+            self.keybindings.configure(self.config)
+            self.keybindings.compile()
+        if "minimap" in changed:
+            self.minimap.configure(self.config)
+            self.minimap.place(self.outputs.outputs[0])
+
+        self.scheduler.invalidate()
+  
+    def _create_cmd_bar(self):
+        x, y = self._cmd_bar_position()
+        w = 600; h = 40
         win = self.root.create_window(  
             x, y, w, h, border_width=2,  
             depth=X.CopyFromParent, visual=X.CopyFromParent,  
@@ -222,8 +377,35 @@ class WindowManager:
             event_mask=X.ExposureMask | X.KeyPressMask,  
             override_redirect=True  
         )  
-        win.configure(border_pixel=self.renderer.alloc_color('black'))  
-        return win  
+        win.configure(border_pixel=self.renderer.alloc_color('black'))
+        return win
+
+    def _cmd_bar_position(self):
+        """Centre of the output the active camera renders to"""
+        output = self.outputs.output_for_camera(self.camera)
+        return (output.x + (output.width - 600) // 2, output.y + (output.height - 40) // 2)
+
+    def set_active_output(self, root_x, root_y):
+        """Pan/zoom/placement act on the camera of the monitor under the pointer"""
+        output = self.outputs.output_at(root_x, root_y)
+        if output.camera is not self.camera:
+            self.camera = output.camera
+            log.debug("Active output: %s", output.name)
+
+    def handle_screen_change(self):
+        """RandR hotplug / mode change: re-read outputs and re-render"""
+        if not self.outputs.refresh():
+            return
+        self.renderer.cameras = self.outputs.cameras
+        x, y, w, h = self.outputs.bounds()
+        self.renderer.damage.resize(x + w, y + h)
+        for zwin in self.windows.values():
+            zwin.parked = False
+        if self.camera not in self.renderer.cameras:
+            self.camera = self.outputs.outputs[0].camera
+        self.minimap.place(self.outputs.outputs[0])
+        self.refit_fullscreen()
+        self.scheduler.invalidate()
   
     def _setup_grabs(self):  
         masks = [  
@@ -237,72 +419,79 @@ class WindowManager:
             self.root.grab_button(5, mask, True, X.ButtonPressMask, X.GrabModeAsync, X.GrabModeAsync, X.NONE, X.NONE)  
             self.root.grab_button(1, mask, True, X.ButtonPressMask | X.ButtonReleaseMask | X.ButtonMotionMask, X.GrabModeAsync, X.GrabModeAsync, X.NONE, X.NONE)  
           
-        space_key = self.d.keysym_to_keycode(XK.string_to_keysym("space"))  
-        for mask in masks:  
-            self.root.grab_key(space_key, mask, True, X.GrabModeAsync, X.GrabModeAsync)  
-          
-        f_keys = [XK.XK_F1, XK.XK_F2, XK.XK_F3, XK.XK_F4]  
-        for ksym in f_keys:  
-            code = self.d.keysym_to_keycode(ksym)  
-            for mask in masks:  
-                self.root.grab_key(code, mask, True, X.GrabModeAsync, X.GrabModeAsync)  
-                self.root.grab_key(code, mask | X.ControlMask, True, X.GrabModeAsync, X.GrabModeAsync)  
-          
-        f4_key = self.d.keysym_to_keycode(XK.XK_F4)  
-        alt_masks = [  
-            X.Mod1Mask,  
-            X.Mod1Mask | X.Mod2Mask,  
-            X.Mod1Mask | X.LockMask,  
-            X.Mod1Mask | X.Mod2Mask | X.LockMask  
-        ]  
-        for mask in alt_masks:  
-            self.root.grab_key(f4_key, mask, True, X.GrabModeAsync, X.GrabModeAsync)  
-          
-        
-        tab_key = self.d.keysym_to_keycode(XK.string_to_keysym("Tab"))  
-        for mask in alt_masks:  
-            
-            self.root.grab_key(tab_key, mask, True, X.GrabModeAsync, X.GrabModeAsync)  
-            
-            self.root.grab_key(tab_key, mask | X.ShiftMask, True, X.GrabModeAsync, X.GrabModeAsync)  
+        self.keybindings.compile()
+
+    def is_polybar_window(self, info):
+        """Detect if a window is polybar by checking WM_CLASS and WM_NAME"""
+        if info.wm_class and any("polybar" in c.lower() for c in info.wm_class):
+            return True
+        for name in (info.name, info.net_wm_name):
+            if name and "polybar" in name.lower():
+                return True
+        return False
   
-    def is_polybar_window(self, window):  
-        """Detect if a window is polybar by checking WM_CLASS and WM_NAME"""  
-        try:  
-            
-            wm_class = window.get_wm_class()  
-            if wm_class:  
-                if any("polybar" in c.lower() for c in wm_class):  
-                    return True  
-              
-            
-            wm_name = window.get_wm_name()  
-            if wm_name and "polybar" in wm_name.lower():  
-                return True  
-              
-            
-            try:  
-                prop = window.get_full_property(self._NET_WM_NAME, 0)  
-                if prop and prop.value:  
-                    name = prop.value.decode('utf-8', errors='ignore')  
-                    if "polybar" in name.lower():  
-                        return True  
-            except:  
-                pass  
-        except:  
-            pass  
-        return False  
-  
-    def ensure_polybar_stacking(self):  
-        """  
-        Ensure polybar is always on top, unless there's a fullscreen window.  
-        In fullscreen mode, polybar goes to the background.  
-        """  
-        if not self.polybar_windows:  
-            return  
-          
-        
-        fullscreen_win = self.get_fullscreen_window()  
+    def classify_window(self, info):
+        """
+        'dock' (_NET_WM_WINDOW_TYPE_DOCK, a strut, or polybar by name),
+        'popup' (override-redirect, or a menu/tooltip/notification type that
+        should have been) or 'normal'. Cached per window id by the caller.
+        """
+        if self._NET_WM_WINDOW_TYPE_DOCK in info.window_type or info.strut or self.is_polybar_window(info):
+            return 'dock'
+        if info.override_redirect or self.popup_types.intersection(info.window_type):
+            return 'popup'
+        return 'normal'
+
+    def add_dock(self, window, strut):
+        """Docks are mapped unframed in their own layer above the canvas"""
+        if all(w.id != window.id for w in self.polybar_windows):
+            self.polybar_windows.append(window)
+            log.debug("✓ Detected dock window: %s", window.id)
+        try:
+            window.change_attributes(event_mask=X.PropertyChangeMask)
+        except Exception:
+            pass
+        self.update_strut(window, strut)
+
+    def update_strut(self, window, strut):
+        if self.outputs.set_strut(window.id, strut):
+            self.refit_fullscreen()
+            self.scheduler.invalidate()
+
+    def read_strut(self, window):
+        try:
+            prop = window.get_full_property(self._NET_WM_STRUT_PARTIAL, Xatom.CARDINAL)
+        except Exception:
+            return None
+        if prop and len(prop.value) == 12 and any(prop.value[:4]):
+            return tuple(int(v) for v in prop.value)
+        return None
+
+    def forget_unmanaged(self, window_id):
+        """Drop cached classification, dock membership and strut of a destroyed window"""
+        if self.window_kinds.pop(window_id, None) == 'dock':
+            self.polybar_windows = [w for w in self.polybar_windows if w.id != window_id]
+            self.update_strut(self.d.create_resource_object('window', window_id), None)
+
+    def ensure_polybar_stacking(self):
+        """
+        Ensure docks (polybar etc.) are always on top, unless there's a
+        fullscreen window; then they go to the background.
+        The minimap overlay follows the same rule.
+        """
+        fullscreen_win = self.get_fullscreen_window()
+
+        if self.minimap.visible:
+            try:
+                if fullscreen_win:
+                    self.minimap.window.configure(stack_mode=X.Below, sibling=fullscreen_win.frame)
+                else:
+                    self.minimap.window.configure(stack_mode=X.Above)
+            except Exception as e:
+                log.warning("Minimap stacking error: %s", e)
+
+        if not self.polybar_windows:
+            return
           
         for polybar_win in self.polybar_windows:  
             try:  
@@ -312,10 +501,8 @@ class WindowManager:
                 else:  
                     
                     polybar_win.configure(stack_mode=X.Above)  
-            except Exception as e:  
-                print(f"Polybar stacking error: {e}")  
-          
-        self.d.sync()  
+            except Exception as e:
+                log.warning("Polybar stacking error: %s", e)
   
     def update_window_stack(self, zwin):  
         """  
@@ -334,11 +521,11 @@ class WindowManager:
         
         tabbable_windows = [  
             w for w in self.window_stack   
-            if w.mapped and w.id in self.windows  
+            if w.mapped and w.id in self.canvases.windows
         ]  
           
         if len(tabbable_windows) < 2:  
-            print("Alt-Tab: Not enough windows to cycle")  
+            log.debug("Alt-Tab: Not enough windows to cycle")
             return  
           
         if not self.alt_tab_active:  
@@ -356,13 +543,13 @@ class WindowManager:
         target_window = tabbable_windows[self.alt_tab_index]  
           
         
-        target_window.frame.configure(stack_mode=X.Above)  
-        self.focus_window(target_window)  
-          
-        
-        self.ensure_polybar_stacking()  
+        target_window.frame.configure(stack_mode=X.Above)
+        self.focus_window(target_window)
+
+
+        self.scheduler.restack()
           
-        print(f"Alt-Tab: Switched to '{target_window.title}' ({self.alt_tab_index + 1}/{len(tabbable_windows)})")  
+        log.debug("Alt-Tab: Switched to '%s' (%d/%d)", target_window.title, self.alt_tab_index + 1, len(tabbable_windows))
   
     def end_alt_tab(self):  
         """  
@@ -374,7 +561,7 @@ class WindowManager:
             
             if self.focused_window:  
                 self.update_window_stack(self.focused_window)  
-            print("Alt-Tab: Cycle ended")  
+            log.debug("Alt-Tab: Cycle ended")
   
     def get_wm_protocols(self, window):  
         """Get WM_PROTOCOLS supported by window"""  
@@ -397,34 +584,33 @@ class WindowManager:
             window.send_event(ev, event_mask=X.NoEventMask)  
             self.d.sync()  
         except Exception as e:  
-            print(f"ClientMessage Error: {e}")  
+            log.warning("ClientMessage Error: %s", e)
   
     def send_configure_notify(self, zwin):  
         """Send synthetic ConfigureNotify (ICCCM requirement)"""  
         
         try:  
             geom = zwin.client.get_geometry()  
-            frame_geom = zwin.frame.get_geometry()  
             
-            frame_coords = zwin.frame.translate_coords(self.root, 0, 0)  
+            client_coords = self.root.translate_coords(zwin.client, 0, 0)
             ev = event.ConfigureNotify(  
                 event=zwin.client,  
                 window=zwin.client,  
-                x=int(frame_coords.x),  
-                y=int(frame_coords.y + 25),  
+                x=int(client_coords.x),
+                y=int(client_coords.y),
                 width=int(geom.width),  
                 height=int(geom.height),  
                 border_width=0,  
                 above_sibling=X.NONE,  
-                override_redirect=0  
+                override=0
             )  
             zwin.client.send_event(ev, event_mask=X.StructureNotifyMask)  
             self.d.sync()  
         except Exception as e:  
-            print(f"ConfigureNotify Warning: {e}")  
+            log.warning("ConfigureNotify Warning: %s", e)
   
     def get_fullscreen_window(self):  
-        for win in self.windows.values():  
+        for win in self.canvases.windows.values():
             if win.is_fullscreen: return win  
         return None  
   
@@ -437,44 +623,74 @@ class WindowManager:
             target_zwin = self.windows.get(focus_win.id)  
             if target_zwin:  
                 self.close_window(target_zwin)  
-                self.renderer.render_world(self.camera, self.windows)  
-                self.ensure_polybar_stacking()  
+                self.scheduler.invalidate()
         except Exception as e:  
-            print(f"Error closing window: {e}")  
+            log.warning("Error closing window: %s", e)
   
-    def run(self):  
-        while True:  
-            try:  
-                event = self.d.next_event()  
-                
-                if event.type == X.MapRequest:  
-                    self.handle_map_request(event.window)  
-                elif event.type == X.ConfigureRequest:  
-                    self.handle_configure_request(event)  
-                elif event.type == X.UnmapNotify:  
-                    self.handle_unmap_notify(event)  
-                elif event.type == X.DestroyNotify:  
-                    self.handle_destroy_notify(event)  
-                elif event.type == X.PropertyNotify:  
-                    self.handle_property_notify(event)  
-                elif event.type == X.ClientMessage:  
-                    self.handle_client_message(event)  
-                elif event.type == X.MapNotify:  
-                    pass  
-                elif event.type == X.ReparentNotify:  
-                    pass  
-                elif event.type == X.KeyRelease:  
-                    
-                    self.input.handle_event(event)  
-                else:  
-                    
-                    self.input.handle_event(event)  
-            except KeyboardInterrupt:  
-                break  
-            except Exception as e:  
-                print(f"Event Loop Error: {e}")  
-                import traceback  
-                traceback.print_exc()  
+    def run(self):
+        while True:
+            try:
+                self.scheduler.flush()
+                if not self.d.pending_events():
+                    wait = [self.d]
+                    if self.launcher.wakeup_fd is not None:
+                        wait.append(self.launcher.wakeup_fd)
+                    select.select(wait, [], [], self.timers.timeout())
+                self.timers.run_due()
+
+                while self.d.pending_events():
+                    event = self.d.next_event()
+                    if self.recorder:
+                        self.recorder.record(event)
+                    try:
+                        self.handle_event(event)
+                    except Exception as e:
+                        log.exception("Event Loop Error: %s", e)
+
+                if self.recorder:
+                    self.recorder.end_batch()
+                self.launcher.reap()
+            except KeyboardInterrupt:
+                if self.recorder:
+                    self.recorder.close()
+                break
+            except Exception as e:
+                log.exception("Event Loop Error: %s", e)
+
+    def handle_event(self, event):
+        """Dispatch a single X event"""
+        if event.type == X.MapRequest:
+            self.handle_map_request(event.window)  
+        elif event.type == X.ConfigureRequest:  
+            self.handle_configure_request(event)  
+        elif event.type == X.UnmapNotify:  
+            self.handle_unmap_notify(event)  
+        elif event.type == X.DestroyNotify:  
+            self.handle_destroy_notify(event)  
+        elif event.type == X.PropertyNotify:  
+            self.handle_property_notify(event)  
+        elif event.type == X.ClientMessage:  
+            self.handle_client_message(event)  
+        elif event.type == X.ConfigureNotify:
+            self.handle_configure_notify(event)
+        elif self.xsync.available and event.type == self.xsync.alarm_event:
+            self.handle_sync_alarm(event)
+        elif self.xinput.is_event(event):
+            self.xinput.handle_event(event)
+        elif event.type == X.MappingNotify:
+            self.keybindings.handle_mapping_notify(event)
+        elif self.outputs.is_randr_event(event):
+            self.handle_screen_change()
+        elif event.type == X.MapNotify:
+            pass
+        elif event.type == X.ReparentNotify:  
+            pass  
+        elif event.type == X.KeyRelease:  
+            
+            self.input.handle_event(event)  
+        else:
+
+            self.input.handle_event(event)
   
     def handle_configure_request(self, event):  
         """  
@@ -495,10 +711,9 @@ class WindowManager:
             if event.value_mask & X.CWHeight:  
                 zwin.world_h = max(int(event.height), zwin.min_h)  
             
-            self.renderer.render_world(self.camera, self.windows)  
-            self.ensure_polybar_stacking()  
-            
-            self.send_configure_notify(zwin)  
+            self.window_moved(zwin)
+            self.scheduler.invalidate()
+            self.scheduler.configure_notify(zwin)
         else:  
             
             try:  
@@ -512,22 +727,37 @@ class WindowManager:
                 window.configure(**args)  
                 self.d.sync()  
             except Exception as e:  
-                print(f"Configure unmanaged window error: {e}")  
+                log.warning("Configure unmanaged window error: %s", e)
   
-    def handle_unmap_notify(self, event):  
-        """Window unmaps itself (minimize, hide, etc)"""  
-        window_id = event.window.id  
-        
+    def handle_configure_notify(self, event):
+        """Forget the cached client geometry if a client was resized behind our back"""
+        if event.send_event:
+            return
+        zwin = self.windows.get(event.window.id)
+        if zwin and zwin.client_geometry != (event.x, event.y, event.width, event.height):
+            zwin.client_geometry = None
+
+    def handle_unmap_notify(self, event):
+        """Window unmaps itself (minimize, hide, etc)"""
+        window_id = event.window.id
+        if self.window_kinds.get(window_id) == 'dock':
+            self.update_strut(event.window, None)
+            return
+
         zwin = self.windows.get(window_id)  
-        if zwin:  
-            
-            if hasattr(zwin, 'hidden_by_zoom') and zwin.hidden_by_zoom:  
-                
-                
-                return  
-            print(f"Window {window_id} unmapped itself")  
-            
-            zwin.mapped = False  
+        if zwin:
+
+            if event.event.id == window_id:
+                # the client's own StructureNotify copy; the frame gets one too
+                return
+            if zwin.ignore_unmaps > 0:
+                zwin.ignore_unmaps -= 1
+                return
+            log.debug("Window %s unmapped itself", window_id)
+
+            zwin.mapped = False
+            zwin.client_mapped = False
+            self.canvases.reindex(zwin)
             
             try:  
                 zwin.frame.unmap()  
@@ -537,52 +767,58 @@ class WindowManager:
             if self.focused_window == zwin:  
                 self.focused_window = None  
             self._update_client_list()  
-            self.renderer.render_world(self.camera, self.windows)  
-            self.ensure_polybar_stacking()  
+            self.scheduler.invalidate()
   
-    def handle_destroy_notify(self, event):  
-        """Window destroyed (app closed)"""  
-        destroyed_window_id = event.window.id  
-        
+    def handle_destroy_notify(self, event):
+        """Window destroyed (app closed)"""
+        destroyed_window_id = event.window.id
+        self.forget_unmanaged(destroyed_window_id)
+
         zwin = self.windows.get(destroyed_window_id)  
         if zwin:  
-            print(f"Window {destroyed_window_id} destroyed")  
-            
-            del self.windows[zwin.client.id]  
-            if zwin.frame.id in self.frame_to_client:  
-                del self.frame_to_client[zwin.frame.id]  
-            if zwin.btn_close.id in self.btn_map:  
-                del self.btn_map[zwin.btn_close.id]  
-            if zwin.btn_full.id in self.btn_map:  
-                del self.btn_map[zwin.btn_full.id]  
-            
-            self.window_stack = [w for w in self.window_stack if w.id != zwin.id]  
-            
-            if self.focused_window == zwin:  
-                self.focused_window = None  
-            
-            try:  
-                zwin.frame.destroy()  
-            except XError.BadWindow:  
-                pass  
-            self._update_client_list()  
-            self.renderer.render_world(self.camera, self.windows)  
-            self.ensure_polybar_stacking()  
+            log.debug("Window %s destroyed", destroyed_window_id)
+            self.unmanage(zwin)
+
+    def unmanage(self, zwin):
+        """Drop a client that went away from every index and hand its frame back to the pool"""
+        del self.windows[zwin.client.id]  
+        if zwin.frame.id in self.frame_to_client:  
+            del self.frame_to_client[zwin.frame.id]  
+        
+        self.window_stack = [w for w in self.window_stack if w.id != zwin.id]
+        self.scene.forget(zwin.id)
+        self.canvases.remove(zwin)
+
+        if zwin.sync_alarm is not None:
+            self.sync_alarms.pop(zwin.sync_alarm, None)
+            self.timers.cancel(('sync', zwin.id))
+            try:
+                self.xsync.destroy_alarm(zwin.sync_alarm)
+            except:
+                pass
+        
+        if self.focused_window == zwin:  
+            self.focused_window = None  
+        
+        self.frame_pool.release(zwin.frame)
+        self._update_client_list()  
+        self.scheduler.invalidate()
   
     def handle_property_notify(self, event):  
         """Window property changed (title, hints, etc)"""  
-        window_id = event.window.id  
-        
-        zwin = self.windows.get(window_id)  
-        if not zwin:  
-            return  
-        
-        if event.atom == Xatom.WM_NAME:  
+        window_id = event.window.id
+
+        zwin = self.windows.get(window_id)
+        if not zwin:
+            if event.atom == self._NET_WM_STRUT_PARTIAL and self.window_kinds.get(window_id) == 'dock':
+                self.update_strut(event.window, self.read_strut(event.window))
+            return
+
+        if event.atom == Xatom.WM_NAME:
             try:  
                 new_title = zwin.client.get_wm_name() or "Untitled"  
                 zwin.title = new_title  
-                self.renderer.render_world(self.camera, self.windows)  
-                self.ensure_polybar_stacking()  
+                self.scheduler.invalidate()
             except:  
                 pass  
         
@@ -611,6 +847,8 @@ class WindowManager:
         """Handle ICCCM/EWMH client messages"""  
         try:  
             
+            if self.canvases.handle_client_message(event):
+                return
             if event.client_type == self._NET_WM_STATE:  
                 window_id = event.window.id  
                 zwin = self.windows.get(window_id)  
@@ -629,7 +867,7 @@ class WindowManager:
                 
                 pass  
         except Exception as e:  
-            print(f"ClientMessage handler error: {e}")  
+            log.warning("ClientMessage handler error: %s", e)
   
     def toggle_cmd_bar(self):  
         if self.cmd_active:  
@@ -638,13 +876,15 @@ class WindowManager:
             try:  
                 self.d.ungrab_keyboard(X.CurrentTime)  
                 self.d.sync()  
-                print("Bar closed, keyboard ungrabbed")  
+                log.debug("Bar closed, keyboard ungrabbed")
             except Exception as e:  
-                print(f"Ungrab error: {e}")  
+                log.warning("Ungrab error: %s", e)
         else:  
-            self.cmd_active = True  
-            self.cmd_text = ""  
-            self.cmd_window.map()  
+            self.cmd_active = True
+            self.cmd_text = ""
+            x, y = self._cmd_bar_position()
+            self.cmd_window.configure(x=x, y=y)
+            self.cmd_window.map()
             self.cmd_window.raise_window()  
             try:  
                 self.d.sync()  
@@ -655,37 +895,32 @@ class WindowManager:
                     X.CurrentTime  
                 )  
                 if grab_status == X.GrabSuccess:  
-                    print("Bar opened, keyboard grabbed successfully")  
+                    log.debug("Bar opened, keyboard grabbed successfully")
                 else:  
-                    print(f"Keyboard grab failed with status: {grab_status}")  
+                    log.warning("Keyboard grab failed with status: %s", grab_status)
             except Exception as e:  
-                print(f"Grab error: {e}")  
+                log.warning("Grab error: %s", e)
             self.draw_bar()  
   
     def draw_bar(self):  
         if self.cmd_active:  
-            s = self.root.get_geometry()  
-            self.renderer.render_cmd_bar(self.cmd_window, "> " + self.cmd_text, s.width, s.height)  
-  
-    def execute_command(self):  
-        cmd = self.cmd_text.strip()  
-        if cmd:  
-            aliases = self.config.get("aliases", {})  
-            if cmd in aliases:  
-                actual_cmd = aliases[cmd]  
-                print(f"Alias '{cmd}' -> '{actual_cmd}'")  
-                cmd = actual_cmd  
-            print(f"Executing: {cmd}")  
-            try:  
-                subprocess.Popen(cmd, shell=True, executable="/bin/bash")  
-            except Exception as e:  
-                print(f"Error: {e}")  
-        self.toggle_cmd_bar()  
+            output = self.outputs.output_for_camera(self.camera)
+            self.renderer.render_cmd_bar(self.cmd_window, "> " + self.cmd_text, output.width, output.height)
   
-    def get_size_hints(self, window):  
-        try:  
-            hints = window.get_wm_normal_hints()  
-            min_w, min_h = 0, 0  
+    def execute_command(self):
+        self.launcher.launch(self.cmd_text)
+        self.toggle_cmd_bar()
+
+    def get_size_hints(self, window):
+        try:
+            return self.size_limits(window.get_wm_normal_hints())
+        except:
+            return 0, 0, 32768, 32768
+
+    def size_limits(self, hints):
+        """(min_w, min_h, max_w, max_h) from a WM_NORMAL_HINTS struct (or None)"""
+        try:
+            min_w, min_h = 0, 0
             max_w, max_h = 32768, 32768  
             if hints:  
                 if hints.flags & X.PMinSize:  
@@ -701,60 +936,62 @@ class WindowManager:
         except:  
             return 0, 0, 32768, 32768  
   
-    def handle_map_request(self, window):  
-        
-        try:  
-            attrs = window.get_attributes()  
-            if attrs.override_redirect:  
-                
-                if self.is_polybar_window(window):  
-                    self.polybar_windows.append(window)  
-                    print(f"✓ Detected polybar window: {window.id}")  
-                window.map()  
-                
-                self.ensure_polybar_stacking()  
-                return  
-        except:  
-            return  
-          
-        
-        if window.id in self.windows:  
-            
-            zwin = self.windows[window.id]  
-            zwin.frame.map()  
-            zwin.mapped = True  
-            self._update_client_list()  
-            return  
-          
-        
-        if window.id in self.btn_map:  
-            return  
-          
+    def handle_map_request(self, window):
+        kind = self.window_kinds.get(window.id)
+        try:
+            if kind == 'popup':
+                window.map()
+                return
+            if kind == 'dock':
+                self.add_dock(window, self.read_strut(window))
+                window.map()
+                self.scheduler.restack()
+                return
+        except:
+            return
+
+        if window.id in self.windows:
+
+            zwin = self.windows[window.id]
+            if self.canvases.is_visible(zwin):
+                zwin.frame.map()
+            zwin.mapped = True
+            self.canvases.reindex(zwin)
+            self._update_client_list()
+            return
+
+        info = self.backend.fetch_window_info(self.d, [window])[0]
+        if not info.exists:
+            return
+
+        kind = self.classify_window(info)
+        if kind != 'normal':
+            self.window_kinds[window.id] = kind
+            try:
+                if kind == 'dock':
+                    self.add_dock(window, info.strut)
+                    window.map()
+                    self.scheduler.restack()
+                else:
+                    window.map()
+            except:
+                pass
+            return
+
         
-        try:  
-            transient_for = window.get_wm_transient_for()  
-            is_dialog = transient_for is not None  
-        except:  
-            is_dialog = False  
-            transient_for = None  
-          
-        try:  
-            geom = window.get_geometry()  
-            min_w, min_h, max_w, max_h = self.get_size_hints(window)  
-        except:  
-            return  
-          
-        target_w = max(geom.width, min_w)  
-        target_h = max(geom.height, min_h)  
-        if target_w < 50: target_w = 400  
-        if target_h < 50: target_h = 300  
-          
-        try:  
-            name = window.get_wm_name() or "Untitled"  
-            wm_class = window.get_wm_class()  
-            app_name = wm_class[1] if wm_class else "unknown"  
-        except:  
-            name = "Untitled"; app_name = "unknown"  
+        transient_for = self.d.create_resource_object('window', info.transient_for) if info.transient_for else None
+        is_dialog = transient_for is not None
+
+        geom_w, geom_h = info.geometry[2:]
+        min_w, min_h, max_w, max_h = self.size_limits(info.normal_hints)
+
+        target_w = max(geom_w, min_w)
+        target_h = max(geom_h, min_h)
+        if target_w < 50: target_w = 400
+        if target_h < 50: target_h = 300
+
+        name = info.name or "Untitled"
+        app_name = info.wm_class[1] if info.wm_class else "unknown"
           
         theme = self.renderer.create_theme(app_name)  
           
@@ -763,9 +1000,11 @@ class WindowManager:
             parent_zwin = self.windows[transient_for.id]  
             world_x = parent_zwin.world_x + 50  
             world_y = parent_zwin.world_y + 50  
-        else:  
-            world_x = self.camera.x  
-            world_y = self.camera.y  
+            canvas = parent_zwin.canvas
+        else:
+            canvas = None
+            world_x, world_y = self.placer.place(self.canvases.current.index, self.camera.x, self.camera.y,
+                                                 target_w, target_h + 25)
           
         sx, sy, sw, sh = self.renderer.project(  
             self.camera, world_x, world_y,  
@@ -773,117 +1012,161 @@ class WindowManager:
         )  
           
         
-        frame = self.root.create_window(  
-            sx, sy, sw, sh,  
-            border_width=1,  
-            depth=X.CopyFromParent,  
-            visual=X.CopyFromParent,  
-            background_pixel=theme['bar'],  
-            event_mask=(  
-                X.SubstructureNotifyMask |  
-                X.ButtonPressMask |  
-                X.ButtonReleaseMask |  
-                X.ButtonMotionMask |  
-                X.ExposureMask  
-            )  
-        )  
-          
-        btn_size = 20  
-        
-        btn_close = frame.create_window(  
-            sw - btn_size, 0, btn_size, btn_size,  
-            border_width=1, depth=X.CopyFromParent, visual=X.CopyFromParent,  
-            background_pixel=theme['close'],   
-            event_mask=X.ButtonPressMask | X.ExposureMask  
-        )  
-        btn_full = frame.create_window(  
-            sw - (btn_size * 2), 0, btn_size, btn_size,  
-            border_width=1, depth=X.CopyFromParent, visual=X.CopyFromParent,  
-            background_pixel=theme['full'],   
-            event_mask=X.ButtonPressMask | X.ExposureMask  
-        )  
+        frame = self.frame_pool.acquire(sx, sy, sw, sh, theme['bar'])
           
-        zwin = ZWindow(  
-            window.id,  
-            window, frame, btn_close, btn_full,  
-            world_x, world_y, target_w, target_h + 25,  
-            title=name  
-        )  
+        zwin = ZWindow(
+            window.id,
+            window, frame,
+            world_x, world_y, target_w, target_h + 25,
+            title=name
+        )
+        zwin.theme = theme
         zwin.min_w = min_w; zwin.min_h = min_h  
         zwin.max_w = max_w; zwin.max_h = max_h  
         zwin.mapped = True  
-        zwin.is_dialog = is_dialog  
-        zwin.transient_for = transient_for  
-          
-        
-        self.windows[window.id] = zwin  
-        self.frame_to_client[frame.id] = window.id  
-        self.btn_map[btn_close.id] = ('close', zwin)  
-        self.btn_map[btn_full.id] = ('maximize', zwin)  
-          
-        
-        try:  
-            window.change_attributes(  
-                event_mask=(  
-                    X.PropertyChangeMask |  
-                    X.StructureNotifyMask |  
-                    X.FocusChangeMask  
-                )  
-            )  
-        except:  
-            pass  
+        zwin.is_dialog = is_dialog
+        zwin.transient_for = transient_for
+        zwin.app_class = app_name
+        self.setup_sync(zwin, info)
+
+
+        self.windows[window.id] = zwin
+        self.frame_to_client[frame.id] = window.id
+        self.canvases.add(zwin, canvas)
           
         
-        try:  
-            window.change_property(  
-                self.WM_STATE, self.WM_STATE, 32,  
-                [1, X.NONE]  
-            )  
-        except:  
-            pass  
+        try:
+            window.change_property(
+                self.WM_STATE, self.WM_STATE, 32,
+                [1, X.NONE]
+            )
+        except:
+            pass
+
+
+        window.reparent(frame, 0, 25)
+
+        self.select_client_input(window, name)
           
-        
-        window.reparent(frame, 0, 25)  
-          
-        
-        
-        
-        
-        
-        try:  
-            window.grab_button(  
-                1,                    
-                X.AnyModifier,        
-                True,                 
-                X.ButtonPressMask,    
-                X.GrabModeSync,       
-                X.GrabModeAsync,      
-                X.NONE,               
-                X.NONE                
-            )  
-            print(f"✓ Passive grab set on {name}")  
-        except Exception as e:  
-            print(f"⚠ Failed to set passive grab on {name}: {e}")  
-          
-        
-        frame.map()  
-        btn_close.map()  
-        btn_full.map()  
+        visible = self.canvases.is_visible(zwin)
+        if visible:
+            frame.map()
         
           
         
         if is_dialog and transient_for and transient_for.id in self.windows:  
             parent_zwin = self.windows[transient_for.id]  
             frame.configure(stack_mode=X.Above, sibling=parent_zwin.frame)  
+            self.scene.attach(zwin, parent_zwin)
           
-        self.focus_window(zwin)  
-        self._update_client_list()  
-        self.renderer.render_world(self.camera, self.windows)  
-        self.ensure_polybar_stacking()  
-        
-        self.send_configure_notify(zwin)  
+        if self.launcher.has_pending_maps():
+            self.launcher.note_map(info.pid)
+
+        if visible:
+            self.focus_window(zwin)
+        self._update_client_list()
+        self.scheduler.invalidate()
+        self.scheduler.configure_notify(zwin)
   
-    def close_window(self, zwin):  
+    def select_client_input(self, window, name):
+        """
+        Per-connection state on a managed client: our event mask and the
+        click-to-focus passive grab. Redone when adopting clients after a restart.
+        """
+        try:
+            window.change_attributes(
+                event_mask=(
+                    X.PropertyChangeMask |
+                    X.StructureNotifyMask |
+                    X.FocusChangeMask
+                )
+            )
+        except:
+            pass
+
+        try:
+            window.grab_button(
+                1,
+                X.AnyModifier,
+                True,
+                X.ButtonPressMask,
+                X.GrabModeSync,
+                X.GrabModeAsync,
+                X.NONE,
+                X.NONE
+            )
+            log.debug("✓ Passive grab set on %s", name)
+        except Exception as e:
+            log.warning("⚠ Failed to set passive grab on %s: %s", name, e)
+
+    def setup_sync(self, zwin, info):
+        """Enable _NET_WM_SYNC_REQUEST pacing if the client supports it"""
+        if not self.xsync.available:
+            return
+        if self._NET_WM_SYNC_REQUEST not in info.protocols or not info.sync_counter:
+            return
+        try:
+            counter = info.sync_counter
+            zwin.sync_value = self.xsync.query_counter(counter)
+            zwin.sync_alarm = self.xsync.create_alarm(counter, zwin.sync_value + 1)
+            zwin.sync_counter = counter
+            self.sync_alarms[zwin.sync_alarm] = zwin
+        except Exception as e:
+            log.warning("⚠ Sync counter setup failed for %s: %s", zwin.title, e)
+
+    def request_interactive_resize(self, zwin):
+        """
+        Apply zwin's new world size during an interactive resize.
+        For sync-capable clients only one resize is in flight at a time:
+        sizes arriving while the client is still painting are dropped and
+        only the latest one is applied once its counter catches up.
+        """
+        if zwin.sync_counter is None:
+            self.scheduler.invalidate()
+            return
+
+        if zwin.sync_pending:
+            zwin.sync_deferred = True
+            return
+
+        zwin.sync_value += 1
+        try:
+            self.xsync.change_alarm(zwin.sync_alarm, zwin.sync_counter, zwin.sync_value)
+            ev = event.ClientMessage(
+                window=zwin.client,
+                client_type=self.WM_PROTOCOLS,
+                data=(32, [self._NET_WM_SYNC_REQUEST, X.CurrentTime,
+                           zwin.sync_value & 0xFFFFFFFF, (zwin.sync_value >> 32) & 0xFFFFFFFF, 0])
+            )
+            zwin.client.send_event(ev, event_mask=X.NoEventMask)
+        except Exception as e:
+            log.warning("Sync request error: %s", e)
+            self.scheduler.invalidate()
+            return
+
+        zwin.sync_pending = True
+        previous = zwin.client_geometry
+        self.scheduler.render_now()
+
+        if zwin.client_geometry == previous:
+            self.finish_sync(zwin)
+        else:
+            self.timers.call_later(self.SYNC_TIMEOUT, ('sync', zwin.id), lambda: self.finish_sync(zwin))
+
+    def handle_sync_alarm(self, event):
+        zwin = self.sync_alarms.get(event.alarm)
+        if zwin and zwin.sync_pending:
+            self.finish_sync(zwin)
+
+    def finish_sync(self, zwin):
+        """Client painted the last size (or timed out): apply the newest pending size"""
+        self.timers.cancel(('sync', zwin.id))
+        zwin.sync_pending = False
+        if zwin.sync_deferred and zwin.id in self.windows:
+            zwin.sync_deferred = False
+            self.request_interactive_resize(zwin)
+
+    def close_window(self, zwin):
         """Close window using ICCCM protocol"""  
         
         protocols = self.get_wm_protocols(zwin.client)  
@@ -901,20 +1184,45 @@ class WindowManager:
                 pass  
         
   
-    def toggle_fullscreen(self, zwin):  
-        screen = self.root.get_geometry()  
-        if zwin.is_fullscreen:  
+    def window_moved(self, zwin):
+        """zwin's world position or size changed: keep the scene graph and placement index in step"""
+        self.scene.moved(zwin)
+        self.canvases.reindex(zwin)
+
+    def group_focused(self):
+        """First call picks the focused window as group parent, the next attaches the then focused window to it"""
+        zwin = self.focused_window
+        if not zwin:
+            return
+        parent = self.windows.get(self.group_pick)
+        if parent is None or parent is zwin:
+            self.group_pick = zwin.id
+            log.info("✓ Grouping: picked %s, focus another window and group again", zwin.title)
+            return
+        self.group_pick = None
+        if self.scene.attach(zwin, parent):
+            log.info("✓ %s now moves with %s", zwin.title, parent.title)
+        else:
+            log.warning("⚠ Cannot group %s under its own child", parent.title)
+
+    def ungroup_focused(self):
+        zwin = self.focused_window
+        if zwin and self.scene.parent_of(zwin.id) is not None:
+            self.scene.detach(zwin)
+            log.info("✓ %s ungrouped", zwin.title)
+
+    def toggle_fullscreen(self, zwin):
+        """Fullscreen fills the output whose camera currently renders the window"""
+        if zwin.is_fullscreen:
             if zwin.saved_geometry:  
                 zwin.world_x, zwin.world_y, zwin.world_w, zwin.world_h = zwin.saved_geometry  
                 zwin.saved_geometry = None  
             zwin.is_fullscreen = False  
         else:  
-            zwin.saved_geometry = (zwin.world_x, zwin.world_y, zwin.world_w, zwin.world_h)  
-            zwin.world_w = int(screen.width / self.camera.zoom)  
-            zwin.world_h = int(screen.height / self.camera.zoom)  
-            zwin.world_x = int(self.camera.x - (zwin.world_w / 2))  
-            zwin.world_y = int(self.camera.y - (zwin.world_h / 2))  
-            zwin.is_fullscreen = True  
+            zwin.saved_geometry = (zwin.world_x, zwin.world_y, zwin.world_w, zwin.world_h)
+            zwin.world_x, zwin.world_y, zwin.world_w, zwin.world_h = self.fullscreen_geometry(zwin)
+            zwin.is_fullscreen = True
+        self.window_moved(zwin)
           
         
         try:  
@@ -935,23 +1243,68 @@ class WindowManager:
         except:  
             pass  
           
-        self.renderer.render_world(self.camera, self.windows)  
-        self.send_configure_notify(zwin)  
-          
-        
-        self.ensure_polybar_stacking()  
+        self.scheduler.invalidate()
+        self.scheduler.configure_notify(zwin)
   
+    def fullscreen_geometry(self, zwin):
+        """World rect filling the viewport (struts excluded) of the output whose camera renders zwin"""
+        cam = self.renderer.camera_for(zwin, self.camera)
+        w = int(cam.screen_w / cam.zoom)
+        h = int(cam.screen_h / cam.zoom)
+        return (int(cam.x - w / 2), int(cam.y - h / 2), w, h)
+
+    def refit_fullscreen(self):
+        """Outputs or struts changed: fit fullscreen windows to their output's viewport again"""
+        for zwin in self.windows.values():
+            if not zwin.is_fullscreen:
+                continue
+            geometry = self.fullscreen_geometry(zwin)
+            if geometry != (zwin.world_x, zwin.world_y, zwin.world_w, zwin.world_h):
+                zwin.world_x, zwin.world_y, zwin.world_w, zwin.world_h = geometry
+                self.window_moved(zwin)
+                self.scheduler.configure_notify(zwin)
+
     def zoom_camera(self, direction):  
         self.camera.zoom += (0.1 * direction)  
         self.camera.zoom = max(0.11, min(self.camera.zoom, 5.0))  
-        print(f"Zoom: {self.camera.zoom:.2f}")  
-        try:  
-            self.renderer.render_world(self.camera, self.windows)  
-            self.ensure_polybar_stacking()  
-        except Exception as e:  
-            print(f"Renderer Error: {e}")  
+        log.debug("Zoom: %.2f", self.camera.zoom)
+        try:
+            self.begin_zoom_gesture()
+            self.scheduler.invalidate()
+        except Exception as e:
+            log.warning("Renderer Error: %s", e)
+
+    def begin_zoom_gesture(self):
+        """
+        While zoom keeps changing only frames are moved/resized; client
+        resizes are committed once zoom has been idle for zoom_resize_idle_ms.
+        """
+        self.renderer.zoom_gesture = True
+        self.timers.call_later(self.renderer.zoom_idle, 'zoom_commit', self.end_zoom_gesture)
+
+    def end_zoom_gesture(self):
+        self.renderer.zoom_gesture = False
+        self.scheduler.invalidate()
   
-    def get_window_by_frame(self, frame_id):  
+    def restart(self):
+        """Re-exec the WM in place, keeping every window where it is"""
+        restart.restart(self)
+
+    def toggle_minimap(self):
+        if self.minimap.toggle():
+            self.minimap.focused = self.focused_window
+            self.minimap.update(self.camera, self.canvases.windows)
+            self.scheduler.restack()
+
+    def jump_to_minimap(self, mx, my):
+        """Centre the camera on the world point under a minimap click"""
+        target = self.minimap.world_at(mx, my)
+        if target is None:
+            return
+        self.camera.x, self.camera.y = target
+        self.scheduler.invalidate()
+
+    def get_window_by_frame(self, frame_id):
         
         client_id = self.frame_to_client.get(frame_id)  
         if client_id:  
@@ -960,12 +1313,11 @@ class WindowManager:
   
     def save_camera_pos(self, index):  
         self.camera.saved_spots[index] = (self.camera.x, self.camera.y, self.camera.zoom)  
-        print(f"Saved Camera Position {index}")  
+        log.debug("Saved Camera Position %s", index)
   
     def load_camera_pos(self, index):  
         if index in self.camera.saved_spots:  
             x, y, z = self.camera.saved_spots[index]  
             self.camera.x = x; self.camera.y = y; self.camera.zoom = z  
-            print(f"Jumped to Position {index}")  
-            self.renderer.render_world(self.camera, self.windows)  
-            self.ensure_polybar_stacking()  
+            log.debug("Jumped to Position %s", index)
+            self.scheduler.invalidate()
@@ -0,0 +1,251 @@
+"""
+XInput2 smooth scrolling, touchpad gestures and raw motion.
+
+python-xlib's xinput module covers requests but parses neither valuators
+nor raw or gesture events, so those are decoded here from the generic
+event payload. Everything feeds wm.navigator; nothing renders directly.
+"""
+
+import struct
+from Xlib import X
+from Xlib.ext import xinput
+import log
+
+extname = 'XInputExtension'
+
+GenericEventCode = 35
+
+DeviceChanged = 1
+Motion = 6
+Enter = 7
+RawMotion = 17
+GesturePinchBegin = 27
+GesturePinchUpdate = 28
+GesturePinchEnd = 29
+GestureSwipeBegin = 30
+GestureSwipeUpdate = 31
+GestureSwipeEnd = 32
+
+ScrollTypeVertical = 1
+ScrollTypeHorizontal = 2
+
+DEVICE_EVENT = struct.Struct("=HIIIIIiiiiHHHxxI4I4B")
+RAW_EVENT = struct.Struct("=HIIHHI4x")
+GESTURE_POS = struct.Struct("=HIIIII8i")
+PINCH_SCALE = struct.Struct("=i")
+FP3232 = struct.Struct("=iI")
+
+
+def fp1616(v):
+    return v / 65536.0
+
+
+def fp3232(data, offset):
+    integral, frac = FP3232.unpack_from(data, offset)
+    return integral + frac / 4294967296.0
+
+
+def set_bits(data, offset, words):
+    """Indices of the bits set in a valuator mask of `words` CARD32s"""
+    bits = []
+    for i, byte in enumerate(bytes(data[offset:offset + words * 4])):
+        for b in range(8):
+            if byte & (1 << b):
+                bits.append(i * 8 + b)
+    return bits
+
+
+def mask_words(*events):
+    """XI event mask as a list of CARD32s (python-xlib packs ints > 32 bits wrongly)"""
+    value = 0
+    for e in events:
+        value |= 1 << e
+    words = []
+    while value:
+        words.append(value & 0xFFFFFFFF)
+        value >>= 32
+    return words or [0]
+
+
+class RawPayload:
+    """Keeps the generic event payload as bytes; registered in place of python-xlib's structs"""
+    structcode = None
+
+    def parse_binary(self, data, display):
+        return bytes(data), b''
+
+
+class XInput2:
+    """
+    Thin wrapper around XInput 2.1+ for continuous navigation.
+
+    - Motion events carrying scroll valuators (hi-res wheels, touchpad
+      two-finger scrolling) over the bare desktop zoom around the pointer
+      (vertical) or pan (horizontal), in fractional notches. Over a window
+      the scroll belongs to the client; Super+wheel there takes the core
+      button path. Valuator positions are reset on Enter and
+      DeviceChanged, as the spec requires.
+    - XI 2.4 pinch gestures zoom around the pinch centre, swipes pan.
+    - While a Super+drag camera pan is active, raw motion deltas pan the
+      canvas, so it keeps moving when the pointer hits the screen edge.
+
+    available is False without the extension (or below 2.1); the core
+    button 4/5 and motion paths then do the job alone.
+    """
+
+    def __init__(self, wm):
+        self.wm = wm
+        self.d = wm.d
+        self.available = False
+        self.gestures = False
+        self.opcode = None
+        self.scroll = {}
+        self.last = {}
+        self.pinch_scale = 1.0
+        self.raw_panning = False
+
+        try:
+            info = self.d.query_extension(extname)
+            if not info or not hasattr(self.d, 'ge_add_event_data'):
+                log.warning("⚠ XInput2 not available, smooth scrolling and gestures disabled")
+                return
+            self.opcode = info.major_opcode
+            version = xinput.XIQueryVersion(display=self.d.display, opcode=self.opcode,
+                                            major_version=2, minor_version=4)
+            if (version.major_version, version.minor_version) < (2, 1):
+                log.warning("⚠ XInput %d.%d has no smooth scrolling", version.major_version, version.minor_version)
+                return
+            self.gestures = version.minor_version >= 4
+            for evtype in (DeviceChanged, Motion, Enter, RawMotion, GesturePinchBegin, GesturePinchUpdate,
+                           GesturePinchEnd, GestureSwipeBegin, GestureSwipeUpdate, GestureSwipeEnd):
+                self.d.ge_add_event_data(self.opcode, evtype, RawPayload())
+            self.query_scroll_classes(xinput.AllMasterDevices)
+            self.select(False)
+            self.available = True
+            log.info("✓ XInput %d.%d: smooth scrolling%s enabled", version.major_version,
+                     version.minor_version, " and gestures" if self.gestures else "")
+        except Exception as e:
+            log.warning("⚠ XInput2 init failed: %s", e)
+
+    def select(self, raw):
+        events = [DeviceChanged, Motion, Enter]
+        if self.gestures:
+            events += [GesturePinchBegin, GesturePinchUpdate, GesturePinchEnd,
+                       GestureSwipeBegin, GestureSwipeUpdate, GestureSwipeEnd]
+        if raw:
+            events.append(RawMotion)
+        xinput.XISelectEvents(display=self.d.display, opcode=self.opcode, window=self.wm.root,
+                              masks=[(xinput.AllMasterDevices, mask_words(*events))])
+
+    def query_scroll_classes(self, deviceid):
+        """Scroll valuators of the master pointer(s): (deviceid, number) -> (scroll type, increment)"""
+        reply = xinput.XIQueryDevice(display=self.d.display, opcode=self.opcode, deviceid=deviceid)
+        for dev in reply.devices:
+            for key in [k for k in self.scroll if k[0] == dev.deviceid]:
+                del self.scroll[key]
+                self.last.pop(key, None)
+            for cls in dev.classes:
+                if cls.type == xinput.ScrollClass and cls.increment:
+                    self.scroll[(dev.deviceid, cls.number)] = (cls.scroll_type, cls.increment)
+
+    def begin_raw_pan(self):
+        """Camera drag started: pan from raw motion. False if the core path has to do it"""
+        if not self.available:
+            return False
+        self.select(True)
+        self.raw_panning = True
+        return True
+
+    def end_raw_pan(self):
+        if self.raw_panning:
+            self.raw_panning = False
+            self.select(False)
+
+    def is_event(self, event):
+        return self.available and event.type == GenericEventCode and event.extension == self.opcode
+
+    def handle_event(self, event):
+        data = event.data
+        if not isinstance(data, bytes):
+            return
+        evtype = event.evtype
+        if evtype == Motion:
+            self._on_motion(data)
+        elif evtype == RawMotion:
+            self._on_raw_motion(data)
+        elif evtype == Enter:
+            self.last.clear()
+        elif evtype == DeviceChanged:
+            self.query_scroll_classes(struct.unpack_from("=H", data)[0])
+        elif GesturePinchBegin <= evtype <= GesturePinchEnd:
+            self._on_pinch(evtype, data)
+        elif GestureSwipeBegin <= evtype <= GestureSwipeEnd:
+            self._on_swipe(evtype, data)
+
+    def _on_motion(self, data):
+        fields = DEVICE_EVENT.unpack_from(data)
+        deviceid, child = fields[0], fields[5]
+        root_x, root_y = fp1616(fields[6]), fp1616(fields[7])
+        buttons_len, valuators_len = fields[10], fields[11]
+        effective_mods = fields[17]
+        offset = DEVICE_EVENT.size + buttons_len * 4
+        values = offset + valuators_len * 4
+
+        notches_x = notches_y = 0.0
+        for i, number in enumerate(set_bits(data, offset, valuators_len)):
+            key = (deviceid, number)
+            if key not in self.scroll:
+                continue
+            value = fp3232(data, values + i * 8)
+            last = self.last.get(key)
+            self.last[key] = value
+            if last is None:
+                continue
+            scroll_type, increment = self.scroll[key]
+            if scroll_type == ScrollTypeVertical:
+                notches_y += (value - last) / increment
+            elif scroll_type == ScrollTypeHorizontal:
+                notches_x += (value - last) / increment
+
+        if not (notches_x or notches_y) or effective_mods & X.Mod4Mask or child != X.NONE:
+            return
+        self.wm.set_active_output(int(root_x), int(root_y))
+        navigator = self.wm.navigator
+        if notches_y:
+            navigator.zoom_steps(-notches_y, root_x, root_y)
+        if notches_x:
+            navigator.scroll_pan(notches_x, 0)
+
+    def _on_raw_motion(self, data):
+        if not self.raw_panning:
+            return
+        deviceid, _, _, _, valuators_len, _ = RAW_EVENT.unpack_from(data)
+        values = RAW_EVENT.size + valuators_len * 4
+        dx = dy = 0.0
+        for i, number in enumerate(set_bits(data, RAW_EVENT.size, valuators_len)):
+            if number == 0:
+                dx = fp3232(data, values + i * 8)
+            elif number == 1:
+                dy = fp3232(data, values + i * 8)
+        if dx or dy:
+            self.wm.navigator.pan_by(dx, dy)
+
+    def _on_pinch(self, evtype, data):
+        pos = GESTURE_POS.unpack_from(data)
+        root_x, root_y = fp1616(pos[6]), fp1616(pos[7])
+        scale = fp1616(PINCH_SCALE.unpack_from(data, GESTURE_POS.size)[0])
+        if evtype == GesturePinchBegin:
+            self.pinch_scale = 1.0
+            self.wm.set_active_output(int(root_x), int(root_y))
+            return
+        if scale > 0 and self.pinch_scale > 0:
+            self.wm.navigator.zoom_by(scale / self.pinch_scale, root_x, root_y)
+        self.wm.navigator.pan_by(fp1616(pos[10]), fp1616(pos[11]))
+        self.pinch_scale = scale
+
+    def _on_swipe(self, evtype, data):
+        pos = GESTURE_POS.unpack_from(data)
+        if evtype == GestureSwipeBegin:
+            self.wm.set_active_output(int(fp1616(pos[6])), int(fp1616(pos[7])))
+            return
+        self.wm.navigator.pan_by(fp1616(pos[10]), fp1616(pos[11]))
@@ -0,0 +1,170 @@
+"""
+Minimal SYNC extension bindings (python-xlib ships none).
+Only what _NET_WM_SYNC_REQUEST needs: counters and alarms.
+"""
+
+from Xlib.protocol import rq
+import log
+
+extname = 'SYNC'
+
+AlarmNotifyCode = 1
+
+CACounter = 1 << 0
+CAValueType = 1 << 1
+CAValue = 1 << 2
+CATestType = 1 << 3
+CADelta = 1 << 4
+CAEvents = 1 << 5
+
+ValueTypeAbsolute = 0
+TestPositiveComparison = 2
+
+
+def split64(value):
+    """INT64 on the wire is (hi: INT32, lo: CARD32)"""
+    value &= 0xFFFFFFFFFFFFFFFF
+    return (value >> 32) & 0xFFFFFFFF, value & 0xFFFFFFFF
+
+
+def join64(hi, lo):
+    value = ((hi & 0xFFFFFFFF) << 32) | (lo & 0xFFFFFFFF)
+    if value >= 1 << 63:
+        value -= 1 << 64
+    return value
+
+
+class Initialize(rq.ReplyRequest):
+    _request = rq.Struct(rq.Card8('opcode'),
+                         rq.Opcode(0),
+                         rq.RequestLength(),
+                         rq.Card8('major_version'),
+                         rq.Card8('minor_version'),
+                         rq.Pad(2),
+                         )
+
+    _reply = rq.Struct(rq.ReplyCode(),
+                       rq.Pad(1),
+                       rq.Card16('sequence_number'),
+                       rq.ReplyLength(),
+                       rq.Card8('major_version'),
+                       rq.Card8('minor_version'),
+                       rq.Pad(22),
+                       )
+
+
+class QueryCounter(rq.ReplyRequest):
+    _request = rq.Struct(rq.Card8('opcode'),
+                         rq.Opcode(5),
+                         rq.RequestLength(),
+                         rq.Card32('counter'),
+                         )
+
+    _reply = rq.Struct(rq.ReplyCode(),
+                       rq.Pad(1),
+                       rq.Card16('sequence_number'),
+                       rq.ReplyLength(),
+                       rq.Int32('value_hi'),
+                       rq.Card32('value_lo'),
+                       rq.Pad(16),
+                       )
+
+
+class CreateAlarm(rq.Request):
+    _request = rq.Struct(rq.Card8('opcode'),
+                         rq.Opcode(8),
+                         rq.RequestLength(),
+                         rq.Card32('alarm'),
+                         rq.Card32('value_mask'),
+                         rq.List('values', rq.Card32Obj),
+                         )
+
+
+class ChangeAlarm(rq.Request):
+    _request = rq.Struct(rq.Card8('opcode'),
+                         rq.Opcode(9),
+                         rq.RequestLength(),
+                         rq.Card32('alarm'),
+                         rq.Card32('value_mask'),
+                         rq.List('values', rq.Card32Obj),
+                         )
+
+
+class DestroyAlarm(rq.Request):
+    _request = rq.Struct(rq.Card8('opcode'),
+                         rq.Opcode(11),
+                         rq.RequestLength(),
+                         rq.Card32('alarm'),
+                         )
+
+
+class AlarmNotify(rq.Event):
+    _code = None
+    _fields = rq.Struct(rq.Card8('type'),
+                        rq.Card8('kind'),
+                        rq.Card16('sequence_number'),
+                        rq.Card32('alarm'),
+                        rq.Int32('counter_value_hi'),
+                        rq.Card32('counter_value_lo'),
+                        rq.Int32('alarm_value_hi'),
+                        rq.Card32('alarm_value_lo'),
+                        rq.Card32('time'),
+                        rq.Card8('state'),
+                        rq.Pad(3),
+                        )
+
+
+class XSync:
+    """
+    Thin wrapper around the SYNC extension.
+    available is False when the server doesn't support it; callers then
+    fall back to unpaced resizing.
+    """
+
+    def __init__(self, d):
+        self.d = d
+        self.available = False
+        self.opcode = None
+        self.alarm_event = None
+
+        try:
+            info = d.query_extension(extname)
+            if not info:
+                log.warning("⚠ SYNC extension not available, resize pacing disabled")
+                return
+            self.opcode = info.major_opcode
+            Initialize(display=d.display, opcode=self.opcode, major_version=3, minor_version=1)
+            d.extension_add_event(info.first_event + AlarmNotifyCode, AlarmNotify)
+            self.alarm_event = info.first_event + AlarmNotifyCode
+            self.available = True
+        except Exception as e:
+            log.warning("⚠ SYNC init failed: %s", e)
+
+    def query_counter(self, counter):
+        r = QueryCounter(display=self.d.display, opcode=self.opcode, counter=counter)
+        return join64(r.value_hi, r.value_lo)
+
+    def _alarm_values(self, counter, value):
+        hi, lo = split64(value)
+        return (
+            CACounter | CAValueType | CAValue | CATestType | CADelta | CAEvents,
+            [counter, ValueTypeAbsolute, hi, lo, TestPositiveComparison, 0, 0, 1],
+        )
+
+    def create_alarm(self, counter, value):
+        """Alarm that fires AlarmNotify once counter >= value"""
+        alarm = self.d.display.allocate_resource_id()
+        mask, values = self._alarm_values(counter, value)
+        CreateAlarm(display=self.d.display, opcode=self.opcode,
+                    alarm=alarm, value_mask=mask, values=values)
+        return alarm
+
+    def change_alarm(self, alarm, counter, value):
+        """Re-arm an existing alarm for a new target value"""
+        mask, values = self._alarm_values(counter, value)
+        ChangeAlarm(display=self.d.display, opcode=self.opcode,
+                    alarm=alarm, value_mask=mask, values=values)
+
+    def destroy_alarm(self, alarm):
+        DestroyAlarm(display=self.d.display, opcode=self.opcode, alarm=alarm)
+        self.d.display.free_resource_id(alarm)